@@ -1,5 +1,50 @@
+from django.core.cache import caches
 from rest_framework.permissions import BasePermission
 
+
+PERMISSION_CACHE_BACKEND = 'generic'
+PERMISSION_CACHE_TIMEOUT = 60 * 60  # Cache for one hour
+PERMISSION_VERSION_KEY = 'admin_permissions_version'
+
+
+def get_permission_cache_key(user_id):
+    return f"admin_permissions_user_{user_id}"
+
+
+def get_cached_permissions(user):
+    """
+    Returns the set of "app_label.codename" permissions of the user, shared across workers through the cache.
+
+    Every entry is stamped with a global permissions version, so any change to groups or permissions
+    (see `nxtbn.core.signals`) invalidates all entries at once. The version and the user's entry are
+    read in a single cache round trip.
+    """
+    cache = caches[PERMISSION_CACHE_BACKEND]
+    user_key = get_permission_cache_key(user.pk)
+    cached = cache.get_many([PERMISSION_VERSION_KEY, user_key])
+    version = cached.get(PERMISSION_VERSION_KEY, 0)
+
+    entry = cached.get(user_key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    permissions = frozenset(user.get_all_permissions())
+    cache.set(user_key, (version, permissions), timeout=PERMISSION_CACHE_TIMEOUT)
+    return permissions
+
+
+def invalidate_permission_cache(user_id=None):
+    """
+    Drop the cached permissions of a single user, or of every user when no user is given.
+    """
+    cache = caches[PERMISSION_CACHE_BACKEND]
+    if user_id is not None:
+        cache.delete(get_permission_cache_key(user_id))
+        return
+
+    cache.add(PERMISSION_VERSION_KEY, 0, timeout=None)
+    cache.incr(PERMISSION_VERSION_KEY)
+
 class NxtbnAdminPermission(BasePermission):
     """
     Custom permission class that checks if a user has the required permission 
@@ -42,7 +87,7 @@ class NxtbnAdminPermission(BasePermission):
         permission_codename = f"{permission_action}_{model_name}"
 
         # Check if the user has the specific permission
-        return request.user.has_perm(f"{app_label}.{permission_codename}")
+        return f"{app_label}.{permission_codename}" in get_cached_permissions(request.user)
 
 
 
@@ -2,5 +2,5 @@ from django.urls import path
 from nxtbn.core.api.dashboard import views as core_views
 
 urlpatterns = [
-        
+    path('cache-stats/', core_views.CacheStatsView.as_view(), name='cache-stats'),
 ]
@@ -22,4 +22,18 @@ from django.core.files.storage import FileSystemStorage
 from rest_framework.parsers import MultiPartParser
 from rest_framework.parsers import JSONParser
 
-from rest_framework import serializers
\ No newline at end of file
+from rest_framework import serializers
+
+from nxtbn.core.admin_permissions import IsSuperUser
+from nxtbn.core.cache import CacheStats
+
+
+
+class CacheStatsView(APIView):
+    """
+    Hit, miss and recompute counters of the stampede protected caches (`nxtbn.core.cache.StampedeCache`).
+    """
+    permission_classes = (IsSuperUser,)
+
+    def get(self, request):
+        return Response(CacheStats.get_all())
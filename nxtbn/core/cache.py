@@ -0,0 +1,296 @@
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+WATERMARK_CACHE_BACKEND = 'generic'
+
+
+class LocalTTLCache:
+    """
+    A bounded, thread-safe, in-process cache with a per-entry timeout.
+
+    Used as a first tier in front of the shared (memcached) cache for small hot values,
+    so the common case is served without a network hop. Each worker process has its own
+    copy, so values kept here must tolerate being stale for up to `timeout` seconds or be
+    invalidated through a version stamp in their key.
+
+    When `maxsize` is reached the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize=1024, timeout=60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def get_watermark_key(scope):
+    return f"watermark_{scope}"
+
+
+def get_watermarks(scopes):
+    """
+    Returns the last change time (a unix timestamp) of each scope, in one cache round trip.
+
+    A watermark is a moving "last modified" stamp for a group of data, e.g. "product" or
+    "category", bumped by signals whenever that data changes. Scopes that were never bumped
+    (or were evicted) start at the current time, which errs on the side of a fresh response.
+    """
+    cache = caches[WATERMARK_CACHE_BACKEND]
+    keys = {get_watermark_key(scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+
+    missing = {key: time.time() for key in keys if key not in found}
+    for key, value in missing.items():
+        if not cache.add(key, value, timeout=None):
+            missing[key] = cache.get(key, value)  # Another worker started it first
+
+    found.update(missing)
+    return {scope: found[key] for key, scope in keys.items()}
+
+
+def bump_watermarks(*scopes):
+    """Mark the scopes as changed now, outdating every response built from them."""
+    now = time.time()
+    caches[WATERMARK_CACHE_BACKEND].set_many(
+        {get_watermark_key(scope): now for scope in scopes}, timeout=None
+    )
+
+
+class CacheStats:
+    """
+    Hit/miss/recompute counters of a `StampedeCache`, shared by all workers.
+
+    Each worker counts in memory and adds its counts to the shared cache at most every
+    `flush_interval` seconds, so counting costs no cache round trip on the hot path.
+    """
+    COUNTERS = ('hits', 'misses', 'stale_hits', 'recomputes', 'early_recomputes', 'lock_waits')
+    flush_interval = 10
+    cache_backend = 'generic'
+    names_key = 'cache_stats_names'
+
+    def __init__(self, name):
+        self.name = name
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def get_key(self, counter):
+        return f"cache_stats_{self.name}_{counter}"
+
+    def incr(self, counter):
+        with self._lock:
+            self._pending[counter] += 1
+            flush_due = time.monotonic() - self._last_flush >= self.flush_interval
+        if flush_due:
+            self.flush()
+
+    def flush(self):
+        """Add this worker's pending counts to the shared counters."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+
+        cache = caches[self.cache_backend]
+        names = cache.get(self.names_key, set())
+        if pending and self.name not in names:
+            # Lets any worker report on caches it never used itself
+            cache.set(self.names_key, names | {self.name}, timeout=None)
+
+        for counter, count in pending.items():
+            key = self.get_key(counter)
+            cache.add(key, 0, timeout=None)
+            try:
+                cache.incr(key, count)
+            except ValueError:  # Evicted between add() and incr()
+                cache.add(key, count, timeout=None)
+
+    def snapshot(self):
+        """Current value of every counter, across all workers."""
+        self.flush()
+        values = caches[self.cache_backend].get_many([self.get_key(counter) for counter in self.COUNTERS])
+        return {counter: values.get(self.get_key(counter), 0) for counter in self.COUNTERS}
+
+    @classmethod
+    def get_all(cls):
+        """Counters of every stampede protected cache used by any worker, by name."""
+        for stampede_cache in StampedeCache.registry.values():
+            stampede_cache.stats.flush()
+        names = caches[cls.cache_backend].get(cls.names_key, set()) | set(StampedeCache.registry)
+        return {name: cls(name).snapshot() for name in sorted(names)}
+
+
+class StampedeCache:
+    """
+    Cache front for values that are expensive to compute and read by many workers at once.
+
+    When a hot key expires, only one worker recomputes it (single-flight lock taken with
+    `cache.add`), the others keep serving the previous value for up to `stale_timeout` seconds
+    (stale-while-revalidate), or wait briefly for the new value when there is none. Entries are
+    also recomputed a little before they expire, with a probability growing as the expiry gets
+    closer and as the computation gets slower (probabilistic early expiration, "XFetch"), so
+    most recomputations happen while the value is still fresh.
+
+    Entries are stored as `(value, expires_at, compute_seconds)` tuples: write them through
+    `set()` / `set_many()`, not with the raw cache.
+
+    Usage:
+        exchange_rates = StampedeCache('exchange_rate', timeout=3600)
+        rate = exchange_rates.get_or_set(key, lambda: load_rate(currency))
+    """
+    registry = {}
+
+    def __init__(self, name, timeout, cache_backend='generic', stale_timeout=60, lock_timeout=10, wait_timeout=2, beta=1.0):
+        self.name = name
+        self.timeout = timeout
+        self.cache_backend = cache_backend
+        self.stale_timeout = stale_timeout
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.beta = beta
+        self.stats = CacheStats(name)
+        self.registry[name] = self
+
+    @property
+    def cache(self):
+        return caches[self.cache_backend]
+
+    def make_entry(self, value, timeout=None, compute_seconds=0):
+        timeout = self.timeout if timeout is None else timeout
+        return (value, time.time() + timeout, compute_seconds)
+
+    def get_storage_timeout(self, timeout=None):
+        # Entries outlive their expiry so they can be served stale while being recomputed
+        timeout = self.timeout if timeout is None else timeout
+        return timeout + self.stale_timeout
+
+    def set(self, key, value, timeout=None, compute_seconds=0):
+        self.cache.set(key, self.make_entry(value, timeout, compute_seconds), timeout=self.get_storage_timeout(timeout))
+
+    def set_many(self, data, timeout=None):
+        entries = {key: self.make_entry(value, timeout) for key, value in data.items()}
+        self.cache.set_many(entries, timeout=self.get_storage_timeout(timeout))
+
+    def get(self, key, default=None):
+        """The cached value, fresh or stale, without computing anything."""
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def get_entry(self, key):
+        entry = self.cache.get(key)
+        # Anything else was written by the raw cache API (e.g. before this helper was used), ignore it
+        if isinstance(entry, tuple) and len(entry) == 3:
+            return entry
+        return None
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def expire(self, key):
+        """
+        Mark the entry as expired but keep its value, so the next reader recomputes it while
+        concurrent readers are still served the old value instead of piling up on the source.
+        """
+        entry = self.get_entry(key)
+        if entry is not None:
+            self.cache.set(key, (entry[0], 0, entry[2]), timeout=self.stale_timeout)
+
+    def should_recompute_early(self, expires_at, compute_seconds):
+        # XFetch: now - delta * beta * ln(rand()) >= expiry, with ln(rand()) <= 0
+        return time.time() - compute_seconds * self.beta * math.log(random.random() or 1e-12) >= expires_at
+
+    def get_or_set(self, key, compute, timeout=None):
+        """
+        Return the cached value of `key`, computing it with `compute()` when needed.
+        A `None` result is returned but not cached.
+        """
+        entry = self.get_entry(key)
+        if entry is not None:
+            value, expires_at, compute_seconds = entry
+            expired = time.time() >= expires_at
+            if not expired and not self.should_recompute_early(expires_at, compute_seconds):
+                self.stats.incr('hits')
+                return value
+
+            if self.acquire_lock(key):
+                self.stats.incr('recomputes' if expired else 'early_recomputes')
+                return self.compute_and_set(key, compute, timeout)
+
+            # Someone else is recomputing, serve what we have meanwhile
+            self.stats.incr('hits' if not expired else 'stale_hits')
+            return value
+
+        self.stats.incr('misses')
+        if self.acquire_lock(key):
+            self.stats.incr('recomputes')
+            return self.compute_and_set(key, compute, timeout)
+
+        # Nothing to serve: wait for the worker holding the lock, compute ourselves if it is too slow
+        self.stats.incr('lock_waits')
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.get_entry(key)
+            if entry is not None:
+                return entry[0]
+
+        logger.warning("Gave up waiting for cache key %s to be computed by another worker.", key)
+        return self.compute_and_set(key, compute, timeout, locked=False)
+
+    def compute_and_set(self, key, compute, timeout=None, locked=True):
+        try:
+            started_at = time.perf_counter()
+            value = compute()
+            if value is not None:
+                self.set(key, value, timeout, compute_seconds=time.perf_counter() - started_at)
+            return value
+        finally:
+            if locked:
+                self.cache.delete(self.get_lock_key(key))
+
+    def get_lock_key(self, key):
+        return f"{key}_lock"
+
+    def acquire_lock(self, key):
+        return self.cache.add(self.get_lock_key(key), 1, timeout=self.lock_timeout)
@@ -1,15 +1,30 @@
+import logging
+import time
 from abc import ABC, abstractmethod
 from typing import Dict, List
 from django.conf import settings
 from nxtbn.core.models import CurrencyExchange
 from django.core.cache import caches
-from babel.numbers import format_currency
+from decimal import Decimal
+
+from nxtbn.core.cache import LocalTTLCache, StampedeCache, bump_watermarks
+from nxtbn.core.currency.utils import get_currency_formatter
+
+logger = logging.getLogger(__name__)
 
 
 class CurrencyBackend(ABC):
+    # Per-worker tier in front of the shared cache, shared by every backend instance in the process
+    local_cache = LocalTTLCache(maxsize=512, timeout=300)
+    # How long a worker trusts its copy of the rate version before asking the shared cache again
+    version_check_interval = 30
+    # Shared tier, with single-flight recomputation so an expired hot rate is loaded once
+    exchange_rates = StampedeCache('exchange_rate', timeout=604800)  # Cache for 1 week
+
     def __init__(self):
         self.base_currency = settings.BASE_CURRENCY
         self.cache_key_prefix = f"exchange_rate_{self.base_currency}_to"
+        self.version_key = f"exchange_rate_{self.base_currency}_version"
         self.timeout = 604800 # Cache for 1 week
         self.cache_backend = 'generic'
 
@@ -23,45 +38,94 @@ class CurrencyBackend(ABC):
         """
         pass
 
-    def refresh_rate(self):
-        cache = caches[self.cache_backend]
+    def get_cache_version(self) -> int:
+        """
+        Current version of the cached rates. It is bumped by `refresh_rate()`, and is part of every
+        rate key, so refreshed rates are picked up by all workers within `version_check_interval`.
+        """
+        version = self.local_cache.get(self.version_key)
+        if version is None:
+            version = caches[self.cache_backend].get(self.version_key, 0)
+            self.local_cache.set(self.version_key, version, timeout=self.version_check_interval)
+        return version
+
+    def get_cache_key(self, target_currency: str, version: int) -> str:
+        return f"{self.cache_key_prefix}_{target_currency}_v{version}"
+
+    def refresh_rate(self) -> Dict[str, float]:
+        """
+        Fetch the latest rates and store them with one bulk upsert and one cache write.
 
-        for fetch_data in self.fetch_data():
-            CurrencyExchange.objects.update_or_create(
+        Returns timing metrics for the refresh, which are also logged.
+        """
+        started_at = time.perf_counter()
+        rates = self.fetch_data()
+        fetched_at = time.perf_counter()
+
+        exchanges = [
+            CurrencyExchange(
                 base_currency=self.base_currency,
-                target_currency=fetch_data['target_currency'],
-                defaults={'exchange_rate': fetch_data['exchange_rate']}
+                target_currency=rate['target_currency'],
+                exchange_rate=rate['exchange_rate'],
             )
-            key = f"{self.cache_key_prefix}_{fetch_data['target_currency']}"
-            cache.set(key, fetch_data['exchange_rate'], timeout=self.timeout)
+            for rate in rates
+        ]
+        CurrencyExchange.objects.bulk_create(
+            exchanges,
+            update_conflicts=True,
+            unique_fields=['base_currency', 'target_currency'],
+            update_fields=['exchange_rate', 'last_modified'],
+        )
+        stored_at = time.perf_counter()
 
+        cache = caches[self.cache_backend]
+        version = cache.get(self.version_key, 0) + 1
+        self.exchange_rates.set_many(
+            {self.get_cache_key(rate['target_currency'], version): rate['exchange_rate'] for rate in rates},
+            timeout=self.timeout,
+        )
+        # Publish the new version only once every rate under it is in place
+        cache.set(self.version_key, version, timeout=None)
+        self.local_cache.clear()
+        # Outdates the cached storefront responses with prices converted at the previous rates
+        bump_watermarks('currency')
+        finished_at = time.perf_counter()
+
+        metrics = {
+            'rates': len(exchanges),
+            'fetch_seconds': fetched_at - started_at,
+            'database_seconds': stored_at - fetched_at,
+            'cache_seconds': finished_at - stored_at,
+            'total_seconds': finished_at - started_at,
+        }
+        logger.info(
+            "Refreshed %(rates)d exchange rates in %(total_seconds).3fs "
+            "(fetch %(fetch_seconds).3fs, database %(database_seconds).3fs, cache %(cache_seconds).3fs)",
+            metrics,
+        )
+        return metrics
 
     def get_exchange_rate(self, target_currency: str) -> float:
-        cache = caches[self.cache_backend]
-        key = f"{self.cache_key_prefix}_{target_currency}"
-        rate = cache.get(key)
-        if rate:
+        key = self.get_cache_key(target_currency, self.get_cache_version())
+        rate = self.local_cache.get(key)
+        if rate is not None:
             return rate
-        
-        # Fallback to database if not found in cache
-        exchange_rate = CurrencyExchange.objects.filter(
-            base_currency=self.base_currency,
-            target_currency=target_currency
-        ).values_list('exchange_rate', flat=True).first()
-
-        try:
-            exchange_rate = CurrencyExchange.objects.get(
-                base_currency=settings.BASE_CURRENCY,
+
+        def load_rate():
+            # Fallback to database if not found in cache
+            return CurrencyExchange.objects.filter(
+                base_currency=self.base_currency,
                 target_currency=target_currency
-            ).exchange_rate
-            key = f"{self.cache_key_prefix}_{target_currency}"
-            cache.set(key, exchange_rate, timeout=self.timeout)
-            return exchange_rate
-        except CurrencyExchange.DoesNotExist:
+            ).values_list('exchange_rate', flat=True).first()
+
+        rate = self.exchange_rates.get_or_set(key, load_rate, timeout=self.timeout)
+        if rate is None:
             raise ValueError(f"Exchange rate for {target_currency} not found.")
 
+        self.local_cache.set(key, rate)
+        return rate
 
-    def to_target_currency(self, target_currency: str, amount: float) -> float:
+    def to_target_currency(self, target_currency: str, amount: float) -> str:
         """
         Convert the given amount from the base currency to the target currency,
         considering the currency precision.
@@ -71,10 +135,8 @@ class CurrencyBackend(ABC):
         - amount: float
         
         Returns:
-        - float: Amount in the target currency, formatted to the correct precision.
+        - str: Amount in the target currency, formatted to the correct precision.
         """
-        exchange_rate = self.get_exchange_rate(target_currency)
-        converted_amount = amount * exchange_rate
-        formatted_amount = format_currency(converted_amount, target_currency, locale='en_US', format_type='standard')
-        return formatted_amount
-       
\ No newline at end of file
+        exchange_rate = Decimal(str(self.get_exchange_rate(target_currency)))
+        converted_amount = Decimal(str(amount)) * exchange_rate
+        return get_currency_formatter(target_currency)(converted_amount)
@@ -1,5 +1,9 @@
+from functools import lru_cache
+
+from babel import Locale
 from babel.numbers import get_currency_precision
 from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
 
 def normalize_amount_currencywise(amount: float, currency_code: str) -> Decimal:
     """    
@@ -24,3 +28,65 @@ def normalize_amount_currencywise(amount: float, currency_code: str) -> Decimal:
     formatted_amount = amount_decimal.quantize(Decimal(quantize_format), rounding=ROUND_HALF_UP)
     
     return formatted_amount
+
+
+@lru_cache(maxsize=None)
+def get_currency_formatter(currency_code: str, locale: str = 'en_US'):
+    """
+    Returns a memoized callable that formats an amount for the given currency,
+    equivalent to `babel.numbers.format_currency(amount, currency_code, locale=locale)`.
+
+    Parsing the locale and its currency pattern is the expensive part of `format_currency`,
+    so it is done once per currency/locale pair instead of once per amount.
+    """
+    parsed_locale = Locale.parse(locale)
+    pattern = parsed_locale.currency_formats['standard']
+
+    def formatter(amount) -> str:
+        return pattern.apply(amount, parsed_locale, currency=currency_code)
+
+    return formatter
+
+
+@lru_cache(maxsize=None)
+def get_currency_quantizer(currency_code: str) -> Decimal:
+    """Returns the `Decimal` exponent matching the precision of the given currency, e.g. `Decimal('0.01')`."""
+    return Decimal(1).scaleb(-get_currency_precision(currency_code))
+
+
+class ExchangeRateSnapshot:
+    """
+    The exchange rate from the base currency to a single target currency, resolved at most once.
+
+    `CurrencyMiddleware` attaches one to every request as `request.exchange_rate`, so serializers
+    rendering a page of prices share one rate lookup and only do `Decimal` arithmetic per price.
+    """
+
+    def __init__(self, target_currency: str):
+        self.base_currency = settings.BASE_CURRENCY
+        self.target_currency = target_currency
+        self._rate = None
+
+    @property
+    def rate(self) -> Decimal:
+        if self._rate is None:
+            if not settings.IS_MULTI_CURRENCY or self.target_currency == self.base_currency:
+                self._rate = Decimal(1)
+            else:
+                from nxtbn.core.currency.backend import currency_Backend
+                exchange_rate = currency_Backend().get_exchange_rate(self.target_currency)
+                self._rate = Decimal(str(exchange_rate))
+        return self._rate
+
+    def convert(self, amount) -> Decimal:
+        """Convert an amount in base currency to the target currency, rounded to its precision."""
+        converted_amount = Decimal(amount) * self.rate
+        return converted_amount.quantize(get_currency_quantizer(self.target_currency), rounding=ROUND_HALF_UP)
+
+    def convert_many(self, amounts) -> 'list[Decimal]':
+        """Convert a list of base currency amounts with the same rate."""
+        return [self.convert(amount) for amount in amounts]
+
+    def format(self, amount) -> str:
+        """Format an amount already in the target currency, e.g. `€12.50`."""
+        return get_currency_formatter(self.target_currency)(amount)
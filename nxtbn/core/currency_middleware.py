@@ -1,6 +1,8 @@
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
 
+from nxtbn.core.currency.utils import ExchangeRateSnapshot
+
 class CurrencyMiddleware(MiddlewareMixin):
     def process_request(self, request):
         # Get the currency from the X-Currency header
@@ -10,3 +12,6 @@ class CurrencyMiddleware(MiddlewareMixin):
             currency = settings.BASE_CURRENCY # Fallback to base currency if not allowed
         # Store the currency in the request object
         request.currency = currency
+
+        # Resolved lazily, at most once per request, by whatever needs to convert prices
+        request.exchange_rate = ExchangeRateSnapshot(currency)
@@ -0,0 +1,146 @@
+import csv
+import gzip
+import json
+import tempfile
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+
+class Echo:
+    """File-like object handing back what `csv.writer` writes, so rows can be streamed one by one."""
+    def write(self, value):
+        return value
+
+
+class BaseExporter:
+    """
+    Streams records of a model, each with its child rows (e.g. orders with their line items), as CSV or JSONL.
+
+    Parent rows are read with `values()` through `QuerySet.iterator(chunk_size)`, and the children of each
+    chunk with one extra query, so memory stays flat whatever the number of records.
+
+    Subclasses set:
+        fields: `values()` fields of the parent rows, lookups through foreign keys allowed.
+        child_name: key of the children in JSONL records.
+        child_column_prefix: prefix of the children's CSV columns.
+        child_fields: `values()` fields of the child rows.
+        child_parent_field: field of the child rows pointing at their parent.
+    and implement `get_queryset()` / `get_child_queryset()`.
+
+    In CSV, there is one line per child row, repeating the parent columns (parents without children get
+    one line with empty child columns). In JSONL, there is one line per parent, with its children nested.
+    """
+    name = None
+    fields = ()
+    child_name = None
+    child_column_prefix = None
+    child_fields = ()
+    child_parent_field = None
+    chunk_size = 2000
+
+    formats = {
+        'csv': 'text/csv',
+        'jsonl': 'application/x-ndjson',
+    }
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_child_queryset(self):
+        raise NotImplementedError
+
+    def iter_records(self):
+        """Yields (parent row, child rows) pairs."""
+        rows = self.get_queryset().order_by('pk').values('pk', *self.fields).iterator(chunk_size=self.chunk_size)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+
+            children = {row['pk']: [] for row in chunk}
+            child_rows = self.get_child_queryset().filter(
+                **{f'{self.child_parent_field}__in': list(children)}
+            ).order_by('pk').values(self.child_parent_field, *self.child_fields)
+            for child in child_rows:
+                children[child.pop(self.child_parent_field)].append(child)
+
+            for row in chunk:
+                yield row, children[row['pk']]
+
+    def iter_csv(self):
+        writer = csv.writer(Echo())
+        child_columns = [f'{self.child_column_prefix}_{field}' for field in self.child_fields]
+        yield writer.writerow(['id', *self.fields, *child_columns])
+
+        empty_child = [''] * len(self.child_fields)
+        for row, children in self.iter_records():
+            values = [self.format_csv_value(value) for value in row.values()]
+            if not children:
+                yield writer.writerow(values + empty_child)
+            for child in children:
+                yield writer.writerow(values + [self.format_csv_value(value) for value in child.values()])
+
+    def iter_jsonl(self):
+        for row, children in self.iter_records():
+            record = {'id': row.pop('pk'), **row, self.child_name: children}
+            yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+    def iter_lines(self, file_format):
+        if file_format == 'csv':
+            return self.iter_csv()
+        return self.iter_jsonl()
+
+    @staticmethod
+    def format_csv_value(value):
+        if value is None:
+            return ''
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    def get_filename(self, file_format):
+        return f"{self.name}-{timezone.now():%Y%m%d-%H%M%S}.{file_format}"
+
+    def write_to_storage(self, file_format, path=None, storage=None):
+        """
+        Writes a gzipped export to the storage (the default storage unless given) and returns its saved path.
+
+        The export is compressed into a temporary file spilling to disk, then handed to the storage which
+        reads it back in chunks, so memory stays flat here too.
+        """
+        storage = storage or default_storage
+        path = path or f"exports/{self.get_filename(file_format)}.gz"
+        with tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024) as buffer:
+            with gzip.GzipFile(fileobj=buffer, mode='wb') as compressed:
+                for line in self.iter_lines(file_format):
+                    compressed.write(line.encode())
+            buffer.seek(0)
+            return storage.save(path, File(buffer))
+
+
+class StreamingExportMixin:
+    """
+    Streams the records of `exporter_class` as a CSV (default) or JSONL download, see `BaseExporter`.
+    The format is picked with the `file_format` query param.
+    """
+    exporter_class = None
+
+    def get_exporter(self):
+        return self.exporter_class()
+
+    def get(self, request, *args, **kwargs):
+        exporter = self.get_exporter()
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in exporter.formats:
+            raise ValidationError({'file_format': _("Choose one of %(formats)s.") % {'formats': ', '.join(exporter.formats)}})
+
+        response = StreamingHttpResponse(exporter.iter_lines(file_format), content_type=exporter.formats[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{exporter.get_filename(file_format)}"'
+        return response
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from nxtbn.order.export import OrderExporter
+from nxtbn.product.export import ProductExporter
+
+
+EXPORTERS = {
+    'orders': OrderExporter,
+    'products': ProductExporter,
+}
+
+
+class Command(BaseCommand):
+    help = 'Exports orders (with payments and line items) or products (with variants) as a gzipped file in the default storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('data', choices=list(EXPORTERS), help='What to export')
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'jsonl'], default='csv', help='File format')
+        parser.add_argument('--path', help='Path in the storage, exports/<data>-<timestamp>.<format>.gz by default')
+
+    def handle(self, *args, **options):
+        exporter = EXPORTERS[options['data']]()
+        path = exporter.write_to_storage(options['file_format'], path=options['path'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully exported {options["data"]} to {path}.'))
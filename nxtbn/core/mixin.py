@@ -1,11 +1,18 @@
+import hashlib
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
 from money.money import Currency, Money
 from decimal import InvalidOperation
 from money.exceptions import InvalidAmountError, CurrencyMismatchError
 from typing import TypedDict
 
 from nxtbn.core import MoneyFieldTypes
+from nxtbn.core.cache import StampedeCache, get_watermarks
 
 
 
@@ -51,4 +58,113 @@ class MonetaryMixin:
             
             if config.get("require_base_currency", False):
                 if currency_str != settings.BASE_CURRENCY:
-                    raise ValidationError({field_name: f"Currency field '{field_name}' expects value same as base currency '{settings.BASE_CURRENCY}', other currency values can't be added"})
\ No newline at end of file
+                    raise ValidationError({field_name: f"Currency field '{field_name}' expects value same as base currency '{settings.BASE_CURRENCY}', other currency values can't be added"})
+
+class EagerLoadingMixin:
+    """
+    Mixin for serializers to declare the query plan needed to render them.
+
+    Serializers list the relations they walk so views can load everything up front
+    instead of issuing one query per row and per relation.
+
+    Attributes:
+        select_related_fields (tuple): Forward relations joined into the main query.
+        prefetch_related_fields (tuple): Reverse/many-to-many relations, as lookups or `Prefetch` objects.
+        only_fields (tuple): Columns to load on the main model; every other column is deferred.
+    """
+    select_related_fields: 'tuple' = ()
+    prefetch_related_fields: 'tuple' = ()
+    only_fields: 'tuple' = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """
+        Applies the declared query plan to the given queryset and returns it.
+        """
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        if cls.only_fields:
+            queryset = queryset.only(*cls.only_fields)
+        return queryset
+
+
+class ResponseCacheMixin:
+    """
+    Mixin for read-only API views whose anonymous responses are the same for every visitor in a currency.
+
+    Anonymous GET responses are cached by path, query string, currency, exchange rate and the watermarks
+    of the scopes the view reads (see `nxtbn.core.cache.get_watermarks`), so bumping a scope outdates every
+    cached response built from it. The "currency" scope, bumped when the exchange rates are refreshed, is
+    read by every view. Responses carry an ETag and a Last-Modified header derived from
+    the same watermarks, conditional requests are answered with a 304 without touching the database.
+
+    Attributes:
+        response_cache_scopes (tuple): Watermark scopes the response is built from.
+        response_cache_timeout (int): Lifetime of a cached response, in seconds.
+    """
+    response_cache_scopes: 'tuple' = ()
+    response_cache_timeout: 'int' = 5 * 60
+    response_cache = StampedeCache('response', timeout=5 * 60)
+
+    def get_response_cache_scopes(self):
+        return self.response_cache_scopes
+
+    def get_exchange_rate_fingerprint(self, request):
+        exchange_rate = getattr(request, 'exchange_rate', None)
+        if exchange_rate is None:
+            return ''
+        try:
+            return str(exchange_rate.rate)
+        except ValueError:
+            return ''  # No rate for the currency, only a view converting prices fails on that
+
+    def is_response_cacheable(self, request):
+        return request.method == 'GET' and not request.user.is_authenticated
+
+    def get(self, request, *args, **kwargs):
+        if not self.is_response_cacheable(request):
+            return super().get(request, *args, **kwargs)
+
+        watermarks = get_watermarks((*self.get_response_cache_scopes(), 'currency'))
+        last_modified = int(max(watermarks.values(), default=0))
+        fingerprint = "|".join([
+            request.path,
+            urlencode(sorted(request.query_params.lists()), doseq=True),
+            getattr(request, 'currency', settings.BASE_CURRENCY),
+            # The rate this worker converts with, which may lag the "currency" watermark by a few seconds
+            self.get_exchange_rate_fingerprint(request),
+            request.accepted_renderer.format,
+            repr(sorted(watermarks.items())),
+        ])
+        digest = hashlib.md5(fingerprint.encode()).hexdigest()
+        etag = f'"{digest}"'
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self.add_response_cache_headers(not_modified, etag, last_modified)
+
+        rendered = {}
+
+        def render():
+            rendered['response'] = response = super(ResponseCacheMixin, self).get(request, *args, **kwargs)
+            return response.data if response.status_code == 200 else None  # Errors are not cached
+
+        cache_key = f"response_cache_{digest}"
+        data = self.response_cache.get_or_set(cache_key, render, timeout=self.response_cache_timeout)
+        response = rendered.get('response')
+        if response is None:
+            response = Response(data)
+        elif response.status_code != 200:
+            return response
+
+        return self.add_response_cache_headers(response, etag, last_modified)
+
+    def add_response_cache_headers(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Clients and shared caches may keep the response, but must revalidate it with the ETag
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        patch_vary_headers(response, ['Accept-Currency'])
+        return response
@@ -1,8 +1,13 @@
+import hashlib
+
 from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
 from django.db.models.aggregates import Count
 from django.db.models import Q
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from collections import OrderedDict
 
@@ -65,3 +70,93 @@ class NxtbnPagination(PageNumberPagination):
             return None
         next_number = self.page.next_page_number()
         return next_number if next_number >= 1 else None
+
+
+def get_estimated_count(queryset, cache_timeout=60):
+    """
+    Returns an approximate row count for the queryset without counting on every request.
+
+    For an unfiltered queryset on PostgreSQL, the planner statistics (`pg_class.reltuples`) are used.
+    Otherwise the exact count is computed once and cached for `cache_timeout` seconds.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:  # -1 until the table has been analyzed
+            return row[0]
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    cache = caches['generic']
+    cache_key = "pagination_count_" + hashlib.md5(f"{sql}{params}".encode()).hexdigest()
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout=cache_timeout)
+    return count
+
+
+class NxtbnCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for large tables, keeping the `NxtbnPagination` response envelope.
+
+    Pages are fetched with a `WHERE <ordering column> < <cursor>` on an indexed column instead
+    of an OFFSET scan, and no `COUNT(*)` is run: `count` holds an estimate from
+    `get_estimated_count`, or is `None` when `include_count` is disabled. Page numbers don't
+    exist in this mode, so the number related keys are always `None`.
+    """
+    default_page_size = 20
+    ordering = '-id'
+    include_count = True
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size or self.default_page_size
+        super().__init__()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = get_estimated_count(queryset) if self.include_count else None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        total_pages = None
+        if self.count is not None:
+            total_pages = -(-self.count // self.page_size)
+
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('current_pagination_step', self.get_html_context()),
+            ('current_page', None),
+            ('next_page_url', self.get_next_link()),
+            ('next_page_number', None),
+            ('previous_page_url', self.get_previous_link()),
+            ('previous_page_number', None),
+            ('total_pages', total_pages),
+            ('results', data),
+        ]))
+
+
+class CursorPaginationMixin:
+    """
+    Mixin for list views that lets clients opt in to `NxtbnCursorPagination`
+    by sending `?pagination=cursor`; follow-up page links carry the `cursor` parameter.
+    Without it the view keeps its regular `pagination_class`.
+    """
+    cursor_pagination_class = NxtbnCursorPagination
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.use_cursor_pagination():
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
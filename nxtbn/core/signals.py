@@ -1,8 +1,36 @@
-from django.db.models.signals import post_migrate
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import post_migrate, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
+from nxtbn.core.admin_permissions import invalidate_permission_cache
 from nxtbn.core.models import SiteSettings
 
+User = get_user_model()
+
 @receiver(post_migrate)
 def create_default_site_settings(sender, **kwargs):
     if SiteSettings.objects.count() == 0:
         SiteSettings.objects.create(site_name="nxtbn commerce")
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_permissions_on_assignment_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_permission_cache()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions_on_change(sender, **kwargs):
+    invalidate_permission_cache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_permissions(sender, instance, **kwargs):
+    # An inactive user has no permissions, so (de)activation must be reflected too
+    invalidate_permission_cache(instance.pk)
@@ -0,0 +1,25 @@
+import inspect
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from nxtbn.core.currency.backend import currency_Backend
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_currency_exchange_rates():
+    """
+    Periodic task (see `CELERY_BEAT_SCHEDULE`) pulling fresh exchange rates through the
+    configured currency backend. Returns the refresh timing metrics.
+    """
+    if not settings.IS_MULTI_CURRENCY:
+        return None
+
+    if inspect.isabstract(currency_Backend):
+        logger.warning("No currency backend plugin is installed, exchange rates were not refreshed.")
+        return None
+
+    return currency_Backend().refresh_rate()
@@ -1,3 +1,181 @@
-from django.test import TestCase
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from nxtbn.core.admin_permissions import NxtbnAdminPermission
+from nxtbn.core.cache import CacheStats, LocalTTLCache, StampedeCache
+from nxtbn.core.currency.abstract_base_currency import CurrencyBackend
+from nxtbn.core.currency.utils import ExchangeRateSnapshot
+from nxtbn.core.models import CurrencyExchange
+from nxtbn.users.tests import UserFactory
+
+
+class ExchangeRateSnapshotTest(TestCase):
+    @override_settings(IS_MULTI_CURRENCY=True, BASE_CURRENCY='USD')
+    def test_rate_is_resolved_once(self):
+        with mock.patch('nxtbn.core.currency.backend.currency_Backend') as backend:
+            backend.return_value.get_exchange_rate.return_value = 0.9
+            snapshot = ExchangeRateSnapshot('EUR')
+
+            converted = snapshot.convert_many([Decimal('10.00'), Decimal('19.999'), Decimal('1')])
+
+        self.assertEqual(converted, [Decimal('9.00'), Decimal('18.00'), Decimal('0.90')])
+        self.assertEqual(snapshot.format(converted[0]), '€9.00')
+        backend.return_value.get_exchange_rate.assert_called_once_with('EUR')
+
+    @override_settings(IS_MULTI_CURRENCY=True, BASE_CURRENCY='USD')
+    def test_base_currency_needs_no_lookup(self):
+        with mock.patch('nxtbn.core.currency.backend.currency_Backend') as backend:
+            snapshot = ExchangeRateSnapshot('USD')
+            self.assertEqual(snapshot.convert(Decimal('10.005')), Decimal('10.01'))
+            self.assertEqual(snapshot.format(Decimal('10.01')), '$10.01')
+        backend.assert_not_called()
+
+
+class StaticCurrencyBackend(CurrencyBackend):
+    rates = []
+
+    def fetch_data(self):
+        return self.rates
+
+
+@override_settings(BASE_CURRENCY='USD', ALLOWED_CURRENCIES=['EUR', 'GBP'])
+class CurrencyBackendCacheTest(TestCase):
+    def setUp(self):
+        caches['generic'].clear()
+        CurrencyBackend.local_cache.clear()
+        CurrencyExchange.objects.create(base_currency='USD', target_currency='EUR', exchange_rate=Decimal('0.9000'))
+
+    def test_rate_is_served_from_local_tier(self):
+        backend = StaticCurrencyBackend()
+        with self.assertNumQueries(1):
+            self.assertEqual(backend.get_exchange_rate('EUR'), Decimal('0.9000'))
+            self.assertEqual(backend.get_exchange_rate('EUR'), Decimal('0.9000'))
+
+        # Another worker (empty local tier) is served by the shared cache
+        CurrencyBackend.local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_exchange_rate('EUR'), Decimal('0.9000'))
+
+        with self.assertRaises(ValueError):
+            backend.get_exchange_rate('GBP')
+
+    def test_refresh_publishes_new_version(self):
+        backend = StaticCurrencyBackend()
+        backend.get_exchange_rate('EUR')
+
+        backend.rates = [
+            {'target_currency': 'EUR', 'exchange_rate': Decimal('0.8000')},
+            {'target_currency': 'GBP', 'exchange_rate': Decimal('0.7000')},
+        ]
+        with self.assertNumQueries(1):
+            metrics = backend.refresh_rate()
+        self.assertEqual(metrics['rates'], 2)
+        self.assertEqual(CurrencyExchange.objects.get(target_currency='EUR').exchange_rate, Decimal('0.8000'))
+        self.assertEqual(CurrencyExchange.objects.count(), 2)
+
+        self.assertEqual(backend.get_cache_version(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_exchange_rate('EUR'), Decimal('0.8000'))
+
+
+class StampedeCacheTest(TestCase):
+    def setUp(self):
+        caches['generic'].clear()
+        self.cache = StampedeCache('test', timeout=60, wait_timeout=0.1)
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_single_flight_and_stale_while_revalidate(self):
+        self.assertEqual(self.cache.get_or_set('key', self.compute), 1)
+        self.assertEqual(self.cache.get_or_set('key', self.compute), 1)
+
+        # While another worker holds the lock, the expired value keeps being served
+        self.cache.expire('key')
+        self.assertTrue(self.cache.acquire_lock('key'))
+        self.assertEqual(self.cache.get_or_set('key', self.compute), 1)
+        self.assertEqual(self.calls, 1)
+
+        caches['generic'].delete(self.cache.get_lock_key('key'))
+        self.assertEqual(self.cache.get_or_set('key', self.compute), 2)
+        self.assertEqual(self.cache.get_or_set('key', self.compute), 2)
+
+    def test_early_expiration(self):
+        # A slow computation close to its expiry is recomputed before it expires
+        caches['generic'].set('key', ('old', time.time() + 1, 60))
+        with mock.patch('nxtbn.core.cache.random.random', return_value=0.5):
+            self.assertEqual(self.cache.get_or_set('key', self.compute), 1)
+
+        caches['generic'].set('key', ('old', time.time() + 1000, 0.001))
+        with mock.patch('nxtbn.core.cache.random.random', return_value=0.5):
+            self.assertEqual(self.cache.get_or_set('key', self.compute), 'old')
+
+    def test_counters(self):
+        self.cache.get_or_set('key', self.compute)
+        self.cache.get_or_set('key', self.compute)
+        self.cache.delete('key')
+        self.cache.acquire_lock('key')
+        self.cache.get_or_set('key', self.compute)  # Gives up waiting and computes
+
+        stats = CacheStats.get_all()['test']
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['recomputes'], 1)
+        self.assertEqual(stats['lock_waits'], 1)
+
+
+class LocalTTLCacheTest(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LocalTTLCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_expired_entries_are_dropped(self):
+        cache = LocalTTLCache()
+        cache.set('a', 1, timeout=-1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class NxtbnAdminPermissionCacheTest(TestCase):
+    def setUp(self):
+        caches['generic'].clear()
+        self.user = UserFactory(email="staff@example.com", is_superuser=False)
+        self.group = Group.objects.create(name="Catalog")
+        self.user.groups.add(self.group)
+        self.view = mock.Mock(queryset=CurrencyExchange.objects.all())
+
+    def has_permission(self, method):
+        # A fresh user object per request, like JWT authentication provides
+        user = type(self.user).objects.get(pk=self.user.pk)
+        request = mock.Mock(user=user, method=method)
+        return NxtbnAdminPermission().has_permission(request, self.view)
+
+    def test_permissions_are_cached_and_invalidated(self):
+        self.assertFalse(self.has_permission('GET'))
+
+        view_permission = Permission.objects.get(codename='view_currencyexchange')
+        self.group.permissions.add(view_permission)
+
+        self.assertTrue(self.has_permission('GET'))
+        self.assertFalse(self.has_permission('POST'))
+
+        user = type(self.user).objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            NxtbnAdminPermission().has_permission(mock.Mock(user=user, method='GET'), self.view)
+
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.has_permission('GET'))
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class UploadKind(models.TextChoices):
+    """Defines what a chunked upload creates once completed.
+
+    - 'IMAGE': A filemanager Image.
+    - 'DOCUMENT': A filemanager Document.
+    """
+
+    IMAGE = 'IMAGE', 'Image'
+    DOCUMENT = 'DOCUMENT', 'Document'
+
+
+class UploadStatus(models.TextChoices):
+    """Defines the lifecycle of a chunked upload session.
+
+    - 'OPEN': Chunks are being uploaded, in any order and as many times as needed.
+    - 'PROCESSING': Every chunk was received, they are being assembled into the final file.
+    - 'COMPLETED': The final file was assembled and its Image or Document created.
+    - 'ABORTED': The upload was cancelled, expired or rejected, its chunks are deleted.
+    """
+
+    OPEN = 'OPEN', 'Open'
+    PROCESSING = 'PROCESSING', 'Processing'
+    COMPLETED = 'COMPLETED', 'Completed'
+    ABORTED = 'ABORTED', 'Aborted'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from nxtbn.filemanager.models import Image,Document
+from nxtbn.filemanager.models import Image, Document, UploadSession
 
 # Register your models here.
 
@@ -8,7 +8,7 @@ class ImageAdmin(admin.ModelAdmin):
     list_display = ('id','name', 'created_by', 'last_modified_by')
     list_filter = ('created_by', 'last_modified_by')
     search_fields = ('name', 'image_alt_text')
-    readonly_fields = ('last_modified_by',) 
+    readonly_fields = ('last_modified_by', 'renditions', 'renditions_source')
 
 admin.site.register(Image,ImageAdmin)
 
@@ -20,3 +20,12 @@ class DocumentAdmin(admin.ModelAdmin):
     readonly_fields = ('last_modified_by',) 
 
 admin.site.register(Document, DocumentAdmin)
+
+
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'file_name', 'kind', 'status', 'total_size', 'created_by', 'created_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('file_name', 'name')
+    readonly_fields = ('storage_name', 'multipart_upload_id', 'image', 'document')
+
+admin.site.register(UploadSession, UploadSessionAdmin)
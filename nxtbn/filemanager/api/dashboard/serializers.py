@@ -1,12 +1,21 @@
+import os
+
+from django.conf import settings
+from django.utils.text import get_valid_filename
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from nxtbn.filemanager.models import Image, Document
+from nxtbn.filemanager.dedup import hash_file, save_deduplicated_image
+from nxtbn.filemanager.models import Image, Document, UploadSession
+from nxtbn.filemanager.renditions import get_srcset
+from nxtbn.filemanager.uploads import start_upload
 
 
 class ImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Image
-        fields = "__all__"
+        exclude = ("renditions", "renditions_source", "content_hash")
         read_only_fields = (
             "id",
             "created_by",
@@ -14,9 +23,31 @@ class ImageSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
+        """An image identical to an existing one isn't stored again, the existing image is returned instead."""
         validated_data["created_by"] = self.context["request"].user
         validated_data["last_modified_by"] = self.context["request"].user
-        return super().create(validated_data)
+        image, self.created = save_deduplicated_image(Image(**validated_data), hash_file(validated_data["image"]))
+        return image
+
+    def update(self, instance, validated_data):
+        if "image" in validated_data:
+            content_hash = hash_file(validated_data["image"])
+            duplicate = Image.objects.filter(content_hash=content_hash).exclude(pk=instance.pk).first()
+            if duplicate is not None:
+                raise serializers.ValidationError({"image": _("This image is already uploaded as image %(id)s.") % {"id": duplicate.pk}})
+            instance.content_hash = content_hash
+        return super().update(instance, validated_data)
+
+    def get_srcset(self, obj):
+        """Resized renditions per format, empty until they are made (the `image` original is the fallback)."""
+        storage = obj.image.storage
+        request = self.context.get("request")
+
+        def build_url(name):
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return get_srcset(obj, build_url)
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -34,3 +65,56 @@ class DocumentSerializer(serializers.ModelSerializer):
         validated_data["created_by"] = self.context["request"].user
         validated_data["last_modified_by"] = self.context["request"].user
         return super().create(validated_data)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(min_value=1, required=False)
+    chunk_count = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+    image = ImageSerializer(read_only=True)
+    document = DocumentSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            "id",
+            "kind",
+            "file_name",
+            "name",
+            "image_alt_text",
+            "total_size",
+            "chunk_size",
+            "chunk_count",
+            "received_chunks",
+            "status",
+            "error",
+            "image",
+            "document",
+            "created_at",
+        )
+        read_only_fields = (
+            "id",
+            "status",
+            "error",
+            "created_at",
+        )
+
+    def get_received_chunks(self, obj):
+        return [chunk.index for chunk in obj.chunks.all()]
+
+    def validate_file_name(self, value):
+        value = get_valid_filename(os.path.basename(value))
+        if not value:
+            raise serializers.ValidationError(_("Invalid file name."))
+        return value
+
+    def validate_total_size(self, value):
+        if not 0 < value <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                _("The file must be between 1 and %(max_size)s bytes.") % {"max_size": settings.UPLOAD_MAX_SIZE}
+            )
+        return value
+
+    def create(self, validated_data):
+        session = UploadSession(**validated_data, created_by=self.context["request"].user)
+        return start_upload(session)
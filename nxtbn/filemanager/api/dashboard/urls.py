@@ -1,9 +1,22 @@
 from django.urls import path
-from nxtbn.filemanager.api.dashboard.views import ImageListView, ImageDetailView, DocumentListView, DocumentDetailView
+from nxtbn.filemanager.api.dashboard.views import (
+    ImageListView,
+    ImageDetailView,
+    DocumentListView,
+    DocumentDetailView,
+    UploadSessionListView,
+    UploadSessionDetailView,
+    UploadChunkView,
+    UploadSessionCompleteView,
+)
 
 urlpatterns = [
     path("images/", ImageListView.as_view(), name="image_list"),
     path("image/<int:id>/", ImageDetailView.as_view(), name="image_detail"),
     path("documents/", DocumentListView.as_view(), name="document_list"),
     path("document/<int:id>/", DocumentDetailView.as_view(), name="document_detail"),
+    path("uploads/", UploadSessionListView.as_view(), name="upload_session_list"),
+    path("uploads/<int:pk>/", UploadSessionDetailView.as_view(), name="upload_session_detail"),
+    path("uploads/<int:pk>/chunks/<int:index>/", UploadChunkView.as_view(), name="upload_chunk"),
+    path("uploads/<int:pk>/complete/", UploadSessionCompleteView.as_view(), name="upload_session_complete"),
 ]
@@ -1,22 +1,37 @@
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import BaseParser
+from rest_framework.response import Response
 from django.utils.translation import gettext_lazy as _
 
 
-from nxtbn.filemanager.models import Document, Image
+from nxtbn.filemanager import UploadStatus
+from nxtbn.filemanager.models import Document, Image, UploadSession
 from nxtbn.filemanager.api.dashboard.serializers import (
     DocumentSerializer,
     ImageSerializer,
+    UploadSessionSerializer,
 )
+from nxtbn.filemanager.uploads import UploadError, abort_upload, complete_upload, receive_chunk
 from nxtbn.core.admin_permissions import NxtbnAdminPermission
-from nxtbn.core.paginator import NxtbnPagination
+from nxtbn.core.paginator import CursorPaginationMixin, NxtbnPagination
 
 
-class ImageListView(generics.ListCreateAPIView):
+class ImageListView(CursorPaginationMixin, generics.ListCreateAPIView):
     serializer_class = ImageSerializer
     queryset = Image.objects.all()
     pagination_class = NxtbnPagination
     permission_classes = (NxtbnAdminPermission,)
 
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        # 200 with the existing image when the same file was uploaded before. That image keeps its own name,
+        # alt text and creator, `metadata_applied` tells the client the ones sent were not saved
+        data = {**serializer.data, 'metadata_applied': serializer.created}
+        return Response(data, status=status.HTTP_201_CREATED if serializer.created else status.HTTP_200_OK)
+
 
 class ImageDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Image.objects.all()
@@ -39,3 +54,72 @@ class DocumentDetailView(generics.RetrieveUpdateDestroyAPIView):
     pagination_class = NxtbnPagination
     permission_classes = (NxtbnAdminPermission,)
     lookup_field = "id"
+
+
+class UploadSessionMixin:
+    permission_classes = (NxtbnAdminPermission,)
+    serializer_class = UploadSessionSerializer
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(created_by=self.request.user).select_related(
+            'image', 'document'
+        ).prefetch_related('chunks')
+
+
+class UploadSessionListView(UploadSessionMixin, generics.ListCreateAPIView):
+    """
+    Starts a chunked upload of an Image or Document, for files too large for a single request, see
+    `nxtbn.filemanager.uploads`. The response gives the `chunk_size` to use: send each chunk to
+    `uploads/<id>/chunks/<index>/`, then complete the upload with `uploads/<id>/complete/`.
+    """
+    pagination_class = NxtbnPagination
+
+
+class UploadSessionDetailView(UploadSessionMixin, generics.RetrieveDestroyAPIView):
+    """Lists the chunks received so far, to resume an interrupted upload. DELETE aborts the upload."""
+
+    def perform_destroy(self, instance):
+        if instance.status == UploadStatus.OPEN:
+            abort_upload(instance)
+
+
+class RawChunkParser(BaseParser):
+    """Leaves the chunk in the request body, read in pieces by `receive_chunk`."""
+    media_type = '*/*'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {}
+
+
+class UploadChunkView(UploadSessionMixin, generics.GenericAPIView):
+    """
+    Receives one chunk as the raw request body, with its hex SHA-256 in the `X-Chunk-SHA256` header.
+    A chunk sent again replaces the previous one.
+    """
+    parser_classes = (RawChunkParser,)
+
+    def put(self, request, *args, **kwargs):
+        session = self.get_object()
+        checksum = request.headers.get('X-Chunk-SHA256')
+        if not checksum:
+            raise ValidationError({'detail': _("The X-Chunk-SHA256 header is required.")})
+
+        try:
+            # Read from the underlying request, request.body would load the whole chunk in memory
+            receive_chunk(session, kwargs['index'], request._request, checksum)
+        except UploadError as error:
+            raise ValidationError({'detail': str(error)})
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionCompleteView(UploadSessionMixin, generics.GenericAPIView):
+    """
+    Accepts an upload with all its chunks (202), assembled in the background: poll `uploads/<id>/`
+    until it is COMPLETED, with its image or document, or ABORTED, with the `error`.
+    """
+    def post(self, request, *args, **kwargs):
+        try:
+            session = complete_upload(self.get_object())
+        except UploadError as error:
+            raise ValidationError({'detail': str(error)})
+        return Response(self.get_serializer(self.get_queryset().get(pk=session.pk)).data, status=status.HTTP_202_ACCEPTED)
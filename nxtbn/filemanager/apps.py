@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FilemanagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'nxtbn.filemanager'
+
+    def ready(self):
+        import nxtbn.filemanager.signals  # noqa
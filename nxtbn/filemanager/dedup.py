@@ -0,0 +1,89 @@
+import hashlib
+
+from django.db import IntegrityError, transaction
+
+from nxtbn.filemanager.models import Image
+
+
+READ_SIZE = 64 * 1024
+
+
+def hash_file(file):
+    """SHA-256 of a file, read in chunks. Uploads hashed while received (see `uploadhandlers`) aren't read again."""
+    content_hash = getattr(file, 'content_hash', None)
+    if content_hash:
+        return content_hash
+
+    digest = hashlib.sha256()
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    for chunk in iter(lambda: file.read(READ_SIZE), b''):
+        digest.update(chunk)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return digest.hexdigest()
+
+
+def hash_stored_file(storage, name):
+    with storage.open(name, 'rb') as file:
+        return hash_file(file)
+
+
+def save_deduplicated_image(image, content_hash):
+    """
+    Saves a new image, unless an image with the same content already exists: that one is returned
+    instead, and the new file isn't stored (or is deleted if it already was). Returns (image, created).
+    """
+    existing = Image.objects.filter(content_hash=content_hash).first()
+    if existing is None:
+        image.content_hash = content_hash
+        try:
+            with transaction.atomic():
+                image.save()
+            return image, True
+        except IntegrityError:
+            # Uploaded at the same time by someone else, keep theirs
+            existing = Image.objects.filter(content_hash=content_hash).first()
+            if existing is None:
+                raise
+
+    if image.image._committed and image.image.name != existing.image.name:
+        image.image.storage.delete(image.image.name)
+    return existing, False
+
+
+def get_image_relations():
+    """The foreign keys pointing at images, including those of many-to-many tables and with a hidden reverse relation."""
+    return [
+        relation for relation in Image._meta.get_fields(include_hidden=True)
+        if relation.auto_created and not relation.concrete and (relation.one_to_many or relation.one_to_one)
+    ]
+
+
+@transaction.atomic
+def merge_images(keep, duplicate):
+    """
+    Points everything using `duplicate` (variant images, product galleries...) at `keep`, then deletes
+    `duplicate`, and its file unless another image shares it.
+    """
+    for relation in get_image_relations():
+        model = relation.related_model
+        field_name = relation.field.name
+        rows = model._base_manager.filter(**{field_name: duplicate})
+        if model._meta.auto_created:
+            # Table of a many-to-many, drop the pairs `keep` already has rather than duplicating them
+            owner_name = next(
+                field.name for field in model._meta.fields if field.is_relation and field.name != field_name
+            )
+            kept_owners = model._base_manager.filter(**{field_name: keep}).values(owner_name)
+            rows.filter(**{f'{owner_name}__in': kept_owners}).delete()
+        rows.update(**{field_name: keep})
+
+    name = duplicate.image.name
+    duplicate.delete()
+    if name and name != keep.image.name and not Image.objects.filter(image=name).exists():
+        storage = duplicate.image.storage
+        transaction.on_commit(lambda: storage.delete(name))
+
+    # The updates above send no signal, saving the kept image refreshes the product listings and caches using it
+    keep.save(update_fields=['last_modified'])
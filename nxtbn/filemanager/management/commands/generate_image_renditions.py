@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+
+from nxtbn.filemanager.models import Image
+from nxtbn.filemanager.renditions import make_renditions
+from nxtbn.filemanager.tasks import generate_image_renditions
+
+
+class Command(BaseCommand):
+    help = 'Makes the resized renditions of the images missing them (or of every image with --force)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Remake the renditions of every image')
+        parser.add_argument('--workers', type=int, default=4, help='Images processed in parallel')
+        parser.add_argument('--queue', action='store_true', help='Queue a Celery task per image instead of processing them here')
+
+    def handle(self, *args, **options):
+        images = Image.objects.exclude(image='')
+        if not options['force']:
+            images = images.exclude(renditions_source=F('image'))
+        image_ids = list(images.order_by('pk').values_list('pk', flat=True))
+
+        if options['queue']:
+            for image_id in image_ids:
+                generate_image_renditions.delay(image_id, options['force'])
+            self.stdout.write(self.style.SUCCESS(f'Successfully queued the renditions of {len(image_ids)} images.'))
+            return
+
+        def process(image_id):
+            try:
+                return make_renditions(image_id, force=options['force'])
+            finally:
+                if options['workers'] > 1:
+                    connection.close()  # Each thread has its own connection
+
+        # Pillow releases the GIL while resizing and encoding, so threads run the images in parallel
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                results = list(executor.map(process, image_ids))
+        else:
+            results = [process(image_id) for image_id in image_ids]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully made the renditions of {sum(results)} images, {len(results) - sum(results)} skipped.'
+        ))
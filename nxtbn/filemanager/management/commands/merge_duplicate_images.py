@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from nxtbn.filemanager.dedup import hash_stored_file, merge_images
+from nxtbn.filemanager.models import Image
+
+
+class Command(BaseCommand):
+    help = (
+        'Hashes the images uploaded before content deduplication, and merges the images with the same '
+        'content into the oldest one: products and variants are moved to it and the copies deleted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the duplicates')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = Image._meta.get_field('image').storage
+        hashed = merged = missing = 0
+        dry_run_hashes = {}  # Nothing is saved in a dry run, the hashes seen so far are kept here instead
+
+        for image in Image.objects.filter(content_hash__isnull=True).exclude(image='').order_by('pk').iterator():
+            try:
+                content_hash = hash_stored_file(storage, image.image.name)
+            except FileNotFoundError:
+                missing += 1
+                self.stderr.write(f"Image {image.pk}: {image.image.name} is missing from the storage.")
+                continue
+
+            keep_id = dry_run_hashes.get(content_hash) or Image.objects.filter(
+                content_hash=content_hash
+            ).values_list('pk', flat=True).first()
+            if keep_id is None:
+                hashed += 1
+                if dry_run:
+                    dry_run_hashes[content_hash] = image.pk
+                else:
+                    # Doesn't touch last_modified, nothing visible changed
+                    Image.objects.filter(pk=image.pk).update(content_hash=content_hash)
+                continue
+
+            merged += 1
+            self.stdout.write(f"Image {image.pk} is a copy of image {keep_id}.")
+            if not dry_run:
+                merge_images(Image.objects.get(pk=keep_id), image)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully hashed {hashed} images, {'found' if dry_run else 'merged'} {merged} duplicates. "
+            f"{missing} images have no file."
+        ))
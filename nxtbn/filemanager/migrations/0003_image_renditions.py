@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filemanager', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='renditions_source',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
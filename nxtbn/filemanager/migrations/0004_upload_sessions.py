@@ -0,0 +1,57 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('filemanager', '0003_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('IMAGE', 'Image'), ('DOCUMENT', 'Document')], max_length=10)),
+                ('file_name', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('image_alt_text', models.CharField(blank=True, max_length=255)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('COMPLETED', 'Completed'), ('ABORTED', 'Aborted')], default='OPEN', max_length=10)),
+                ('storage_name', models.CharField(help_text='Name of the assembled file in the storage.', max_length=1024)),
+                ('multipart_upload_id', models.CharField(blank=True, help_text='S3 multipart upload, when S3 is the storage.', max_length=1024)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='filemanager.document')),
+                ('image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='filemanager.image')),
+            ],
+            options={
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('size', models.PositiveIntegerField()),
+                ('checksum', models.CharField(help_text='SHA-256 of the chunk, hex encoded.', max_length=64)),
+                ('etag', models.CharField(blank=True, help_text='S3 ETag of the uploaded part.', max_length=255)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='filemanager.uploadsession')),
+            ],
+            options={
+                'ordering': ('index',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'index'), name='unique_upload_chunk_index'),
+        ),
+    ]
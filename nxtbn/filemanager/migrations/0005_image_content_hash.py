@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filemanager', '0004_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filemanager', '0005_image_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='error',
+            field=models.CharField(blank=True, help_text='Why the upload was aborted, if it was.', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('OPEN', 'Open'), ('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('ABORTED', 'Aborted')], default='OPEN', max_length=10),
+        ),
+    ]
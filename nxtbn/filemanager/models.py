@@ -1,6 +1,7 @@
 from django.db import models
 
 from nxtbn.core.models import AbstractBaseModel
+from nxtbn.filemanager import UploadKind, UploadStatus
 from nxtbn.users.admin import User
 
 
@@ -10,6 +11,12 @@ class Image(AbstractBaseModel):
     name = models.CharField(max_length=255)
     image = models.ImageField()
     image_alt_text = models.CharField(max_length=255)
+    # Resized copies per format and width, e.g. {"webp": {"320": "renditions/ab/ab12....webp"}},
+    # see nxtbn.filemanager.renditions. `renditions_source` is the original they were made from.
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+    renditions_source = models.CharField(max_length=255, blank=True, editable=False)
+    # SHA-256 of the original, an identical upload reuses this image (see nxtbn.filemanager.dedup)
+    content_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
 
 
 class Document(AbstractBaseModel):
@@ -17,4 +24,60 @@ class Document(AbstractBaseModel):
     last_modified_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='document_modified', null=True, blank=True)
     name = models.CharField(max_length=255)
     document = models.FileField()
-    image_alt_text = models.CharField(max_length=255)
\ No newline at end of file
+    image_alt_text = models.CharField(max_length=255)
+
+
+class UploadSession(AbstractBaseModel):
+    """
+    A chunked, resumable upload of an Image or Document, see `nxtbn.filemanager.uploads`.
+
+    The file is sent in `chunk_size` chunks (the last one may be shorter), each checked against its
+    SHA-256. Chunks already received are listed by the session, so an interrupted upload only resends
+    the missing ones. Completing the session has the chunks assembled into `storage_name` and the
+    Image or Document created, in the background.
+    """
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=10, choices=UploadKind.choices)
+    file_name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    image_alt_text = models.CharField(max_length=255, blank=True)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=UploadStatus.choices, default=UploadStatus.OPEN)
+    error = models.CharField(max_length=255, blank=True, help_text="Why the upload was aborted, if it was.")
+
+    storage_name = models.CharField(max_length=1024, help_text="Name of the assembled file in the storage.")
+    multipart_upload_id = models.CharField(max_length=1024, blank=True, help_text="S3 multipart upload, when S3 is the storage.")
+
+    image = models.ForeignKey(Image, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        ordering = ('-created_at',)
+
+    def __str__(self):
+        return f"Upload {self.pk} of {self.file_name} ({self.status})"
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def get_chunk_size(self, index):
+        """Expected size of the chunk at `index`, only the last one can be shorter."""
+        if index == self.chunk_count - 1:
+            return self.total_size - index * self.chunk_size
+        return self.chunk_size
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    checksum = models.CharField(max_length=64, help_text="SHA-256 of the chunk, hex encoded.")
+    etag = models.CharField(max_length=255, blank=True, help_text="S3 ETag of the uploaded part.")
+
+    class Meta:
+        ordering = ('index',)
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk_index'),
+        ]
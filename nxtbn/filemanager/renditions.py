@@ -0,0 +1,158 @@
+import hashlib
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from PIL import Image as PILImage, ImageOps, features
+
+from nxtbn.filemanager.models import Image
+
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_PREFIX = 'renditions/'
+
+# Pillow format name and encoder options per rendition format
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'avif': ('AVIF', {'quality': 60}),
+}
+
+
+def get_rendition_formats():
+    """The formats of `IMAGE_RENDITION_FORMATS` the installed Pillow can write."""
+    return [
+        file_format for file_format in settings.IMAGE_RENDITION_FORMATS
+        if file_format in RENDITION_FORMATS and features.check(file_format)
+    ]
+
+
+def get_rendition_widths(original_width):
+    """`IMAGE_RENDITION_WIDTHS` capped to the original width, images are never upscaled."""
+    return sorted({min(int(width), original_width) for width in settings.IMAGE_RENDITION_WIDTHS})
+
+
+def get_rendition_name(content, file_format):
+    """
+    Renditions are named after their content, so a name always serves the same bytes and can be cached
+    forever, and identical renditions (e.g. of the same file uploaded twice) are stored once.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    return f"{RENDITIONS_PREFIX}{digest[:2]}/{digest[:40]}.{file_format}"
+
+
+def get_rendition_names(renditions):
+    return {name for by_width in renditions.values() for name in by_width.values()}
+
+
+def encode_rendition(picture, width, file_format):
+    if width < picture.width:
+        height = max(1, round(picture.height * width / picture.width))
+        picture = picture.resize((width, height), PILImage.LANCZOS, reducing_gap=3.0)
+    pil_format, options = RENDITION_FORMATS[file_format]
+    buffer = io.BytesIO()
+    picture.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def open_original(image):
+    with image.image.open('rb') as file:
+        picture = ImageOps.exif_transpose(PILImage.open(file))
+        picture.load()
+
+    if picture.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in picture.getbands() or 'transparency' in picture.info
+        picture = picture.convert('RGBA' if has_alpha else 'RGB')
+    return picture
+
+
+def store_renditions(picture, storage):
+    """Encodes every width in every format and stores the files not stored yet. Returns {format: {width: name}}."""
+    renditions = {}
+    for file_format in get_rendition_formats():
+        renditions[file_format] = {}
+        for width in get_rendition_widths(picture.width):
+            content = encode_rendition(picture, width, file_format)
+            name = get_rendition_name(content, file_format)
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(content))
+            renditions[file_format][str(width)] = name
+    return renditions
+
+
+def generate_renditions(image, force=False):
+    """
+    Makes the renditions of an image (every width in every format) and stores them, unless they were
+    already made from its current original. Returns whether renditions were made.
+
+    Files already stored under the same content name are reused, and the previous renditions no other
+    image uses are deleted once the image is saved.
+    """
+    source = image.image.name
+    if not source or (image.renditions_source == source and not force):
+        return False
+
+    try:
+        picture = open_original(image)
+        renditions = store_renditions(picture, image.image.storage)
+    except (OSError, ValueError, PILImage.DecompressionBombError) as error:
+        # Missing, truncated or undecodable original, or an encoder error. Not worth retrying,
+        # remember the original so that it isn't picked up again
+        logger.warning("Can't make the renditions of image %s (%s): %s", image.pk, source, error)
+        picture = None
+        renditions = {}
+
+    with transaction.atomic():
+        current = Image.objects.select_for_update().filter(pk=image.pk).values_list('image', flat=True).first()
+        if current != source:
+            return False  # Deleted or replaced meanwhile, the new original gets its own renditions
+
+        unused = get_rendition_names(image.renditions) - get_rendition_names(renditions)
+        image.renditions = renditions
+        image.renditions_source = source
+        image.save(update_fields=['renditions', 'renditions_source', 'last_modified'])
+        if unused:
+            transaction.on_commit(lambda: delete_unused_renditions(unused))
+    return picture is not None
+
+
+def delete_unused_renditions(names):
+    """Deletes the given rendition files, except those another image still uses."""
+    storage = Image._meta.get_field('image').storage
+    images = Image.objects.annotate(renditions_text=Cast('renditions', TextField()))
+    for name in names:
+        if not images.filter(renditions_text__contains=name).exists():
+            storage.delete(name)
+
+
+def queue_renditions(image_id, force=False):
+    """Makes the renditions of an image once the transaction commits, inline or through a Celery task (`IMAGE_RENDITIONS_ASYNC`)."""
+    if settings.IMAGE_RENDITIONS_ASYNC:
+        from nxtbn.filemanager.tasks import generate_image_renditions
+        transaction.on_commit(lambda: generate_image_renditions.delay(image_id, force))
+    else:
+        transaction.on_commit(lambda: make_renditions(image_id, force))
+
+
+def make_renditions(image_id, force=False):
+    image = Image.objects.filter(pk=image_id).first()
+    if image is None:
+        return False
+    return generate_renditions(image, force=force)
+
+
+def get_srcset(image, build_url):
+    """
+    Maps each rendition format to a `srcset` attribute value, e.g.
+    {"webp": "https://.../a1b2.webp 320w, https://.../c3d4.webp 640w"}.
+    """
+    return {
+        file_format: ', '.join(
+            f"{build_url(by_width[width])} {width}w" for width in sorted(by_width, key=int)
+        )
+        for file_format, by_width in image.renditions.items()
+    }
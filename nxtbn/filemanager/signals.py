@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from nxtbn.filemanager.models import Image
+from nxtbn.filemanager.renditions import delete_unused_renditions, get_rendition_names, queue_renditions
+
+
+@receiver(post_save, sender=Image)
+def queue_image_renditions(sender, instance, raw=False, **kwargs):
+    # Also catches a replaced original, saving the renditions themselves doesn't queue them again
+    if not raw and instance.image and instance.renditions_source != instance.image.name:
+        queue_renditions(instance.pk)
+
+
+@receiver(post_delete, sender=Image)
+def delete_image_renditions(sender, instance, **kwargs):
+    names = get_rendition_names(instance.renditions)
+    if names:
+        transaction.on_commit(lambda: delete_unused_renditions(names))
@@ -0,0 +1,23 @@
+from celery import shared_task
+
+from nxtbn.filemanager.renditions import make_renditions
+from nxtbn.filemanager.uploads import assemble_upload, expire_upload_sessions
+
+
+@shared_task
+def generate_image_renditions(image_id, force=False):
+    """Make the resized renditions of an image, queued by `nxtbn.filemanager.signals` and the backfill command."""
+    return make_renditions(image_id, force=force)
+
+
+@shared_task
+def expire_stale_upload_sessions():
+    """Periodic task (see `CELERY_BEAT_SCHEDULE`) aborting abandoned chunked uploads and deleting their chunks."""
+    return expire_upload_sessions()
+
+
+@shared_task
+def assemble_chunked_upload(session_id):
+    """Assemble a completed chunked upload into its Image or Document, queued by `complete_upload`."""
+    session = assemble_upload(session_id)
+    return session.status if session else None
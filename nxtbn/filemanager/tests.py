@@ -1,3 +1,300 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from nxtbn.filemanager import UploadStatus
+from nxtbn.filemanager.models import Document, Image, UploadChunk, UploadSession
+from nxtbn.filemanager.uploads import S3MultipartChunkStore, expire_upload_sessions
+from nxtbn.home.base_tests import BaseTestCase
+from nxtbn.product.models import Product, ProductVariant
+
+
+@override_settings(IMAGE_RENDITION_WIDTHS=[100, 200, 400], IMAGE_RENDITION_FORMATS=['webp'], IMAGE_RENDITIONS_ASYNC=False)
+class ImageRenditionTest(BaseTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def create_image(self, color='red'):
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (300, 150), color).save(buffer, 'PNG')
+        image = Image(created_by=self.user, name="banner", image_alt_text="banner")
+        image.image.save("banner.png", ContentFile(buffer.getvalue()), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+        image.refresh_from_db()
+        return image
+
+    def test_renditions_are_made_on_upload(self):
+        image = self.create_image()
+        self.assertEqual(image.renditions_source, image.image.name)
+        self.assertEqual(sorted(image.renditions['webp'], key=int), ['100', '200', '300'])  # Never upscaled
+
+        name = image.renditions['webp']['100']
+        self.assertRegex(name, r'^renditions/[0-9a-f]{2}/[0-9a-f]{40}\.webp$')
+        with default_storage.open(name) as rendition:
+            self.assertEqual(PILImage.open(rendition).size, (100, 50))
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(f'/filemanager/dashboard/api/image/{image.id}/')
+        self.assertSuccess(response)
+        self.assertNotIn('renditions', response.data)
+        self.assertEqual(response.data['srcset']['webp'].count('w, '), 2)
+        self.assertTrue(response.data['srcset']['webp'].startswith('http://testserver/media/renditions/'))
+        self.assertTrue(response.data['srcset']['webp'].endswith(' 300w'))
+
+    def test_identical_renditions_are_shared(self):
+        first = self.create_image()
+        second = self.create_image()
+        self.assertEqual(first.renditions, second.renditions)
+
+        name = first.renditions['webp']['100']
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(name))  # Still used by the second image
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_broken_originals_are_skipped(self):
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (300, 150), 'red').save(buffer, 'JPEG')
+        image = Image(created_by=self.user, name="truncated", image_alt_text="truncated")
+        image.image.save("truncated.jpg", ContentFile(buffer.getvalue()[:-200]), save=False)
+        with self.assertLogs('nxtbn.filemanager.renditions', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            image.save()
+        image.refresh_from_db()
+        self.assertEqual((image.renditions, image.renditions_source), ({}, image.image.name))
+
+        # Not picked up again by the backfill
+        with self.assertNumQueries(1):
+            call_command('generate_image_renditions', workers=1, stdout=io.StringIO())
+
+    def test_backfill_command(self):
+        image = self.create_image()
+        other = self.create_image(color='blue')
+        Image.objects.update(renditions={}, renditions_source='')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('generate_image_renditions', workers=1, stdout=io.StringIO())
+        for item in (image, other):
+            item.refresh_from_db()
+            self.assertEqual(len(item.renditions['webp']), 3)
+
+        # Nothing left to do
+        with self.assertNumQueries(1):
+            call_command('generate_image_renditions', workers=1, stdout=io.StringIO())
+
+
+class ChunkedUploadTest(BaseTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(
+            MEDIA_ROOT=self.media_root, UPLOAD_ASSEMBLY_ASYNC=False, IMAGE_RENDITION_FORMATS=[], IMAGE_RENDITIONS_ASYNC=False,
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.client.force_authenticate(self.user)
+
+    def start(self, content, kind='DOCUMENT', file_name="manual.pdf"):
+        response = self.client.post('/filemanager/dashboard/api/uploads/', {
+            'kind': kind, 'file_name': file_name, 'name': "Manual", 'total_size': len(content), 'chunk_size': 1,
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def put_chunk(self, session, index, data, checksum=None):
+        return self.client.put(
+            f"/filemanager/dashboard/api/uploads/{session['id']}/chunks/{index}/",
+            data,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(data).hexdigest(),
+        )
+
+    def complete(self, session):
+        # Assembled once the request commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/filemanager/dashboard/api/uploads/{session['id']}/complete/")
+
+    def get_session(self, session):
+        return self.client.get(f"/filemanager/dashboard/api/uploads/{session['id']}/").data
+
+    def test_chunks_are_checked_resumed_and_assembled(self):
+        content = os.urandom(600 * 1024)
+        session = self.start(content)
+        chunk_size = session['chunk_size']
+        self.assertEqual(chunk_size, 256 * 1024)  # Raised to the smallest chunk size
+        self.assertEqual(session['chunk_count'], 3)
+        chunks = [content[offset:offset + chunk_size] for offset in range(0, len(content), chunk_size)]
+
+        self.assertEqual(self.put_chunk(session, 1, chunks[1], checksum='0' * 64).status_code, 400)
+        self.assertEqual(self.put_chunk(session, 1, chunks[1][:-1]).status_code, 400)
+        self.assertEqual(self.put_chunk(session, 3, chunks[1]).status_code, 400)
+        self.assertEqual(self.put_chunk(session, 2, chunks[2]).status_code, 204)
+        self.assertEqual(self.put_chunk(session, 0, chunks[0]).status_code, 204)
+
+        # Interrupted, the session tells which chunks to resend
+        self.assertEqual(self.get_session(session)['received_chunks'], [0, 2])
+        self.assertEqual(self.complete(session).status_code, 400)
+
+        self.assertEqual(self.put_chunk(session, 1, chunks[1]).status_code, 204)
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], UploadStatus.PROCESSING)
+        data = self.get_session(session)
+        self.assertEqual(data['status'], UploadStatus.COMPLETED)
+
+        document = Document.objects.get(pk=data['document']['id'])
+        with document.document.open('rb') as file:
+            self.assertEqual(file.read(), content)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'uploads', str(session['id']))), [])  # Chunks deleted
+        self.assertEqual(self.put_chunk(session, 0, chunks[0]).status_code, 400)  # Completed
+
+    def test_image_upload_is_verified(self):
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (20, 10), 'green').save(buffer, 'PNG')
+        session = self.start(buffer.getvalue(), kind='IMAGE', file_name="../logo.png")
+        self.put_chunk(session, 0, buffer.getvalue())
+        self.assertEqual(self.complete(session).status_code, 202)
+        self.assertEqual(self.get_session(session)['image']['name'], "Manual")
+        self.assertRegex(Image.objects.get().image.name, r'^uploads/[0-9a-f]{32}/logo\.png$')
+
+        session = self.start(b"not an image", kind='IMAGE', file_name="fake.png")
+        self.put_chunk(session, 0, b"not an image")
+        self.assertEqual(self.complete(session).status_code, 202)
+        data = self.get_session(session)
+        self.assertEqual((data['status'], data['error']), (UploadStatus.ABORTED, "The uploaded file isn't a valid image."))
+        self.assertEqual(Image.objects.count(), 1)
+
+    def test_abandoned_uploads_expire(self):
+        session = self.start(b"draft")
+        self.put_chunk(session, 0, b"draft")
+        UploadSession.objects.update(last_modified=timezone.now() - timedelta(days=2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_upload_sessions(), 1)
+        self.assertEqual(UploadSession.objects.get().status, UploadStatus.ABORTED)
+        self.assertFalse(UploadChunk.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'uploads', str(session['id']), '0')))
+
+    def test_s3_multipart_upload(self):
+        storage = mock.Mock(location='media', bucket_name='bucket', default_acl='public-read', spec_set=[
+            'location', 'bucket_name', 'default_acl', 'default_content_type', 'connection',
+            'get_object_parameters', 'get_available_name',
+        ])
+        storage.get_object_parameters.return_value = {'CacheControl': 'max-age=86400'}
+        storage.get_available_name.side_effect = lambda name, max_length=None: name
+        client = storage.connection.meta.client
+        client.create_multipart_upload.return_value = {'UploadId': 'upload-id'}
+        client.upload_part.side_effect = lambda PartNumber, **kwargs: {'ETag': f'"etag-{PartNumber}"'}
+
+        content = os.urandom(6 * 1024 * 1024)
+        with mock.patch('nxtbn.filemanager.uploads.get_chunk_store', return_value=S3MultipartChunkStore(storage)):
+            session = self.start(content)
+            other = self.start(content)
+            for index in range(session['chunk_count']):
+                chunk = content[index * session['chunk_size']:(index + 1) * session['chunk_size']]
+                self.assertEqual(self.put_chunk(session, index, chunk).status_code, 204)
+            response = self.complete(session)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f"/filemanager/dashboard/api/uploads/{other['id']}/")
+        self.assertEqual(response.status_code, 202)
+
+        first, second = UploadSession.objects.order_by('pk')
+        self.assertNotEqual(first.storage_name, second.storage_name)  # Same file name, separate keys
+        key = f"media/{first.storage_name}"
+        client.create_multipart_upload.assert_any_call(
+            Bucket='bucket', Key=key, CacheControl='max-age=86400', ContentType='application/pdf', ACL='public-read',
+        )
+        client.complete_multipart_upload.assert_called_once_with(
+            Bucket='bucket', Key=key, UploadId='upload-id',
+            MultipartUpload={'Parts': [{'ETag': '"etag-1"', 'PartNumber': 1}, {'ETag': '"etag-2"', 'PartNumber': 2}]},
+        )
+        self.assertEqual(Document.objects.get().document.name, first.storage_name)
+        client.abort_multipart_upload.assert_called_once_with(
+            Bucket='bucket', Key=f"media/{second.storage_name}", UploadId='upload-id',
+        )
+
+
+class ImageDeduplicationTest(BaseTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root, IMAGE_RENDITION_FORMATS=[], IMAGE_RENDITIONS_ASYNC=False)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (30, 30), 'orange').save(buffer, 'PNG')
+        self.content = buffer.getvalue()
+
+    def test_repeat_upload_reuses_the_image(self):
+        self.client.force_authenticate(self.user)
+        responses = [
+            self.client.post('/filemanager/dashboard/api/images/', {
+                'name': name, 'image_alt_text': name.lower(), 'image': SimpleUploadedFile("orange.png", self.content),
+            }, format='multipart')
+            for name in ("Orange", "Tangerine")
+        ]
+        self.assertEqual([response.status_code for response in responses], [201, 200])
+        self.assertEqual([response.data['metadata_applied'] for response in responses], [True, False])
+        self.assertEqual(responses[0].data['id'], responses[1].data['id'])
+        # The existing image is returned as it is, the second name and alt text aren't saved
+        self.assertEqual((responses[1].data['name'], responses[1].data['image_alt_text']), ("Orange", "orange"))
+        self.assertEqual(Image.objects.get().name, "Orange")
+        self.assertEqual(Image.objects.get().content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(os.listdir(self.media_root), ["orange.png"])
+
+    def test_merge_command(self):
+        images = []
+        for index in range(3):
+            image = Image(created_by=self.user, name=f"Copy {index}", image_alt_text="orange")
+            image.image.save("orange.png", ContentFile(self.content), save=False)
+            image.save()
+            images.append(image)
+        keep, first_copy, second_copy = images
+
+        product = Product.objects.create(name="Juice", summary="summary", description="description", created_by=self.user)
+        product.images.add(keep, first_copy, second_copy)
+        variant = ProductVariant.objects.create(
+            product=product, price=Decimal("2.00"), cost_per_unit=Decimal("1.00"), compare_at_price=Decimal("2.00"),
+            sku="JUICE", variant_image=second_copy,
+        )
+
+        call_command('merge_duplicate_images', '--dry-run', stdout=io.StringIO())
+        self.assertEqual(Image.objects.count(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('merge_duplicate_images', stdout=io.StringIO())
+        self.assertEqual(list(Image.objects.all()), [keep])
+        self.assertEqual(list(product.images.all()), [keep])
+        variant.refresh_from_db()
+        self.assertEqual(variant.variant_image, keep)
+        self.assertEqual(os.listdir(self.media_root), [os.path.basename(keep.image.name)])
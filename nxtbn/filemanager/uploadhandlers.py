@@ -0,0 +1,31 @@
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+class HashingUploadHandlerMixin:
+    """
+    Hashes uploaded files while they stream in, the SHA-256 is set as `content_hash` on the uploaded
+    file, so that identical uploads can be detected without reading them again.
+    """
+    def new_file(self, *args, **kwargs):
+        self.digest = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.digest.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
@@ -0,0 +1,360 @@
+import hashlib
+import io
+import logging
+import mimetypes
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from nxtbn.filemanager import UploadKind, UploadStatus
+from nxtbn.filemanager.dedup import hash_stored_file, save_deduplicated_image
+from nxtbn.filemanager.models import Document, Image, UploadChunk, UploadSession
+
+
+logger = logging.getLogger(__name__)
+
+KiB = 1024
+MiB = 1024 * KiB
+
+READ_SIZE = 64 * KiB
+
+
+class UploadError(Exception):
+    """A chunk or a session that can't be accepted, the message is meant for the client."""
+
+
+def is_s3_storage(storage):
+    # Imported lazily, django-storages' S3 backend needs boto3 which is only installed for S3 setups
+    try:
+        from storages.backends.s3 import S3Storage
+    except (ImportError, ImproperlyConfigured):
+        return False
+    return isinstance(storage, S3Storage)
+
+
+class ChunkReader(io.RawIOBase):
+    """Reads the given files one after the other, as a single stream."""
+    def __init__(self, open_files):
+        self.open_files = iter(open_files)
+        self.current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self.current is None:
+                self.current = next(self.open_files, None)
+                if self.current is None:
+                    return 0
+            data = self.current.read(len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+        super().close()
+
+
+class LocalChunkStore:
+    """
+    Keeps each chunk as a file of the storage, and streams them one after the other into the final file.
+    """
+    min_chunk_size = 256 * KiB
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def get_chunk_name(self, session, index):
+        return f"uploads/{session.pk}/{index}"
+
+    def start(self, session):
+        pass
+
+    def put_chunk(self, session, index, content):
+        name = self.get_chunk_name(session, index)
+        self.storage.delete(name)  # A chunk sent again replaces the previous one
+        self.storage.save(name, File(content))
+        return ''
+
+    def assemble(self, session, chunks):
+        reader = io.BufferedReader(ChunkReader(
+            self.storage.open(self.get_chunk_name(session, chunk.index), 'rb') for chunk in chunks
+        ), buffer_size=READ_SIZE)
+        with reader:
+            content = File(reader, name=session.file_name)
+            content.size = session.total_size
+            return self.storage.save(session.storage_name, content)
+
+    def cleanup(self, session, chunks, assembled=False):
+        for chunk in chunks:
+            self.storage.delete(self.get_chunk_name(session, chunk.index))
+
+
+class S3MultipartChunkStore:
+    """
+    Uploads each chunk as a part of an S3 multipart upload, assembled by S3 itself on completion, so the
+    file goes through this server once, a chunk at a time.
+    """
+    min_chunk_size = 5 * MiB  # S3 minimum part size, except for the last part
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.client = storage.connection.meta.client
+
+    def get_key(self, session):
+        from storages.utils import clean_name, safe_join
+
+        # Same key the storage would write the file to, under its location
+        return safe_join(self.storage.location, clean_name(session.storage_name))
+
+    def get_write_parameters(self, session):
+        """The object parameters the storage would set when saving the file itself."""
+        params = self.storage.get_object_parameters(session.storage_name)
+        if 'ContentType' not in params:
+            content_type, encoding = mimetypes.guess_type(session.file_name)
+            params['ContentType'] = content_type or self.storage.default_content_type
+            if encoding:
+                params['ContentEncoding'] = encoding
+        if 'ACL' not in params and self.storage.default_acl:
+            params['ACL'] = self.storage.default_acl
+        return params
+
+    def start(self, session):
+        params = self.get_write_parameters(session)
+        response = self.client.create_multipart_upload(
+            Bucket=self.storage.bucket_name, Key=self.get_key(session), **params
+        )
+        session.multipart_upload_id = response['UploadId']
+
+    def put_chunk(self, session, index, content):
+        response = self.client.upload_part(
+            Bucket=self.storage.bucket_name,
+            Key=self.get_key(session),
+            UploadId=session.multipart_upload_id,
+            PartNumber=index + 1,
+            Body=content,
+        )
+        return response['ETag']
+
+    def assemble(self, session, chunks):
+        self.client.complete_multipart_upload(
+            Bucket=self.storage.bucket_name,
+            Key=self.get_key(session),
+            UploadId=session.multipart_upload_id,
+            MultipartUpload={'Parts': [{'ETag': chunk.etag, 'PartNumber': chunk.index + 1} for chunk in chunks]},
+        )
+        return session.storage_name
+
+    def cleanup(self, session, chunks, assembled=False):
+        # Once completed, S3 has already turned the parts into the file
+        if not assembled:
+            self.client.abort_multipart_upload(
+                Bucket=self.storage.bucket_name, Key=self.get_key(session), UploadId=session.multipart_upload_id,
+            )
+
+
+def get_target_field(kind):
+    return Image._meta.get_field('image') if kind == UploadKind.IMAGE else Document._meta.get_field('document')
+
+
+def get_chunk_store(kind):
+    storage = get_target_field(kind).storage
+    if is_s3_storage(storage):
+        return S3MultipartChunkStore(storage)
+    return LocalChunkStore(storage)
+
+
+def start_upload(session):
+    """
+    Settles the chunk size and the final file name of a new (unsaved) session, and opens the
+    S3 multipart upload when S3 is the storage.
+    """
+    store = get_chunk_store(session.kind)
+    chunk_size = session.chunk_size or settings.UPLOAD_CHUNK_SIZE
+    session.chunk_size = min(max(chunk_size, store.min_chunk_size), settings.UPLOAD_MAX_CHUNK_SIZE)
+
+    # Nothing is written under the name before completion, a directory of its own keeps two open
+    # uploads of the same file name from being given the same name (and S3 key)
+    field = get_target_field(session.kind)
+    session.storage_name = store.storage.get_available_name(
+        field.generate_filename(None, f"uploads/{uuid.uuid4().hex}/{session.file_name}"), max_length=field.max_length,
+    )
+    store.start(session)
+    session.save()
+    return session
+
+
+def receive_chunk(session, index, stream, checksum):
+    """
+    Stores a chunk read from `stream` (e.g. the request body) after checking its size and SHA-256.
+    The chunk is spooled to a temporary file while hashed, so memory stays flat whatever the chunk size.
+    """
+    if session.status != UploadStatus.OPEN:
+        raise UploadError(f"The upload is {session.get_status_display().lower()}.")
+    if not 0 <= index < session.chunk_count:
+        raise UploadError(f"Chunk index must be between 0 and {session.chunk_count - 1}.")
+
+    expected_size = session.get_chunk_size(index)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.SpooledTemporaryFile(max_size=READ_SIZE * 16) as content:
+        while size <= expected_size:
+            data = stream.read(READ_SIZE)
+            if not data:
+                break
+            digest.update(data)
+            content.write(data)
+            size += len(data)
+
+        if size != expected_size:
+            raise UploadError(f"Chunk {index} must be {expected_size} bytes long.")
+        if digest.hexdigest() != checksum.lower():
+            raise UploadError(f"Chunk {index} doesn't match its checksum.")
+
+        content.seek(0)
+        etag = get_chunk_store(session.kind).put_chunk(session, index, content)
+
+    UploadChunk.objects.update_or_create(
+        session=session, index=index, defaults={'size': size, 'checksum': digest.hexdigest(), 'etag': etag},
+    )
+    # Keeps the session from expiring while chunks keep coming
+    UploadSession.objects.filter(pk=session.pk).update(last_modified=timezone.now())
+
+
+def verify_image(storage, name):
+    try:
+        with storage.open(name, 'rb') as file:
+            PILImage.open(file).verify()
+    except Exception:
+        return False
+    return True
+
+
+def complete_upload(session):
+    """
+    Checks that every chunk was received, and hands the upload over to `assemble_upload` once the
+    transaction commits, inline or through a Celery task (`UPLOAD_ASSEMBLY_ASYNC`). The session stays
+    PROCESSING until then, clients poll it for the outcome.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status != UploadStatus.OPEN:
+            raise UploadError(f"The upload is {session.get_status_display().lower()}.")
+
+        received = set(session.chunks.values_list('index', flat=True))
+        missing = sorted(set(range(session.chunk_count)) - received)
+        if missing:
+            raise UploadError(f"Chunks {missing} are missing.")
+
+        session.status = UploadStatus.PROCESSING
+        session.save(update_fields=['status', 'last_modified'])
+        queue_assembly(session.pk)
+    return session
+
+
+def queue_assembly(session_id):
+    if settings.UPLOAD_ASSEMBLY_ASYNC:
+        from nxtbn.filemanager.tasks import assemble_chunked_upload
+        transaction.on_commit(lambda: assemble_chunked_upload.delay(session_id))
+    else:
+        transaction.on_commit(lambda: assemble_upload(session_id))
+
+
+def assemble_upload(session_id):
+    """
+    Assembles the chunks of a PROCESSING upload into the final file, checks and hashes it, then creates
+    the Image or Document. The slow part runs outside of any transaction, the session is only locked
+    to record the outcome.
+    """
+    session = UploadSession.objects.filter(pk=session_id, status=UploadStatus.PROCESSING).first()
+    if session is None:
+        return None
+
+    chunks = list(session.chunks.all())
+    store = get_chunk_store(session.kind)
+    try:
+        name = store.assemble(session, chunks)
+    except Exception:
+        logger.exception("Can't assemble the chunks of upload %s", session.pk)
+        with transaction.atomic():
+            abort_upload(session, error="The chunks couldn't be assembled.")
+        return session
+
+    error = ''
+    content_hash = None
+    if session.kind == UploadKind.IMAGE:
+        if verify_image(store.storage, name):
+            # An image uploaded before is reused, and the assembled copy deleted
+            content_hash = hash_stored_file(store.storage, name)
+        else:
+            error = "The uploaded file isn't a valid image."
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status != UploadStatus.PROCESSING:
+            # Expired meanwhile, its chunks are already deleted
+            store.storage.delete(name)
+            return session
+
+        session.storage_name = name
+        transaction.on_commit(lambda: store.cleanup(session, chunks, assembled=True))
+        session.chunks.all().delete()
+
+        if not error:
+            attributes = {
+                'created_by': session.created_by,
+                'last_modified_by': session.created_by,
+                'name': session.name,
+                'image_alt_text': session.image_alt_text,
+            }
+            if session.kind == UploadKind.IMAGE:
+                session.image, _ = save_deduplicated_image(Image(image=name, **attributes), content_hash)
+            else:
+                session.document = Document.objects.create(document=name, **attributes)
+            session.status = UploadStatus.COMPLETED
+        else:
+            store.storage.delete(name)
+            session.status = UploadStatus.ABORTED
+            session.error = error
+        session.save()
+    return session
+
+
+def abort_upload(session, error=''):
+    """Cancels an upload and deletes what was received."""
+    chunks = list(session.chunks.all())
+    session.status = UploadStatus.ABORTED
+    session.error = error
+    session.save(update_fields=['status', 'error', 'last_modified'])
+    session.chunks.all().delete()
+    store = get_chunk_store(session.kind)
+    transaction.on_commit(lambda: store.cleanup(session, chunks))
+
+
+def expire_upload_sessions():
+    """
+    Aborts the open uploads without a new chunk for `UPLOAD_SESSION_TTL` hours, and the uploads left
+    processing as long (e.g. by a lost task). Returns how many.
+    """
+    cutoff = timezone.now() - timedelta(hours=settings.UPLOAD_SESSION_TTL)
+    expired = 0
+    sessions = UploadSession.objects.filter(
+        status__in=[UploadStatus.OPEN, UploadStatus.PROCESSING], last_modified__lt=cutoff,
+    )
+    for session in sessions.iterator():
+        with transaction.atomic():
+            abort_upload(session, error="The upload expired.")
+        expired += 1
+    return expired
@@ -45,3 +45,16 @@ class OrderStatus(models.TextChoices):
     DELIVERED = "DELIVERED", _("Delivered")
     CANCELLED = "CANCELLED", _("Cancelled")
     RETURNED = "RETURNED", _("Returned")
+
+
+class StockReservationStatus(models.TextChoices):
+    """Defines the lifecycle of the stock held for an order.
+
+    - 'HELD': Stock is taken off the variant for a limited time, while the order awaits payment or processing.
+    - 'COMMITTED': The order went through, the stock is definitely gone.
+    - 'RELEASED': The hold expired or the order was cancelled, the stock was given back to the variant.
+    """
+
+    HELD = "HELD", _("Held")
+    COMMITTED = "COMMITTED", _("Committed")
+    RELEASED = "RELEASED", _("Released")
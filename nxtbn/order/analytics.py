@@ -0,0 +1,133 @@
+import hashlib
+from datetime import timezone as dt_timezone
+
+from babel.numbers import get_currency_precision
+from django.conf import settings
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
+
+from nxtbn.core.cache import StampedeCache, get_watermarks
+from nxtbn.order import OrderStatus
+from nxtbn.order.models import OrderLineItem
+
+
+class SalesAnalytics:
+    """
+    Revenue, units sold, order count and average order value per day, week or month, plus the
+    best selling variants, for the orders created in [start, end).
+
+    All the grouping happens in the database (one grouped query for the series, one for the top
+    variants), so the cost depends on the number of periods returned, not on the number of line
+    items read in Python. Results are cached per range and filters, and outdated by the "order",
+    "product", "category" and "collection" watermarks (see `nxtbn.core.cache.get_watermarks`).
+
+    Cancelled orders are left out. With a category, collection or supplier filter, the revenue is
+    the one of the matching line items only.
+    """
+    INTERVALS = {
+        'day': TruncDay,
+        'week': TruncWeek,
+        'month': TruncMonth,
+    }
+    WATERMARK_SCOPES = ('order', 'product', 'category', 'collection')
+    DEFAULT_TOP_VARIANTS = 10
+
+    cache = StampedeCache('sales_analytics', timeout=10 * 60)
+
+    def __init__(self, start, end, interval='day', category=None, collection=None, supplier=None, top=DEFAULT_TOP_VARIANTS):
+        self.start = start
+        self.end = end
+        self.interval = interval
+        self.category = category
+        self.collection = collection
+        self.supplier = supplier
+        self.top = top
+
+    def get_cache_key(self):
+        watermarks = get_watermarks(self.WATERMARK_SCOPES)
+        params = [
+            self.start.isoformat(), self.end.isoformat(), self.interval,
+            self.category.path if self.category else '', self.collection, self.supplier, self.top,
+            *(watermarks[scope] for scope in self.WATERMARK_SCOPES),
+        ]
+        return hashlib.md5(repr(params).encode()).hexdigest()
+
+    def get_report(self):
+        return self.cache.get_or_set(self.get_cache_key(), self.build)
+
+    def get_line_items(self):
+        line_items = OrderLineItem.objects.filter(
+            order__created_at__gte=self.start,
+            order__created_at__lt=self.end,
+        ).exclude(order__status=OrderStatus.CANCELLED)
+
+        if self.category is not None:
+            line_items = line_items.filter(variant__product__category__path__startswith=self.category.path)
+        if self.collection is not None:
+            line_items = line_items.filter(variant__product__collections=self.collection)
+        if self.supplier is not None:
+            line_items = line_items.filter(order__supplier=self.supplier)
+        return line_items.order_by()
+
+    def build(self):
+        precision = get_currency_precision(settings.BASE_CURRENCY)
+        line_items = self.get_line_items()
+        trunc = self.INTERVALS[self.interval]
+
+        rows = line_items.values(
+            period=trunc('order__created_at', tzinfo=dt_timezone.utc),
+        ).annotate(
+            revenue=Coalesce(Sum('total_price'), 0),
+            units=Sum('quantity'),
+            orders=Count('order_id', distinct=True),
+        ).order_by('period')
+
+        series = []
+        totals = {'revenue': 0, 'units': 0, 'orders': 0}
+        for row in rows:
+            # An order belongs to a single period, so the order counts add up
+            for key in totals:
+                totals[key] += row[key]
+            series.append({'period': row['period'].date().isoformat(), **self.format_figures(row, precision)})
+
+        top_variants = line_items.values(
+            'variant_id',
+            variant_name=F('variant__name'),
+            sku=F('variant__sku'),
+            product_name=F('variant__product__name'),
+        ).annotate(
+            revenue=Coalesce(Sum('total_price'), 0),
+            units=Sum('quantity'),
+            orders=Count('order_id', distinct=True),
+        ).order_by('-revenue', '-units', 'variant_id')[:self.top]
+
+        return {
+            'currency': settings.BASE_CURRENCY,
+            'interval': self.interval,
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'totals': self.format_figures(totals, precision),
+            'series': series,
+            'top_variants': [
+                {
+                    'variant': row['variant_id'],
+                    'variant_name': row['variant_name'],
+                    'sku': row['sku'],
+                    'product_name': row['product_name'],
+                    'revenue': row['revenue'] / (10 ** precision),
+                    'units': row['units'],
+                    'orders': row['orders'],
+                }
+                for row in top_variants
+            ],
+        }
+
+    @staticmethod
+    def format_figures(row, precision):
+        revenue = row['revenue'] / (10 ** precision)
+        return {
+            'revenue': revenue,
+            'units': row['units'],
+            'orders': row['orders'],
+            'average_order_value': round(revenue / row['orders'], precision) if row['orders'] else 0,
+        }
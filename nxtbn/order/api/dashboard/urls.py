@@ -5,6 +5,8 @@ from nxtbn.order.api.dashboard import views as order_views
 
 urlpatterns = [
     path('orders/', order_views.OrderListView.as_view(), name='order-list'),
+    path('orders/export/', order_views.OrderExportView.as_view(), name='order-export'),
     path('orders/<uuid:id>/', order_views.OrderDetailView.as_view(), name='order-detail'),
     path('stats/', order_views.OrderStatsView.as_view(), name='order-stats'),
+    path('analytics/sales/', order_views.SalesAnalyticsView.as_view(), name='sales-analytics'),
 ]
@@ -4,22 +4,29 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from django.utils.translation import gettext_lazy as _
 from rest_framework.permissions  import AllowAny
-from rest_framework.exceptions import APIException
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.views import APIView
-from django.db.models import Sum, Count
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta, timezone as dt_timezone
 
 
 from nxtbn.core.admin_permissions import NxtbnAdminPermission
 from nxtbn.order import OrderStatus
-from nxtbn.order.models import Order, OrderLineItem
+from nxtbn.core.export import StreamingExportMixin
+from nxtbn.order.analytics import SalesAnalytics
+from nxtbn.order.export import OrderExporter
+from nxtbn.order.models import Order
+from nxtbn.order.stats import floor_hour, get_order_stats
 from nxtbn.payment.models import Payment
+from nxtbn.product.models import Category
 from .serializers import OrderSerializer
-from nxtbn.core.paginator import NxtbnPagination
+from nxtbn.core.paginator import CursorPaginationMixin, NxtbnPagination
 
 from babel.numbers import get_currency_precision
 
 
-class OrderListView(generics.ListAPIView):
+class OrderListView(CursorPaginationMixin, generics.ListAPIView):
     permission_classes = (NxtbnAdminPermission,)
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
@@ -34,27 +41,135 @@ class OrderDetailView(generics.RetrieveAPIView):
 
 
 
-class OrderStatsView(APIView):
+def parse_int_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: _("Enter a whole number.")})
+
+
+class DateRangeMixin:
+    """
+    Reads the `start` / `end` query params: dates (whole days, both included) or datetimes (end excluded),
+    in UTC unless the datetimes carry an offset.
+    """
+    def get_date_range(self, request):
+        start = self.parse_bound(request.query_params.get('start'), 'start')
+        end = self.parse_bound(request.query_params.get('end'), 'end')
+        if start is not None and end is not None and start > end:
+            raise ValidationError({'end': _("The end of the range must come after its start.")})
+        return start, end
+
+    def parse_bound(self, value, name):
+        if not value:
+            return None
+
+        try:
+            day = parse_date(value)
+            if day is not None:
+                moment = datetime.combine(day, time.min)
+                if name == 'end':
+                    moment += timedelta(days=1)
+            else:
+                moment = parse_datetime(value)
+        except ValueError:
+            moment = None
+        if moment is None:
+            raise ValidationError({name: _("Enter a valid date or datetime.")})
+
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, dt_timezone.utc)
+        return moment
+
+
+class OrderExportView(DateRangeMixin, StreamingExportMixin, APIView):
+    """
+    Streams every order, with its payment and line items, as CSV or JSONL (`file_format` query param).
+    Can be limited with the `start` / `end` (see `DateRangeMixin`) and `status` query params.
+    """
+    permission_classes = (NxtbnAdminPermission,)
+
+    def get_exporter(self):
+        start, end = self.get_date_range(self.request)
+        return OrderExporter(start=start, end=end, status=self.request.query_params.get('status'))
+
+
+class OrderStatsView(DateRangeMixin, APIView):
+    """
+    Order count, total and number of distinct variants ordered, read from the order stats rollups.
+
+    Query params:
+        start / end: see `DateRangeMixin`, either can be omitted. The rollups are hourly, so datetimes
+            must fall on a whole hour (in UTC).
+        currency / status: only count the matching orders.
+        supplier: id, only count the orders of that supplier.
+    """
     permission_classes = (NxtbnAdminPermission,)
 
     def get(self, request, *args, **kwargs):
-        order_stats = Order.objects.aggregate(
-            total_order_value=Sum('total_price'),
-            total_orders=Count('id')
+        start, end = self.get_date_range(request)
+        for name, moment in (('start', start), ('end', end)):
+            if moment is not None and moment != floor_hour(moment):
+                raise ValidationError({name: _("Enter a date or a datetime on a whole hour.")})
+        stats = get_order_stats(
+            start=start,
+            end=end,
+            currency=request.query_params.get('currency') or None,
+            status=request.query_params.get('status') or None,
+            supplier=parse_int_param(request, 'supplier'),
         )
-        
-        total_variant_orders = OrderLineItem.objects.aggregate(
-            total=Count('variant', distinct=True)
-        )['total'] or 0
 
-        total_order_value_subunits = order_stats['total_order_value'] or 0
         precision = get_currency_precision(settings.BASE_CURRENCY)
-        total_order_value_units = total_order_value_subunits / (10 ** precision)
+        total_order_value_units = stats['total_price'] / (10 ** precision)
 
         data = {
             'total_order_value': total_order_value_units,
-            'total_orders': order_stats['total_orders'] or 0,
-            'total_variant_orders': total_variant_orders
+            'total_orders': stats['order_count'],
+            'total_variant_orders': stats['variant_count'],
         }
 
-        return Response(data)
\ No newline at end of file
+        return Response(data)
+
+
+class SalesAnalyticsView(DateRangeMixin, APIView):
+    """
+    Sales time series (revenue, units, orders and average order value per period) and top variants.
+
+    Query params:
+        start / end: see `DateRangeMixin`, the `DEFAULT_DAYS` days up to the end of today (UTC) by default.
+        interval: day (default), week or month.
+        category / collection / supplier: ids, only count the matching line items. A category includes its subcategories.
+        top: number of top variants, up to `MAX_TOP_VARIANTS`.
+    """
+    permission_classes = (NxtbnAdminPermission,)
+    DEFAULT_DAYS = 30
+    MAX_TOP_VARIANTS = 50
+
+    def get(self, request, *args, **kwargs):
+        start, end = self.get_date_range(request)
+        if end is None:
+            # Up to the end of today rather than now, so the default range, and its cache key, only change once a day
+            end = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        start = start or end - timedelta(days=self.DEFAULT_DAYS)
+
+        interval = request.query_params.get('interval', 'day')
+        if interval not in SalesAnalytics.INTERVALS:
+            raise ValidationError({'interval': _("Choose one of %(intervals)s.") % {'intervals': ', '.join(SalesAnalytics.INTERVALS)}})
+
+        top = parse_int_param(request, 'top')
+        category_id = parse_int_param(request, 'category')
+        category = get_object_or_404(Category, pk=category_id) if category_id is not None else None
+
+        report = SalesAnalytics(
+            start=start,
+            end=end,
+            interval=interval,
+            category=category,
+            collection=parse_int_param(request, 'collection'),
+            supplier=parse_int_param(request, 'supplier'),
+            top=SalesAnalytics.DEFAULT_TOP_VARIANTS if top is None else max(0, min(top, self.MAX_TOP_VARIANTS)),
+        ).get_report()
+        return Response(report)
@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from django.db import transaction
 
 from nxtbn.order.models import Address, Order, OrderLineItem
+from nxtbn.order.utils import place_order
 from nxtbn.payment import PaymentMethod
 from nxtbn.payment.models import Payment
 from nxtbn.payment.payment_manager import PaymentManager
@@ -27,89 +29,100 @@ class OrderSerializer(serializers.ModelSerializer):
 
 
 
+def validate_currency_code(value):
+    if value != settings.BASE_CURRENCY and value not in settings.ALLOWED_CURRENCIES:
+        raise serializers.ValidationError(_("Currency %(code)s is not supported.") % {'code': value})
+    return value
+
+
+class CartItemSerializer(serializers.Serializer):
+    """A cart line: prices are looked up on the server, never taken from the client."""
+    variant = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
 class GuestOrderSerializer(serializers.ModelSerializer):
-    currency_code = serializers.CharField(write_only=True, required=False)
+    currency_code = serializers.CharField(write_only=True, required=False, validators=[validate_currency_code])
     promo_code= serializers.CharField(write_only=True, required=False)
     shipping_address = AddressSerializer(write_only=True)
     billing_address = AddressSerializer(write_only=True, required=False)
-    cart_data = OrderItemSerializer(many=True, write_only=True)
-    total_price = serializers.DecimalField(write_only=True, max_digits=12, decimal_places=3) # accepting in unit and soring in subunit
+    cart_data = CartItemSerializer(many=True, write_only=True, allow_empty=False)
+    total_price = serializers.DecimalField(write_only=True, max_digits=12, decimal_places=3, required=False) # accepting in unit and soring in subunit
 
     class Meta:
         model = Order
         fields = [
+            'alias',
             'currency_code',
             'promo_code',
             'total_price',
+            'payment_method',
             'shipping_address',
             'billing_address',
             'cart_data',
             # 'meta_data',
         ]
-    
+        read_only_fields = ('alias',)
+
     def create(self, validated_data):
         promo_code = validated_data.pop('promo_code', None)
-        cart_data = validated_data.pop('cart_data')
-        # special_data = validated_data.pop('special_data', {})
-
-        shipping_address_data = validated_data.pop('shipping_address')
-        billing_address_data = validated_data.pop('billing_address')
-
-        shipping_address= Address.objects.create(**shipping_address_data)
-        billing_address = Address.objects.create(**billing_address_data)
-
-        order = Order.objects.create(
-            shipping_address=shipping_address,
-            billing_address=billing_address,
+        request = self.context.get('request')
+        return place_order(
+            cart_data=validated_data.pop('cart_data'),
+            shipping_address=validated_data.pop('shipping_address'),
+            billing_address=validated_data.pop('billing_address', None),
+            customer_currency=validated_data.pop('currency_code', None) or getattr(request, 'currency', None),
+            expected_total=validated_data.pop('total_price', None),
             **validated_data
         )
 
-        for item in cart_data:
-            order.line_items.create(**item)
-
-        return order
-
 
 class AuthenticatedUserOrderSerializer(serializers.ModelSerializer): # TO DO: Test with frontend passing both saved address id and promo code etc?
-    currency_code = serializers.CharField(write_only=True, required=False)
+    currency_code = serializers.CharField(write_only=True, required=False, validators=[validate_currency_code])
     promo_code= serializers.CharField(write_only=True, required=False)
-    cart_data = serializers.ListField(child=serializers.DictField(), write_only=True, required=False)
+    cart_data = CartItemSerializer(many=True, write_only=True, allow_empty=False)
     meta_data =  serializers.ListField(child=serializers.DictField(), write_only=True, required=False)
+    total_price = serializers.DecimalField(write_only=True, max_digits=12, decimal_places=3, required=False) # accepting in unit and soring in subunit
 
 
     class Meta:
         model = Order
         fields = [
+            'alias',
             'promo_code',
             'total_price',
+            'payment_method',
             'shipping_address',
             'billing_address',
             'cart_data',
             'meta_data',
             'currency_code',
         ]
-    
+        read_only_fields = ('alias',)
+        extra_kwargs = {
+            'shipping_address': {'required': True, 'allow_null': False},
+        }
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Orders can only ship to the user's own saved addresses
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        addresses = Address.objects.filter(user=user) if user and user.is_authenticated else Address.objects.none()
+        fields['shipping_address'].queryset = addresses
+        fields['billing_address'].queryset = addresses
+        return fields
+
     def create(self, validated_data):
-        getway = validated_data.pop('getway')
         promo_code = validated_data.pop('promo_code', None)
-        cart_data = validated_data.pop('cart_data')
         meta_data = validated_data.pop('meta_data', {})
-
-        shipping_address_data = validated_data.pop('shipping_address')
-        billing_address_data = validated_data.pop('billing_address')
-
-        shipping_address= Address.objects.create(**shipping_address_data)
-        billing_address = Address.objects.create(**billing_address_data)
-
-
-        order = Order.objects.create(
-            shipping_address=shipping_address,
-            billing_address=billing_address,
+        request = self.context.get('request')
+        return place_order(
+            cart_data=validated_data.pop('cart_data'),
+            shipping_address=validated_data.pop('shipping_address'),
+            billing_address=validated_data.pop('billing_address', None),
+            customer_currency=validated_data.pop('currency_code', None) or getattr(request, 'currency', None),
+            expected_total=validated_data.pop('total_price', None),
+            user=request.user,
             **validated_data
         )
-        
-
-        for item in cart_data:
-            order.line_items.create(**item)
-
-        return order
\ No newline at end of file
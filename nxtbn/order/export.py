@@ -0,0 +1,41 @@
+from nxtbn.core.export import BaseExporter
+from nxtbn.order.models import Order, OrderLineItem
+
+
+class OrderExporter(BaseExporter):
+    """Orders with their payment and line items, optionally limited to a creation range and a status."""
+    name = 'orders'
+    fields = (
+        'created_at', 'status', 'authorize_status', 'charge_status', 'payment_method',
+        'currency', 'total_price', 'customer_currency', 'total_price_in_customer_currency',
+        'user__email', 'supplier__name', 'promo_code__code',
+        'shipping_address__first_name', 'shipping_address__last_name', 'shipping_address__street_address',
+        'shipping_address__city', 'shipping_address__state', 'shipping_address__postal_code',
+        'shipping_address__country',
+        'payment__payment_status', 'payment__payment_amount', 'payment__transaction_id', 'payment__paid_at',
+    )
+    child_name = 'line_items'
+    child_column_prefix = 'line_item'
+    child_fields = (
+        'variant_id', 'variant__sku', 'variant__name', 'variant__product__name', 'quantity',
+        'price_per_unit', 'currency', 'total_price', 'customer_currency', 'total_price_in_customer_currency',
+    )
+    child_parent_field = 'order_id'
+
+    def __init__(self, start=None, end=None, status=None):
+        self.start = start
+        self.end = end
+        self.status = status
+
+    def get_queryset(self):
+        orders = Order.objects.all()
+        if self.start is not None:
+            orders = orders.filter(created_at__gte=self.start)
+        if self.end is not None:
+            orders = orders.filter(created_at__lt=self.end)
+        if self.status:
+            orders = orders.filter(status=self.status)
+        return orders
+
+    def get_child_queryset(self):
+        return OrderLineItem.objects.all()
@@ -0,0 +1,138 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from nxtbn.order import OrderStatus
+from nxtbn.order.analytics import SalesAnalytics
+from nxtbn.order.models import Order, OrderLineItem
+from nxtbn.order.utils import to_subunits
+from nxtbn.payment import PaymentMethod
+from nxtbn.product.models import Product, ProductVariant, Supplier
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates orders with the given number of line items (1M by default), times the sales '
+        'analytics for every interval, then deletes the generated data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--line-items', type=int, default=1_000_000, help='Number of line items to generate')
+        parser.add_argument('--lines-per-order', type=int, default=4, help='Line items per order')
+        parser.add_argument('--variants', type=int, default=500, help='Number of variants ordered')
+        parser.add_argument('--days', type=int, default=365, help='The orders are spread over that many past days')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Orders inserted per batch')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per interval, the best one is reported')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated data')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('A superuser is needed to own the benchmark products.')
+
+        token = uuid.uuid4().hex[:8]
+        supplier = Supplier.objects.create(name=f"Benchmark {token}", description="Benchmark")
+        variants = self.create_variants(user, token, options['variants'])
+
+        try:
+            started_at = time.perf_counter()
+            line_count = self.create_orders(supplier, variants, options)
+            self.stdout.write(f"Generated {line_count} line items in {time.perf_counter() - started_at:.1f}s.")
+
+            end = timezone.now()
+            start = end - timedelta(days=options['days'])
+            for interval in SalesAnalytics.INTERVALS:
+                analytics = SalesAnalytics(start, end, interval=interval, supplier=supplier.pk)
+                timings = []
+                for _ in range(options['repeat']):
+                    run_started_at = time.perf_counter()
+                    report = analytics.build()  # Uncached
+                    timings.append(time.perf_counter() - run_started_at)
+                self.stdout.write(
+                    f"{interval}: {len(report['series'])} periods, {report['totals']['units']} units, "
+                    f"best of {options['repeat']}: {min(timings) * 1000:.0f}ms"
+                )
+        finally:
+            if not options['keep']:
+                self.cleanup(supplier, variants)
+
+    def create_variants(self, user, token, count):
+        product = Product.objects.create(
+            name=f"Benchmark {token}", summary="Benchmark", description="Benchmark", created_by=user,
+        )
+        return ProductVariant.objects.bulk_create([
+            ProductVariant(
+                product=product,
+                price=Decimal(random.randint(100, 10000)) / 100,
+                cost_per_unit=Decimal('1.00'),
+                compare_at_price=Decimal('100.00'),
+                sku=f"BENCHMARK-{token}-{index}",
+            )
+            for index in range(count)
+        ])
+
+    def create_orders(self, supplier, variants, options):
+        now = timezone.now()
+        span = int(timedelta(days=options['days']).total_seconds())
+        statuses = [status for status in OrderStatus.values if status != OrderStatus.CANCELLED]
+        lines_per_order = options['lines_per_order']
+        order_count = -(-options['line_items'] // lines_per_order)
+        line_count = 0
+
+        for batch_start in range(0, order_count, options['batch_size']):
+            size = min(options['batch_size'], order_count - batch_start)
+            orders = [
+                Order(
+                    supplier=supplier,
+                    payment_method=PaymentMethod.CASH_ON_DELIVERY,
+                    currency=settings.BASE_CURRENCY,
+                    customer_currency=settings.BASE_CURRENCY,
+                    status=random.choice(statuses),
+                    total_price=1,
+                )
+                for _ in range(size)
+            ]
+            # bulk_create() skips the model signals, so the order stats rollups and caches are left alone
+            Order.objects.bulk_create(orders)
+
+            line_items = []
+            for order in orders:
+                # created_at is set on insert (auto_now_add), spread the orders over the past days afterwards
+                order.created_at = now - timedelta(seconds=random.randint(0, span))
+                order.total_price = 0
+                for variant in random.sample(variants, min(lines_per_order, len(variants))):
+                    if line_count + len(line_items) >= options['line_items']:
+                        break
+                    quantity = random.randint(1, 5)
+                    total = to_subunits(variant.price * quantity, order.currency)
+                    order.total_price += total
+                    line_items.append(OrderLineItem(
+                        order=order,
+                        variant=variant,
+                        quantity=quantity,
+                        price_per_unit=variant.price,
+                        currency=order.currency,
+                        total_price=total,
+                        customer_currency=order.currency,
+                    ))
+            Order.objects.bulk_update(orders, ['created_at', 'total_price'], batch_size=1000)
+            OrderLineItem.objects.bulk_create(line_items, batch_size=1000)
+            line_count += len(line_items)
+            self.stdout.write(f"{line_count} line items...", ending='\r')
+        self.stdout.write('')
+        return line_count
+
+    def cleanup(self, supplier, variants):
+        # Raw deletes, deleting through the ORM would send a signal per order and line item
+        orders = Order.objects.filter(supplier=supplier)
+        OrderLineItem.objects.filter(order__in=orders)._raw_delete(OrderLineItem.objects.db)
+        orders._raw_delete(Order.objects.db)
+        Product.objects.filter(pk__in={variant.product_id for variant in variants}).delete()
+        supplier.delete()
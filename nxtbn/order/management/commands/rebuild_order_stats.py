@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from nxtbn.order.models import OrderDailyStats, OrderHourlyStats
+from nxtbn.order.stats import rebuild_order_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the hourly and daily order statistics rollups from all the orders'
+
+    def handle(self, *args, **options):
+        rebuild_order_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully rebuilt {OrderHourlyStats.objects.count()} hourly '
+            f'and {OrderDailyStats.objects.count()} daily order stats rollups.'
+        ))
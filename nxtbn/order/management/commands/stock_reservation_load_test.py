@@ -0,0 +1,105 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from nxtbn.order.models import Address, Order
+from nxtbn.order.stock import InsufficientStockError
+from nxtbn.order.utils import place_order
+from nxtbn.payment import PaymentMethod
+from nxtbn.product.models import Product, ProductVariant
+
+
+class Command(BaseCommand):
+    help = (
+        'Places many concurrent orders for a single variant and checks it is never oversold. '
+        'Run it against PostgreSQL, SQLite serializes writers and fails them with "database is locked".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=100, help='Stock of the test variant')
+        parser.add_argument('--orders', type=int, default=500, help='Number of orders to place')
+        parser.add_argument('--workers', type=int, default=50, help='Number of concurrent threads')
+        parser.add_argument('--quantity', type=int, default=1, help='Quantity ordered by each order')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite serializes writes, expect "database is locked" errors.'))
+
+        user = get_user_model().objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('A superuser is needed to own the test product.')
+
+        token = uuid.uuid4().hex[:8]
+        product = Product.objects.create(
+            name=f"Load test {token}", summary="Load test", description="Load test", created_by=user,
+        )
+        variant = ProductVariant.objects.create(
+            product=product,
+            price=Decimal('1.00'),
+            cost_per_unit=Decimal('1.00'),
+            compare_at_price=Decimal('1.00'),
+            sku=f"LOAD-TEST-{token}",
+            stock=options['stock'],
+        )
+
+        results = {'placed': 0, 'out_of_stock': 0, 'errors': 0}
+        lock = threading.Lock()
+        pending = iter(range(options['orders']))
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if next(pending, None) is None:
+                            return
+                    try:
+                        place_order(
+                            cart_data=[{'variant': variant.pk, 'quantity': options['quantity']}],
+                            shipping_address={
+                                'first_name': "Load", 'last_name': "Test", 'street_address': "-",
+                                'city': "-", 'state': "-", 'postal_code': "-", 'country': "-",
+                            },
+                            payment_method=PaymentMethod.CASH_ON_DELIVERY,
+                        )
+                        outcome = 'placed'
+                    except InsufficientStockError:
+                        outcome = 'out_of_stock'
+                    except Exception as error:
+                        self.stderr.write(f'Order failed: {error}')
+                        outcome = 'errors'
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connections.close_all()
+
+        started_at = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(options['workers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started_at
+
+        variant.refresh_from_db()
+        sold = results['placed'] * options['quantity']
+        self.stdout.write(
+            f"{options['orders']} orders in {elapsed:.2f}s with {options['workers']} workers: "
+            f"{results['placed']} placed, {results['out_of_stock']} refused for stock, {results['errors']} errors. "
+            f"Stock left: {variant.stock}."
+        )
+
+        # Clean up the test data
+        orders = Order.objects.filter(line_items__variant=variant)
+        addresses = list(orders.values_list('shipping_address', flat=True))
+        orders.delete()
+        Address.objects.filter(pk__in=addresses).delete()
+        product.delete()
+
+        if sold > options['stock'] or variant.stock != options['stock'] - sold:
+            raise CommandError(f'Oversold: {sold} units sold out of {options["stock"]}, {variant.stock} left.')
+        self.stdout.write(self.style.SUCCESS('No oversell.'))
@@ -2,6 +2,7 @@ from django.db import models
 
 from django.db import models
 from django.conf import settings
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -10,7 +11,7 @@ from nxtbn.core.mixin import MonetaryMixin
 from nxtbn.core.models import AbstractAddressModels, AbstractBaseModel, AbstractBaseUUIDModel
 from nxtbn.discount.models import PromoCode
 from nxtbn.gift_card.models import GiftCard
-from nxtbn.order import OrderAuthorizationStatus, OrderChargeStatus, OrderStatus
+from nxtbn.order import OrderAuthorizationStatus, OrderChargeStatus, OrderStatus, StockReservationStatus
 from nxtbn.payment import PaymentMethod
 from nxtbn.product.models import ProductVariant
 from nxtbn.users.admin import User
@@ -139,10 +140,15 @@ class Order(MonetaryMixin, AbstractBaseUUIDModel):
 
     class Meta:
         ordering = ('-created_at',) # # Most recent orders first
+        indexes = [
+            models.Index(fields=['created_at']),  # Order stats rollups are recomputed per period
+        ]
 
     def save(self, *args, **kwargs):
         self.validate_amount()
-        super(Order, self).save(*args, **kwargs)
+        # Status changes settle the order's stock reservations (see nxtbn.order.signals), atomically with the save
+        with transaction.atomic():
+            super(Order, self).save(*args, **kwargs)
 
     def apply_promo_code(self): # TODO: Do we still need this?
         """
@@ -244,3 +250,80 @@ class OrderLineItem(MonetaryMixin, models.Model):
     def __str__(self):
         return f"{self.variant.product.name} - {self.variant.name} - Qty: {self.quantity}"
 
+
+class StockReservation(models.Model):
+    """
+    Stock of a variant held for an order, see `nxtbn.order.stock`.
+
+    The quantity is taken off `ProductVariant.stock` when the reservation is created. Held
+    reservations expire at `expires_at` and are then released (the stock is given back) by the
+    `release_expired_stock_reservations` periodic task, unless the order went through first.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="stock_reservations")
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name="+")
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(max_length=10, choices=StockReservationStatus.choices, default=StockReservationStatus.HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.variant_id} for order {self.order_id} ({self.status})"
+
+
+class AbstractOrderStats(models.Model):
+    """
+    Base of the order statistics rollups, see `nxtbn.order.stats`.
+
+    A row holds the figures of the orders created in one period (an hour or a day, UTC) for one
+    currency, status and supplier. The supplier is a plain id without a foreign key constraint,
+    rows of deleted suppliers are moved to "no supplier" by `nxtbn.order.signals`.
+    """
+    period_start = models.DateTimeField(db_index=True)
+    currency = models.CharField(max_length=3, choices=CurrencyTypes.choices)
+    status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    supplier = models.ForeignKey(
+        Supplier, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+
+    class Meta:
+        abstract = True
+
+
+class OrderHourlyStats(AbstractOrderStats):
+    order_count = models.PositiveIntegerField(default=0)
+    total_price = models.BigIntegerField(default=0, help_text="Sum of the orders' total price, in subunits of the currency.")
+
+    def __str__(self):
+        return f"{self.period_start:%Y-%m-%d %H:00} {self.currency} {self.status}: {self.order_count} orders"
+
+
+class OrderDailyStats(AbstractOrderStats):
+    order_count = models.PositiveIntegerField(default=0)
+    total_price = models.BigIntegerField(default=0, help_text="Sum of the orders' total price, in subunits of the currency.")
+
+    def __str__(self):
+        return f"{self.period_start:%Y-%m-%d} {self.currency} {self.status}: {self.order_count} orders"
+
+
+class VariantDailySales(AbstractOrderStats):
+    variant = models.ForeignKey(
+        ProductVariant, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    quantity = models.PositiveIntegerField(default=0)
+    total_price = models.BigIntegerField(default=0, help_text="Sum of the line items' total price, in subunits of the currency.")
+
+    def __str__(self):
+        return f"{self.period_start:%Y-%m-%d} {self.variant_id}: {self.quantity} sold"
+
+
+class OrderStatsPendingPeriod(models.Model):
+    """An hour whose orders changed since its rollups were last computed."""
+    period_start = models.DateTimeField(unique=True)
+
+    def __str__(self):
+        return f"{self.period_start:%Y-%m-%d %H:00}"
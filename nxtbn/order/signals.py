@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from nxtbn.core.cache import bump_watermarks
+from nxtbn.order import OrderStatus
+from nxtbn.order.models import (
+    Order,
+    OrderDailyStats,
+    OrderHourlyStats,
+    OrderLineItem,
+    VariantDailySales,
+)
+from nxtbn.order.stats import mark_order_stats_stale
+from nxtbn.order.stock import cancel_stock_reservations, commit_stock_reservations
+from nxtbn.product.models import Supplier
+
+
+# Statuses in which the order is going through, its stock holds become final
+FULFILLMENT_STATUSES = (OrderStatus.PROCESSING, OrderStatus.SHIPPED, OrderStatus.DELIVERED)
+
+
+@receiver(post_save, sender=Order)
+def settle_stock_reservations(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+
+    if instance.status in FULFILLMENT_STATUSES:
+        commit_stock_reservations(instance)
+    elif instance.status == OrderStatus.CANCELLED:
+        cancel_stock_reservations(instance)
+
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def queue_order_stats_refresh(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_order_stats_stale([instance.created_at])
+
+
+@receiver(post_save, sender=OrderLineItem)
+@receiver(post_delete, sender=OrderLineItem)
+def queue_line_item_stats_refresh(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # The order is gone already when its line items are deleted along with it, its own signal covers them
+        mark_order_stats_stale(Order.objects.filter(pk=instance.order_id).values_list('created_at', flat=True))
+
+
+@receiver(post_delete, sender=Supplier)
+def detach_deleted_supplier_stats(sender, instance, **kwargs):
+    # The supplier's orders were set to no supplier with an UPDATE, without any signal
+    for model in (OrderHourlyStats, OrderDailyStats, VariantDailySales):
+        model.objects.filter(supplier_id=instance.pk).update(supplier=None)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=OrderLineItem)
+@receiver(post_delete, sender=OrderLineItem)
+def bump_order_watermarks(sender, instance, **kwargs):
+    # Once committed, a report built meanwhile from the uncommitted order would be cached under the new watermark
+    transaction.on_commit(lambda: bump_watermarks('order'))
@@ -0,0 +1,262 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncHour
+from django.utils import timezone
+
+from nxtbn.order.models import (
+    Order,
+    OrderDailyStats,
+    OrderHourlyStats,
+    OrderLineItem,
+    OrderStatsPendingPeriod,
+    VariantDailySales,
+)
+
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+LOCK_CACHE_BACKEND = 'generic'
+LOCK_KEY = 'order_stats_refresh_lock'
+LOCK_TIMEOUT = 300  # seconds, in case a worker dies while holding the lock
+
+
+def floor_hour(value):
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value):
+    return floor_hour(value).replace(hour=0)
+
+
+def ceil_day(value):
+    day = floor_day(value)
+    return day if day == value else day + DAY
+
+
+def in_range(field, start=None, end=None):
+    conditions = Q()
+    if start is not None:
+        conditions &= Q(**{f'{field}__gte': start})
+    if end is not None:
+        conditions &= Q(**{f'{field}__lt': end})
+    return conditions
+
+
+class OrderStatsRollup:
+    """
+    Computes the order statistics rollups of the orders created in [start, end).
+
+    `order_model` rows (`OrderHourlyStats` or `OrderDailyStats`) hold the order count and total per
+    period, currency, status and supplier. With `variant_model` (`VariantDailySales`), the line items
+    are rolled up per variant as well.
+    """
+    def __init__(self, order_model, trunc, variant_model=None):
+        self.order_model = order_model
+        self.trunc = trunc
+        self.variant_model = variant_model
+
+    def compute(self, start=None, end=None):
+        period = self.trunc('created_at', tzinfo=dt_timezone.utc)
+        rows = Order.objects.filter(in_range('created_at', start, end)).values(
+            'currency', 'status', 'supplier_id', period_start=period,
+        ).annotate(
+            order_count=Count('id'),
+            order_total=Coalesce(Sum('total_price'), 0),
+        ).order_by()
+        return [
+            self.order_model(
+                period_start=row['period_start'],
+                currency=row['currency'],
+                status=row['status'],
+                supplier_id=row['supplier_id'],
+                order_count=row['order_count'],
+                total_price=row['order_total'],
+            )
+            for row in rows
+        ]
+
+    def compute_variants(self, start=None, end=None):
+        period = self.trunc('order__created_at', tzinfo=dt_timezone.utc)
+        rows = OrderLineItem.objects.filter(in_range('order__created_at', start, end)).values(
+            'variant_id',
+            period_start=period,
+            order_currency=F('order__currency'),
+            order_status=F('order__status'),
+            order_supplier=F('order__supplier_id'),
+        ).annotate(
+            sold=Sum('quantity'),
+            line_total=Coalesce(Sum('total_price'), 0),
+        ).order_by()
+        return [
+            self.variant_model(
+                period_start=row['period_start'],
+                currency=row['order_currency'],
+                status=row['order_status'],
+                supplier_id=row['order_supplier'],
+                variant_id=row['variant_id'],
+                quantity=row['sold'],
+                total_price=row['line_total'],
+            )
+            for row in rows
+        ]
+
+    def refresh(self, start=None, end=None):
+        """Replaces the rollup rows of the periods in [start, end), whole periods only."""
+        self.order_model.objects.filter(in_range('period_start', start, end)).delete()
+        self.order_model.objects.bulk_create(self.compute(start, end), batch_size=1000)
+        if self.variant_model is not None:
+            self.variant_model.objects.filter(in_range('period_start', start, end)).delete()
+            self.variant_model.objects.bulk_create(self.compute_variants(start, end), batch_size=1000)
+
+
+hourly_rollup = OrderStatsRollup(OrderHourlyStats, TruncHour)
+daily_rollup = OrderStatsRollup(OrderDailyStats, TruncDay, variant_model=VariantDailySales)
+
+
+def mark_order_stats_stale(timestamps):
+    """
+    Queues the hours of the given order creation times for recomputation, then recomputes them once the
+    transaction commits, inline or through a Celery task (`ORDER_STATS_ASYNC_REFRESH`).
+    """
+    periods = {floor_hour(timestamp) for timestamp in timestamps if timestamp is not None}
+    if not periods:
+        return
+
+    OrderStatsPendingPeriod.objects.bulk_create(
+        [OrderStatsPendingPeriod(period_start=period) for period in periods], ignore_conflicts=True
+    )
+    if settings.ORDER_STATS_ASYNC_REFRESH:
+        from nxtbn.order.tasks import refresh_order_stats_rollups
+        transaction.on_commit(refresh_order_stats_rollups.delay)
+    else:
+        transaction.on_commit(refresh_order_stats)
+
+
+def refresh_order_stats(batch_size=500):
+    """
+    Recomputes the rollups of the pending hours, and of the days they belong to.
+    Returns the number of recomputed hours, or None when another refresh is already running.
+
+    A pending hour is dequeued in the transaction recomputing it, so orders changing meanwhile
+    queue it again rather than being missed.
+    """
+    cache = caches[LOCK_CACHE_BACKEND]
+    if not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        return None
+
+    refreshed = 0
+    try:
+        while True:
+            periods = list(
+                OrderStatsPendingPeriod.objects.order_by('period_start').values_list('period_start', flat=True)[:batch_size]
+            )
+            if not periods:
+                return refreshed
+
+            with transaction.atomic():
+                OrderStatsPendingPeriod.objects.filter(period_start__in=periods).delete()
+                for period in periods:
+                    hourly_rollup.refresh(period, period + HOUR)
+                for day in sorted({floor_day(period) for period in periods}):
+                    daily_rollup.refresh(day, day + DAY)
+            refreshed += len(periods)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+@transaction.atomic
+def rebuild_order_stats():
+    """Recomputes every rollup from scratch, with one grouped query per table."""
+    OrderStatsPendingPeriod.objects.all().delete()
+    hourly_rollup.refresh()
+    daily_rollup.refresh()
+
+
+def compact_order_stats():
+    """
+    Catches up on pending hours, then drops the hourly rollups older than `ORDER_STATS_HOURLY_RETENTION`
+    days, the daily rollups cover them. Returns the number of dropped hourly rows.
+    """
+    refresh_order_stats()
+    cutoff = floor_day(timezone.now()) - timedelta(days=settings.ORDER_STATS_HOURLY_RETENTION)
+    deleted, _ = OrderHourlyStats.objects.filter(period_start__lt=cutoff).delete()
+    return deleted
+
+
+def split_period_range(start=None, end=None):
+    """
+    Splits [start, end) into the hour ranges before the first and after the last whole day, and the
+    range of whole days in between, so that a range is answered with at most 48 hourly rollup periods.
+    Returns (hour_ranges, day_range), with day_range None when the range doesn't span a whole day.
+    """
+    start = floor_hour(start) if start is not None else None
+    end = floor_hour(end) if end is not None else None
+    first_day = ceil_day(start) if start is not None else None
+    last_day = floor_day(end) if end is not None else None
+
+    if first_day is not None and last_day is not None and first_day >= last_day:
+        return [(start, end)] if start < end else [], None
+
+    hour_ranges = []
+    if start is not None and start < first_day:
+        hour_ranges.append((start, first_day))
+    if end is not None and last_day < end:
+        hour_ranges.append((last_day, end))
+    return hour_ranges, (first_day, last_day)
+
+
+def get_order_stats(start=None, end=None, currency=None, status=None, supplier=None):
+    """
+    Returns the number of orders, their total (in subunits) and the number of distinct variants ordered,
+    for the orders created in [start, end), read from the rollups.
+
+    Whole days are read from the daily rollups and the edges of the range from the hourly ones. Edges
+    older than `ORDER_STATS_HOURLY_RETENTION` days only have daily rollups left, ask for whole days there.
+    """
+    filters = {
+        key: value for key, value in (('currency', currency), ('status', status), ('supplier', supplier))
+        if value is not None
+    }
+    hour_ranges, day_range = split_period_range(start, end)
+
+    order_count = order_total = 0
+    variants = None
+    if hour_ranges:
+        hours = Q()
+        lines = Q()
+        for range_start, range_end in hour_ranges:
+            hours |= in_range('period_start', range_start, range_end)
+            lines |= in_range('order__created_at', range_start, range_end)
+        totals = OrderHourlyStats.objects.filter(hours, **filters).aggregate(
+            orders=Coalesce(Sum('order_count'), 0), total=Coalesce(Sum('total_price'), 0),
+        )
+        order_count += totals['orders']
+        order_total += totals['total']
+        # Variants aren't rolled up per hour, the line items of at most two partial days are read instead
+        variants = OrderLineItem.objects.filter(
+            lines, **{f'order__{key}': value for key, value in filters.items()}
+        ).values('variant_id')
+
+    if day_range is not None:
+        days = in_range('period_start', *day_range)
+        totals = OrderDailyStats.objects.filter(days, **filters).aggregate(
+            orders=Coalesce(Sum('order_count'), 0), total=Coalesce(Sum('total_price'), 0),
+        )
+        order_count += totals['orders']
+        order_total += totals['total']
+        day_variants = VariantDailySales.objects.filter(days, **filters).values('variant_id')
+        # UNION drops the duplicates
+        variants = day_variants.distinct() if variants is None else day_variants.union(variants)
+    elif variants is not None:
+        variants = variants.distinct()
+
+    return {
+        'order_count': order_count,
+        'total_price': order_total,
+        'variant_count': variants.count() if variants is not None else 0,
+    }
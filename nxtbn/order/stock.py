@@ -0,0 +1,172 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+from nxtbn.core.cache import bump_watermarks
+from nxtbn.order import StockReservationStatus
+from nxtbn.order.models import StockReservation
+from nxtbn.product import StockStatus
+from nxtbn.product.models import Product, ProductVariant
+from nxtbn.product.utils import refresh_product_listings
+
+
+class InsufficientStockError(ValidationError):
+    def __init__(self, variant_ids):
+        self.variant_ids = sorted(variant_ids)
+        super().__init__({'cart_data': _("Not enough stock for product variants %(ids)s.") % {'ids': self.variant_ids}})
+
+
+def lock_variants(variant_ids):
+    """
+    Loads the variants with their rows locked until the end of the transaction (on databases supporting it).
+
+    Rows are always locked in primary key order, so concurrent orders sharing variants queue
+    up behind each other instead of deadlocking.
+    """
+    variants = ProductVariant.objects.select_for_update().filter(pk__in=variant_ids).order_by('pk')
+    return {variant.pk: variant for variant in variants}
+
+
+def take_stock(quantities):
+    """
+    Takes {variant_id: quantity} off the variants' stock in a single conditional UPDATE.
+
+    Every row is only updated if it still has enough stock, so even without row locks two
+    concurrent orders can't both take the last unit. Raises `InsufficientStockError` (and the
+    surrounding transaction must be rolled back) when any variant falls short.
+    """
+    if not quantities:
+        return
+
+    enough_stock = Q()
+    for variant_id, quantity in quantities.items():
+        enough_stock |= Q(pk=variant_id, stock__gte=quantity)
+
+    updated = ProductVariant.objects.filter(enough_stock).update(stock=F('stock') - quantity_case(quantities))
+    if updated != len(quantities):
+        short = ProductVariant.objects.filter(pk__in=list(quantities)).values_list('pk', 'stock')
+        raise InsufficientStockError([pk for pk, stock in short if stock < quantities[pk]] or list(quantities))
+    refresh_stocked_products(quantities)
+
+
+def give_back_stock(quantities):
+    """Puts {variant_id: quantity} back on the variants' stock in a single UPDATE."""
+    if quantities:
+        ProductVariant.objects.filter(pk__in=list(quantities)).update(stock=F('stock') + quantity_case(quantities))
+        refresh_stocked_products(quantities)
+
+
+def refresh_stocked_products(variant_ids):
+    """
+    Brings the listings and cached storefront pages of the variants' products up to date, which the
+    stock UPDATEs don't do as they send no model signal.
+    """
+    products = list(Product.objects.filter(variants__pk__in=list(variant_ids)).distinct().values_list('pk', 'slug'))
+    refresh_product_listings([pk for pk, _ in products])
+    transaction.on_commit(lambda: bump_watermarks('product', *[f"product_{slug}" for _, slug in products]))
+
+
+def quantity_case(quantities):
+    return Case(
+        *[When(pk=variant_id, then=Value(quantity)) for variant_id, quantity in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def reserve_stock(order, variants, quantities, ttl=None):
+    """
+    Holds the ordered quantities of the stock tracking variants for `ttl` (default `STOCK_RESERVATION_TTL`).
+
+    `variants` are the order's variants by id, as returned by `lock_variants()`, and `quantities`
+    maps variant ids to ordered quantities. Must run inside the order's transaction.
+    """
+    unavailable = [
+        variant_id for variant_id in quantities
+        if not variants[variant_id].track_inventory and variants[variant_id].stock_status == StockStatus.OUT_OF_STOCK
+    ]
+    if unavailable:
+        raise InsufficientStockError(unavailable)
+
+    tracked = {
+        variant_id: quantity for variant_id, quantity in quantities.items()
+        if variants[variant_id].track_inventory
+    }
+    take_stock(tracked)
+
+    ttl = ttl or timedelta(minutes=settings.STOCK_RESERVATION_TTL)
+    expires_at = timezone.now() + ttl
+    return StockReservation.objects.bulk_create([
+        StockReservation(order=order, variant_id=variant_id, quantity=quantity, expires_at=expires_at)
+        for variant_id, quantity in tracked.items()
+    ])
+
+
+def group_quantities(reservations):
+    quantities = defaultdict(int)
+    for variant_id, quantity in reservations:
+        quantities[variant_id] += quantity
+    return dict(quantities)
+
+
+@transaction.atomic
+def release_stock_reservations(reservations, statuses=(StockReservationStatus.HELD,)):
+    """
+    Gives the stock of the reservations back to their variants and marks them released.
+    Returns the number of released reservations.
+    """
+    reservations = list(
+        reservations.filter(status__in=statuses).select_for_update(skip_locked=True).values_list('pk', 'variant_id', 'quantity')
+    )
+    if not reservations:
+        return 0
+
+    quantities = group_quantities((variant_id, quantity) for _, variant_id, quantity in reservations)
+    lock_variants(list(quantities))
+    give_back_stock(quantities)
+    StockReservation.objects.filter(pk__in=[pk for pk, _, _ in reservations]).update(status=StockReservationStatus.RELEASED)
+    return len(reservations)
+
+
+def release_expired_stock_reservations(batch_size=500):
+    """Releases every held reservation past its expiry, batch by batch. Returns the number of released reservations."""
+    released = 0
+    while True:
+        expired = StockReservation.objects.filter(
+            status=StockReservationStatus.HELD, expires_at__lte=timezone.now()
+        ).order_by('expires_at').values_list('pk', flat=True)[:batch_size]
+        count = release_stock_reservations(StockReservation.objects.filter(pk__in=list(expired)))
+        released += count
+        if count < batch_size:
+            return released
+
+
+@transaction.atomic
+def commit_stock_reservations(order):
+    """
+    Makes the order's stock holds final. Holds that already expired are taken again,
+    which raises `InsufficientStockError` if the stock was sold in the meantime.
+    """
+    released = list(
+        order.stock_reservations.filter(status=StockReservationStatus.RELEASED).values_list('variant_id', 'quantity')
+    )
+    if released:
+        quantities = group_quantities(released)
+        lock_variants(list(quantities))
+        take_stock(quantities)
+
+    order.stock_reservations.exclude(status=StockReservationStatus.COMMITTED).update(status=StockReservationStatus.COMMITTED)
+
+
+def cancel_stock_reservations(order):
+    """Gives back all the stock taken by the order, committed or not."""
+    return release_stock_reservations(
+        order.stock_reservations.all(),
+        statuses=(StockReservationStatus.HELD, StockReservationStatus.COMMITTED),
+    )
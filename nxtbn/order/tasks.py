@@ -0,0 +1,28 @@
+from celery import shared_task
+
+from nxtbn.order.stats import compact_order_stats, refresh_order_stats
+from nxtbn.order.stock import release_expired_stock_reservations
+
+
+@shared_task
+def release_expired_stock_holds():
+    """
+    Periodic task (see `CELERY_BEAT_SCHEDULE`) giving the stock of expired reservations
+    back to their variants. Returns the number of released reservations.
+    """
+    return release_expired_stock_reservations()
+
+
+@shared_task
+def refresh_order_stats_rollups():
+    """Recompute the order stats rollups of the hours queued by `nxtbn.order.signals`."""
+    return refresh_order_stats()
+
+
+@shared_task
+def compact_order_stats_rollups():
+    """
+    Periodic task (see `CELERY_BEAT_SCHEDULE`) catching up on queued order stats hours
+    and dropping the hourly rollups past their retention.
+    """
+    return compact_order_stats()
@@ -1,3 +1,404 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from nxtbn.home.base_tests import BaseTestCase
+from nxtbn.order import OrderStatus, StockReservationStatus
+from nxtbn.order.export import OrderExporter
+from nxtbn.order.models import Address, Order, OrderLineItem, StockReservation
+from nxtbn.order.stats import rebuild_order_stats
+from nxtbn.order.stock import InsufficientStockError, release_expired_stock_reservations
+from nxtbn.order.utils import place_order
+from nxtbn.payment import PaymentMethod
+from nxtbn.payment.models import Payment
+from nxtbn.product.models import Category, Product, ProductListing, ProductVariant
+
+
+class OrderPlacementTest(BaseTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        product = Product.objects.create(name="Tee", summary="summary", description="description", created_by=self.user)
+        self.variants = ProductVariant.objects.bulk_create([
+            ProductVariant(
+                product=product,
+                price=Decimal("10.50"),
+                cost_per_unit=Decimal("5.00"),
+                compare_at_price=Decimal("12.00"),
+                sku=f"TEE-{index}",
+                stock=10,
+            )
+            for index in range(30)
+        ])
+        self.address = {
+            'first_name': "John",
+            'last_name': "Doe",
+            'street_address': "1 Main St",
+            'city': "Springfield",
+            'state': "IL",
+            'postal_code': "62701",
+            'country': "US",
+        }
+
+    def place_guest_order(self, line_count, **data):
+        payload = {
+            'payment_method': PaymentMethod.CASH_ON_DELIVERY,
+            'shipping_address': self.address,
+            'cart_data': [{'variant': variant.pk, 'quantity': 2} for variant in self.variants[:line_count]],
+            **data,
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/order/storefront/api/guest-user-order-create/', payload, format='json')
+        return response, len(context.captured_queries)
+
+    def test_guest_order_costs_constant_queries(self):
+        response, small_cart = self.place_guest_order(2)
+        self.assertEqual(response.status_code, 201, response.data)
+        response, large_cart = self.place_guest_order(30)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(small_cart, large_cart)
+
+        order = Order.objects.get(alias=response.data['alias'])
+        self.assertEqual(order.total_price, 63000)  # 30 lines * 2 * 10.50, in cents
+        self.assertEqual(order.line_items.count(), 30)
+        self.assertEqual(order.billing_address_id, order.shipping_address_id)
+
+    def test_client_totals_are_checked(self):
+        response, _ = self.place_guest_order(2, total_price="1.00")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(Address.objects.count(), 0)
+
+        response, _ = self.place_guest_order(2, total_price="42.00")
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_authenticated_order_uses_saved_addresses(self):
+        address = Address.objects.create(user=self.user, **self.address)
+        other_address = Address.objects.create(**self.address)
+        self.client.force_authenticate(self.user)
+        payload = {
+            'payment_method': PaymentMethod.CASH_ON_DELIVERY,
+            'shipping_address': other_address.pk,
+            'cart_data': [{'variant': self.variants[0].pk, 'quantity': 1}],
+        }
+        response = self.client.post('/order/storefront/api/user-order-create/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        payload['shipping_address'] = address.pk
+        response = self.client.post('/order/storefront/api/user-order-create/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        order = Order.objects.get(alias=response.data['alias'])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.shipping_address, address)
+        self.assertEqual(order.total_price, 1050)
+        self.client.force_authenticate(None)
+
+
+class StockReservationTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        product = Product.objects.create(name="Tee", summary="summary", description="description", created_by=self.user)
+        self.variant = ProductVariant.objects.create(
+            product=product,
+            price=Decimal("10.00"),
+            cost_per_unit=Decimal("5.00"),
+            compare_at_price=Decimal("12.00"),
+            sku="TEE",
+            stock=3,
+        )
+        self.untracked = ProductVariant.objects.create(
+            product=product,
+            price=Decimal("10.00"),
+            cost_per_unit=Decimal("5.00"),
+            compare_at_price=Decimal("12.00"),
+            sku="TEE-UNTRACKED",
+            track_inventory=False,
+        )
+
+    def order(self, quantity, untracked_quantity=0):
+        cart_data = [{'variant': self.variant.pk, 'quantity': quantity}]
+        if untracked_quantity:
+            cart_data.append({'variant': self.untracked.pk, 'quantity': untracked_quantity})
+        return place_order(
+            cart_data=cart_data,
+            shipping_address={
+                'first_name': "John", 'last_name': "Doe", 'street_address': "1 Main St",
+                'city': "Springfield", 'state': "IL", 'postal_code': "62701", 'country': "US",
+            },
+            payment_method=PaymentMethod.CASH_ON_DELIVERY,
+        )
+
+    def assertStock(self, expected):
+        self.variant.refresh_from_db()
+        self.assertEqual(self.variant.stock, expected)
+
+    def test_stock_is_never_oversold(self):
+        order = self.order(2, untracked_quantity=5)
+        self.assertStock(1)
+        self.assertEqual(order.stock_reservations.get().quantity, 2)  # Untracked variants hold nothing
+
+        with self.assertRaises(InsufficientStockError):
+            self.order(2)
+        self.assertStock(1)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_holds_are_released(self):
+        order = self.order(3)
+        self.assertStock(0)
+        self.assertEqual(release_expired_stock_reservations(), 0)
+
+        order.stock_reservations.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(release_expired_stock_reservations(), 1)
+        self.assertStock(3)
+
+        # The order went through after all: its stock is taken again, if still available
+        order.status = OrderStatus.PROCESSING
+        order.save()
+        self.assertStock(0)
+        self.assertEqual(order.stock_reservations.get().status, StockReservationStatus.COMMITTED)
+
+        order.status = OrderStatus.CANCELLED
+        order.save()
+        self.assertStock(3)
+        self.assertEqual(order.stock_reservations.get().status, StockReservationStatus.RELEASED)
+
+    def test_committing_sold_out_expired_hold_fails(self):
+        order = self.order(3)
+        order.stock_reservations.update(expires_at=timezone.now() - timedelta(seconds=1))
+        release_expired_stock_reservations()
+        self.order(3)
+
+        order.status = OrderStatus.PROCESSING
+        with self.assertRaises(InsufficientStockError):
+            order.save()
+        self.assertStock(0)
+        order.refresh_from_db()
+        self.assertEqual(order.status, OrderStatus.PENDING)
+
+    def test_orders_refresh_listings_and_cached_pages(self):
+        product = self.variant.product
+        product.default_variant = self.variant
+        product.save()
+        url = f'/product/storefront/api/products/{product.slug}/'
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(2)
+        self.assertEqual(ProductListing.objects.get(product=product).stock, 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['default_variant']['stock'], 1)
+
+
+class OrderStatsRollupTest(BaseTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        product = Product.objects.create(name="Mug", summary="summary", description="description", created_by=self.user)
+        self.variants = ProductVariant.objects.bulk_create([
+            ProductVariant(
+                product=product,
+                price=Decimal("5.00"),
+                cost_per_unit=Decimal("2.00"),
+                compare_at_price=Decimal("6.00"),
+                sku=f"MUG-{index}",
+            )
+            for index in range(3)
+        ])
+
+        created_at = [
+            datetime(2024, 5, 1, 10, 30, tzinfo=dt_timezone.utc),
+            datetime(2024, 5, 1, 23, 10, tzinfo=dt_timezone.utc),
+            datetime(2024, 5, 2, 5, 0, tzinfo=dt_timezone.utc),
+        ]
+        for variant, moment in zip(self.variants, created_at):
+            order = Order.objects.create(
+                currency="USD", total_price=1000, customer_currency="USD", payment_method=PaymentMethod.CASH_ON_DELIVERY,
+            )
+            OrderLineItem.objects.create(order=order, variant=variant, quantity=2, price_per_unit=Decimal("5.00"), total_price=1000)
+            Order.objects.filter(pk=order.pk).update(created_at=moment)
+        self.orders = list(Order.objects.order_by('created_at'))
+        rebuild_order_stats()
+
+    def get_stats(self, **params):
+        response = self.client.get('/order/dashboard/api/stats/', params)
+        self.assertSuccess(response)
+        return response.data
+
+    def test_stats_are_read_from_rollups(self):
+        with self.assertNumQueries(2):
+            stats = self.get_stats()
+        self.assertEqual(stats, {'total_order_value': 30.0, 'total_orders': 3, 'total_variant_orders': 3})
+
+        self.assertEqual(self.get_stats(start="2024-05-01", end="2024-05-01")['total_orders'], 2)
+        self.assertEqual(self.get_stats(start="2024-05-02")['total_orders'], 1)
+        stats = self.get_stats(start="2024-05-01T23:00:00Z", end="2024-05-02T06:00:00Z")
+        self.assertEqual((stats['total_orders'], stats['total_variant_orders']), (2, 2))
+        stats = self.get_stats(start="2024-05-01T11:00:00Z", end="2024-05-03")
+        self.assertEqual((stats['total_orders'], stats['total_variant_orders']), (2, 2))
+
+        response = self.client.get('/order/dashboard/api/stats/', {'start': "yesterday"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/order/dashboard/api/stats/', {'supplier': "abc"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/order/dashboard/api/stats/', {'start': "2024-05-01T10:30:00Z"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_stats(start="2024-05-02T03:00:00+04:00")['total_orders'], 2)  # 23:00 UTC
+
+    def test_rollups_follow_order_changes(self):
+        order = self.orders[0]
+        order.status = OrderStatus.CANCELLED
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        self.assertEqual(self.get_stats(status=OrderStatus.CANCELLED)['total_orders'], 1)
+        self.assertEqual(self.get_stats(status=OrderStatus.PENDING)['total_orders'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.orders[1].delete()
+        stats = self.get_stats(start="2024-05-01T20:00:00Z", end="2024-05-02T00:00:00Z")
+        self.assertEqual((stats['total_orders'], stats['total_variant_orders']), (0, 0))
+        self.assertEqual(self.get_stats()['total_orders'], 2)
+
+
+class SalesAnalyticsTest(BaseTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.clothing = Category.objects.create(name="Clothing")
+        shirts = Category.objects.create(name="Shirts", parent=self.clothing)
+        books = Category.objects.create(name="Books")
+        self.shirt, self.book = [
+            ProductVariant.objects.create(
+                product=Product.objects.create(
+                    name=name, summary="summary", description="description", category=category, created_by=self.user,
+                ),
+                price=Decimal("10.00"),
+                cost_per_unit=Decimal("5.00"),
+                compare_at_price=Decimal("12.00"),
+                sku=name.upper(),
+            )
+            for name, category in (("Shirt", shirts), ("Book", books))
+        ]
+
+        for moment, lines, status in (
+            (datetime(2024, 5, 1, 9, tzinfo=dt_timezone.utc), [(self.shirt, 2), (self.book, 1)], OrderStatus.PENDING),
+            (datetime(2024, 5, 1, 15, tzinfo=dt_timezone.utc), [(self.shirt, 1)], OrderStatus.DELIVERED),
+            (datetime(2024, 5, 3, 12, tzinfo=dt_timezone.utc), [(self.book, 4)], OrderStatus.PENDING),
+            (datetime(2024, 5, 3, 13, tzinfo=dt_timezone.utc), [(self.book, 9)], OrderStatus.CANCELLED),
+        ):
+            order = Order.objects.create(
+                currency="USD", total_price=1000, customer_currency="USD", payment_method=PaymentMethod.CASH_ON_DELIVERY,
+                status=status,
+            )
+            for variant, quantity in lines:
+                OrderLineItem.objects.create(
+                    order=order, variant=variant, quantity=quantity, price_per_unit=variant.price, total_price=quantity * 1000,
+                )
+            Order.objects.filter(pk=order.pk).update(created_at=moment)
+
+    def get_report(self, **params):
+        response = self.client.get('/order/dashboard/api/analytics/sales/', {'start': "2024-05-01", 'end': "2024-05-31", **params})
+        self.assertSuccess(response)
+        return response.data
+
+    def test_daily_series_and_top_variants(self):
+        report = self.get_report()
+        self.assertEqual(report['totals'], {'revenue': 80.0, 'units': 8, 'orders': 3, 'average_order_value': 26.67})
+        self.assertEqual(
+            [(day['period'], day['revenue'], day['units'], day['orders']) for day in report['series']],
+            [('2024-05-01', 40.0, 4, 2), ('2024-05-03', 40.0, 4, 1)],
+        )
+        self.assertEqual([(row['sku'], row['revenue']) for row in report['top_variants']], [('BOOK', 50.0), ('SHIRT', 30.0)])
+
+        report = self.get_report(interval='month', category=self.clothing.pk)
+        self.assertEqual(report['series'], [
+            {'period': '2024-05-01', 'revenue': 30.0, 'units': 3, 'orders': 2, 'average_order_value': 15.0},
+        ])
+
+    def test_reports_are_cached_until_orders_change(self):
+        self.get_report()
+        with self.assertNumQueries(0):
+            self.get_report()
+
+        # Cancelled orders are left out, removing one changes nothing
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(status=OrderStatus.CANCELLED).get().delete()
+        self.assertEqual(self.get_report()['totals']['units'], 8)
+
+        order = Order.objects.get(status=OrderStatus.DELIVERED)
+        order.status = OrderStatus.CANCELLED
+        with self.captureOnCommitCallbacks() as callbacks:
+            order.save()
+            # Not outdated before the change commits
+            self.assertEqual(self.get_report()['totals']['units'], 8)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get_report()['totals']['units'], 7)
+
+        response = self.client.get('/order/dashboard/api/analytics/sales/', {'interval': 'year'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_default_range_is_cached(self):
+        url = '/order/dashboard/api/analytics/sales/'
+        self.assertSuccess(self.client.get(url))
+        with self.assertNumQueries(0):
+            self.assertSuccess(self.client.get(url))
+
+
+class OrderExportTest(BaseTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        product = Product.objects.create(name="Cap", summary="summary", description="description", created_by=self.user)
+        variant = ProductVariant.objects.create(
+            product=product, price=Decimal("8.00"), cost_per_unit=Decimal("4.00"), compare_at_price=Decimal("9.00"), sku="CAP",
+        )
+        for index in range(5):
+            order = Order.objects.create(
+                currency="USD", total_price=1600, customer_currency="USD", payment_method=PaymentMethod.CASH_ON_DELIVERY,
+            )
+            if index:
+                OrderLineItem.objects.bulk_create([
+                    OrderLineItem(order=order, variant=variant, quantity=quantity, price_per_unit=variant.price, total_price=quantity * 800)
+                    for quantity in (1, 2)
+                ])
+                Payment.objects.create(order=order, payment_method=PaymentMethod.CASH_ON_DELIVERY, payment_amount=1600)
+
+    def test_csv_has_a_line_per_line_item(self):
+        response = self.client.get('/order/dashboard/api/orders/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment; filename="orders-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 9)  # One order without line items, four with two
+        self.assertEqual(sum(row['line_item_variant__sku'] == "CAP" for row in rows), 8)
+        self.assertEqual(sum(row['payment__payment_amount'] == "1600" for row in rows), 8)
+
+    def test_jsonl_nests_line_items_with_constant_queries(self):
+        exporter = OrderExporter()
+        exporter.chunk_size = 2
+        with self.assertNumQueries(4):  # One cursor over the orders, and the line items of each chunk
+            records = [json.loads(line) for line in exporter.iter_lines('jsonl')]
+        self.assertEqual(sorted(len(record['line_items']) for record in records), [0, 2, 2, 2, 2])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = exporter.write_to_storage('jsonl', storage=FileSystemStorage(location=directory))
+            with gzip.open(f"{directory}/{path}", 'rt') as exported:
+                self.assertEqual(len(exported.readlines()), 5)
 
-# Create your tests here.
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from decimal import ROUND_HALF_UP, Decimal
+
+from babel.numbers import get_currency_precision
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+from nxtbn.core.currency.utils import ExchangeRateSnapshot
+from nxtbn.order.models import Address, Order, OrderLineItem
+from nxtbn.order.stock import lock_variants, reserve_stock
+
+
+def to_subunits(amount, currency):
+    """Converts a unit amount (e.g. dollars) to an integer amount of subunits (e.g. cents)."""
+    precision = get_currency_precision(currency)
+    return int((amount * (10 ** precision)).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def merge_cart_lines(cart_data):
+    """Returns {variant_id: quantity}, adding up the quantities of lines repeating a variant."""
+    quantities = OrderedDict()
+    for item in cart_data:
+        quantities[item['variant']] = quantities.get(item['variant'], 0) + item['quantity']
+    return quantities
+
+
+@transaction.atomic
+def place_order(cart_data, shipping_address, billing_address=None, customer_currency=None, expected_total=None, **order_fields):
+    """
+    Creates an order and its line items in one transaction, with a fixed number of queries whatever the cart size.
+
+    Prices are never taken from the client: all the cart's variants are loaded (and locked) with one
+    query and the line and order totals are computed from their current prices, in the base currency.
+    The ordered stock is held for the order, see `nxtbn.order.stock.reserve_stock`.
+
+    Args:
+        cart_data: list of {'variant': <variant id>, 'quantity': <int>} dicts.
+        shipping_address / billing_address: `Address` instances, or dicts of fields for new addresses.
+            Without a billing address, the shipping address is used.
+        customer_currency: currency the customer pays in, defaults to the base currency.
+        expected_total: optional order total (in the base currency unit) shown to the customer, the order
+            is refused if the prices changed since.
+        order_fields: other `Order` fields, e.g. `user` or `payment_method`.
+
+    Raises:
+        ValidationError: when a variant doesn't exist or the expected total doesn't match.
+        InsufficientStockError: when a variant doesn't have enough stock left.
+    """
+    base_currency = settings.BASE_CURRENCY
+    customer_currency = customer_currency or base_currency
+    exchange_rate = ExchangeRateSnapshot(customer_currency)
+
+    quantities = merge_cart_lines(cart_data)
+    variants = lock_variants(list(quantities))
+    missing = [variant_id for variant_id in quantities if variant_id not in variants]
+    if missing:
+        raise ValidationError({'cart_data': _("Product variants %(ids)s do not exist.") % {'ids': missing}})
+
+    line_items = []
+    order_total = Decimal('0')
+    for variant_id, quantity in quantities.items():
+        variant = variants[variant_id]
+        line_total = variant.price * quantity
+        order_total += line_total
+        line_items.append(OrderLineItem(
+            variant=variant,
+            quantity=quantity,
+            price_per_unit=variant.price,
+            currency=base_currency,
+            total_price=to_subunits(line_total, base_currency),
+            customer_currency=customer_currency,
+            total_price_in_customer_currency=exchange_rate.convert(line_total),
+        ))
+
+    if expected_total is not None and Decimal(expected_total) != order_total:
+        raise ValidationError({'total_price': _("Prices have changed, the order total is now %(total)s.") % {'total': order_total}})
+
+    shipping_address, billing_address = save_addresses(shipping_address, billing_address)
+
+    order = Order.objects.create(
+        shipping_address=shipping_address,
+        billing_address=billing_address,
+        currency=base_currency,
+        total_price=to_subunits(order_total, base_currency),
+        customer_currency=customer_currency,
+        total_price_in_customer_currency=exchange_rate.convert(order_total),
+        **order_fields
+    )
+
+    for line_item in line_items:
+        line_item.order = order
+        line_item.validate_amount()  # bulk_create() bypasses save()
+    OrderLineItem.objects.bulk_create(line_items)
+    reserve_stock(order, variants, quantities)
+
+    return order
+
+
+def save_addresses(shipping_address, billing_address=None):
+    """
+    Inserts the addresses given as dicts with a single query, saved `Address` instances are used as is.
+    """
+    if isinstance(shipping_address, dict):
+        shipping_address = Address(**shipping_address)
+    if billing_address is None:
+        billing_address = shipping_address
+    elif isinstance(billing_address, dict):
+        billing_address = Address(**billing_address)
+
+    new_addresses = [address for address in (shipping_address, billing_address) if address.pk is None]
+    if billing_address is shipping_address:
+        new_addresses = new_addresses[:1]
+    if new_addresses:
+        Address.objects.bulk_create(new_addresses)
+    return shipping_address, billing_address
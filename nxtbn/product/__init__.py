@@ -47,3 +47,29 @@ class StockStatus(models.TextChoices):
 
     IN_STOCK = 'IN_STOCK', 'In Stock'
     OUT_OF_STOCK = 'OUT_OF_STOCK', 'Out of Stock'
+
+
+class ProductImportStatus(models.TextChoices):
+    """Defines the lifecycle of a bulk product import.
+
+    - 'PENDING': The file is uploaded, the import is waiting for a worker.
+    - 'RUNNING': A worker is importing the file, batch by batch.
+    - 'COMPLETED': Every record of the file was processed.
+    - 'FAILED': The import stopped on an unexpected error, it can be resumed from its last checkpoint.
+    """
+
+    PENDING = 'PENDING', 'Pending'
+    RUNNING = 'RUNNING', 'Running'
+    COMPLETED = 'COMPLETED', 'Completed'
+    FAILED = 'FAILED', 'Failed'
+
+
+class ProductImportFormat(models.TextChoices):
+    """Defines the file formats of bulk product imports, the same as the product exports.
+
+    - 'CSV': One line per variant, with the product columns repeated and the variant columns prefixed with "variant_".
+    - 'JSONL': One JSON object per line and product, with its variants in a "variants" list.
+    """
+
+    CSV = 'csv', 'CSV'
+    JSONL = 'jsonl', 'JSON Lines'
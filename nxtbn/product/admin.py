@@ -6,6 +6,7 @@ from nxtbn.product.models import Category,Collection, Color,Product, ProductVari
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('id','name', 'parent', 'family_tree')
+    list_select_related = ('parent',)
     list_filter = ('parent',)
     search_fields = ('name', 'description')
 
@@ -1,8 +1,12 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from django.db import transaction
+from django.db.models import Prefetch
 
-from nxtbn.product.models import Color, Product, Category, Collection, ProductVariant
+from nxtbn.core.mixin import EagerLoadingMixin
+from nxtbn.filemanager.models import Image
+from nxtbn.product import ProductImportFormat
+from nxtbn.product.models import Color, Product, Category, Collection, ProductImportJob, ProductVariant
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,9 +38,19 @@ class ProductVariantSerializer(serializers.ModelSerializer):
         ref_name = 'product_variant_dashboard_get'
         fields = ('id', 'product', 'name', 'compare_at_price', 'price', 'cost_per_unit', 'sku',)
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     variants = ProductVariantSerializer(many=True, read_only=True)
 
+    prefetch_related_fields = (
+        Prefetch(
+            'variants',
+            queryset=ProductVariant.objects.only(*ProductVariantSerializer.Meta.fields)
+        ),
+        Prefetch('images', queryset=Image.objects.only('id')),
+        Prefetch('related_to', queryset=Product.objects.only('id')),
+        Prefetch('collections', queryset=Collection.objects.only('id')),
+    )
+
     class Meta:
         model = Product 
         ref_name = 'product_dashboard_get'
@@ -92,4 +106,51 @@ class ProductCreateSerializer(serializers.ModelSerializer):
 class ColorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Color
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class ProductImportJobSerializer(serializers.ModelSerializer):
+    file_format = serializers.ChoiceField(choices=ProductImportFormat.choices, required=False)
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ProductImportJob
+        fields = (
+            'id',
+            'file',
+            'file_format',
+            'status',
+            'progress',
+            'total_records',
+            'processed_records',
+            'created_products',
+            'created_variants',
+            'failed_records',
+            'errors',
+            'created_at',
+            'started_at',
+            'finished_at',
+        )
+        read_only_fields = (
+            'status',
+            'total_records',
+            'processed_records',
+            'created_products',
+            'created_variants',
+            'failed_records',
+            'errors',
+            'started_at',
+            'finished_at',
+        )
+
+    def validate(self, attrs):
+        if 'file_format' not in attrs:
+            extension = attrs['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in ProductImportFormat.values:
+                raise serializers.ValidationError({'file_format': _("Can't tell the format from the file name, set it.")})
+            attrs['file_format'] = extension
+        return attrs
+
+    def create(self, validated_data):
+        return ProductImportJob.objects.create(**validated_data, created_by=self.context['request'].user)
+
@@ -4,6 +4,10 @@ from rest_framework.routers import DefaultRouter
 from nxtbn.product.api.dashboard.views import (
     ProductListView,
     ProductDetailView,
+    ProductExportView,
+    ProductImportListView,
+    ProductImportDetailView,
+    ProductImportResumeView,
     CategoryListView,
     CategoryDetailView,
     CollectionListView,
@@ -17,6 +21,10 @@ router.register(r'colors', ColorViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('products/', ProductListView.as_view(), name='product-list'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/imports/', ProductImportListView.as_view(), name='product-import-list'),
+    path('products/imports/<int:pk>/', ProductImportDetailView.as_view(), name='product-import-detail'),
+    path('products/imports/<int:pk>/resume/', ProductImportResumeView.as_view(), name='product-import-resume'),
     path('products/<uuid:id>/', ProductDetailView.as_view(), name='product-detail'),
 
     path('categories/', CategoryListView.as_view(), name='category-list'),
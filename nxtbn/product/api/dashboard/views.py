@@ -1,28 +1,36 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from rest_framework.permissions  import AllowAny
 from rest_framework.exceptions import APIException
 from rest_framework import viewsets
+from rest_framework.views import APIView
 
 
-from nxtbn.core.paginator import NxtbnPagination
-from nxtbn.product.models import Color, Product, Category, Collection
+from nxtbn.core.export import StreamingExportMixin
+from nxtbn.core.paginator import CursorPaginationMixin, NxtbnPagination
+from nxtbn.product.importer import ProductImporter
+from nxtbn.product.models import Color, Product, Category, Collection, ProductImportJob
+from nxtbn.product.tasks import import_products
 from nxtbn.product.api.dashboard.serializers import (
     ColorSerializer,
     ProductCreateSerializer,
+    ProductImportJobSerializer,
     ProductSerializer,
     CategorySerializer,
     CollectionSerializer,
     RecursiveCategorySerializer
 )
 from nxtbn.core.admin_permissions import NxtbnAdminPermission
+from nxtbn.product.export import ProductExporter
+from nxtbn.product.utils import CategoryTreeCache
 
 
 
-class ProductListView(generics.ListCreateAPIView):
+class ProductListView(CursorPaginationMixin, generics.ListCreateAPIView):
     permission_classes = (NxtbnAdminPermission,)
-    queryset = Product.objects.all()
+    queryset = ProductSerializer.setup_eager_loading(Product.objects.all())
     serializer_class = ProductSerializer
     pagination_class = NxtbnPagination
 
@@ -32,6 +40,48 @@ class ProductListView(generics.ListCreateAPIView):
         return ProductSerializer
 
 
+class ProductExportView(StreamingExportMixin, APIView):
+    """Streams every product, with its variants, as CSV or JSONL (`file_format` query param)."""
+    permission_classes = (NxtbnAdminPermission,)
+    exporter_class = ProductExporter
+
+
+class ProductImportListView(generics.ListCreateAPIView):
+    """
+    Uploads a CSV or JSONL product file (same layout as the exports) and queues its import,
+    see `nxtbn.product.importer`. Poll the job for its progress and record errors.
+    """
+    permission_classes = (NxtbnAdminPermission,)
+    queryset = ProductImportJob.objects.all()
+    serializer_class = ProductImportJobSerializer
+    pagination_class = NxtbnPagination
+
+    def perform_create(self, serializer):
+        job = serializer.save()
+        transaction.on_commit(lambda: import_products.delay(job.pk))
+
+
+class ProductImportDetailView(generics.RetrieveAPIView):
+    permission_classes = (NxtbnAdminPermission,)
+    queryset = ProductImportJob.objects.all()
+    serializer_class = ProductImportJobSerializer
+
+
+class ProductImportResumeView(generics.GenericAPIView):
+    """Queues a failed (or stuck) import again, it picks up after its last committed batch."""
+    permission_classes = (NxtbnAdminPermission,)
+    queryset = ProductImportJob.objects.all()
+    serializer_class = ProductImportJobSerializer
+
+    def post(self, request, *args, **kwargs):
+        job = self.get_object()
+        if not ProductImporter.can_resume(job):
+            return Response({'detail': _("Only failed or stuck imports can be resumed.")}, status=status.HTTP_409_CONFLICT)
+
+        transaction.on_commit(lambda: import_products.delay(job.pk))
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
 class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (NxtbnAdminPermission,)
     queryset = Product.objects.all()
@@ -46,6 +96,9 @@ class CategoryListView(generics.ListCreateAPIView):
     serializer_class = RecursiveCategorySerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(CategoryTreeCache.get_tree(top_level_only=True))
+
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (NxtbnAdminPermission,)
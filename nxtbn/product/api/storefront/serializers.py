@@ -1,14 +1,19 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from django.db import transaction
+from django.db.models import Prefetch
 
+from nxtbn.core.mixin import EagerLoadingMixin
 from nxtbn.core.models import CurrencyExchange
 from nxtbn.product.api.dashboard.serializers import RecursiveCategorySerializer
 from nxtbn.filemanager.api.dashboard.serializers import ImageSerializer
-from nxtbn.product.models import Product, Collection, Category, ProductVariant
+from nxtbn.filemanager.models import Image
+from nxtbn.product.models import Product, Collection, Category, ProductListing, ProductVariant
 
-from nxtbn.core.currency.backend import currency_Backend
+from nxtbn.core.currency.utils import ExchangeRateSnapshot
 
 class CategorySerializer(RecursiveCategorySerializer):
     pass
@@ -19,23 +24,60 @@ class CollectionSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'is_active', 'image',)
 
 
+def get_exchange_rate(context):
+    """
+    The request's exchange rate snapshot, shared by every price rendered in this response.
+    """
+    request = context.get('request')
+    exchange_rate = getattr(request, 'exchange_rate', None)
+    if exchange_rate is None:
+        currency_code = getattr(request, 'currency', settings.BASE_CURRENCY)
+        exchange_rate = context.setdefault('exchange_rate', ExchangeRateSnapshot(currency_code))
+    return exchange_rate
+
+
+def get_prices_in_target_currency(context, price):
+    """Returns the (price_in_target_currency, price_in_target_currency_amount) pair of a base currency price."""
+    exchange_rate = get_exchange_rate(context)
+    converted = exchange_rate.convert(price)
+    if not settings.IS_MULTI_CURRENCY:
+        return price, str(converted)
+    return exchange_rate.format(converted), str(converted)
+
+
 class ProductVariantSerializer(serializers.ModelSerializer):
-    variant_image = ImageSerializer(many=True, read_only=True)
+    variant_image = ImageSerializer(read_only=True)
     price_in_target_currency = serializers.SerializerMethodField()
+    price_in_target_currency_amount = serializers.SerializerMethodField()
     class Meta:
         model = ProductVariant
         fields = '__all__'
 
+    def get_exchange_rate(self):
+        return get_exchange_rate(self.context)
+
     def get_price_in_target_currency(self, obj):
-        if not settings.IS_MULTI_CURRENCY:
-            return obj.price
-        else:
-            currency_code = self.context.get('request').currency
-            price = currency_Backend().to_target_currency(currency_code, obj.price)
-        return price
-
-class ProductSerializer(serializers.ModelSerializer):
+        return get_prices_in_target_currency(self.context, obj.price)[0]
+
+    def get_price_in_target_currency_amount(self, obj):
+        return get_prices_in_target_currency(self.context, obj.price)[1]
+
+class ProductSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     default_variant = ProductVariantSerializer()
+
+    select_related_fields = ('default_variant', 'default_variant__variant_image')
+    only_fields = (
+        'id',
+        'name',
+        'summary',
+        'description',
+        'category',
+        'brand',
+        'type',
+        'slug',
+        'default_variant',
+    )
+
     class Meta:
         model = Product
         fields = (
@@ -51,9 +93,68 @@ class ProductSerializer(serializers.ModelSerializer):
         )
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductListingSerializer(serializers.ModelSerializer):
+    """
+    Renders a `ProductListing` row exactly like `ProductSerializer` renders the product,
+    only the currency dependent prices are computed per request.
+    """
+    id = serializers.IntegerField(source='product_id', read_only=True)
+    default_variant = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductListing
+        fields = ProductSerializer.Meta.fields
+
+    def get_default_variant(self, obj):
+        if obj.default_variant is None:
+            return None
+
+        variant = dict(obj.default_variant)
+        price = Decimal(variant['price'])
+        variant['price_in_target_currency'], variant['price_in_target_currency_amount'] = get_prices_in_target_currency(
+            self.context, price
+        )
+
+        # Image URLs are stored relative, made absolute like the live serializer does
+        request = self.context.get('request')
+        variant_image = variant.get('variant_image')
+        if request is not None and variant_image:
+            variant['variant_image'] = {
+                **variant_image,
+                'image': self.build_absolute_uri(request, variant_image.get('image')),
+                'srcset': {
+                    file_format: self.build_absolute_srcset(request, srcset)
+                    for file_format, srcset in variant_image.get('srcset', {}).items()
+                },
+            }
+        return variant
+
+    @staticmethod
+    def build_absolute_uri(request, url):
+        if url and url.startswith('/'):
+            return request.build_absolute_uri(url)
+        return url
+
+    @classmethod
+    def build_absolute_srcset(cls, request, srcset):
+        candidates = []
+        for candidate in srcset.split(', '):
+            url, _, descriptor = candidate.partition(' ')
+            candidates.append(f"{cls.build_absolute_uri(request, url)} {descriptor}")
+        return ', '.join(candidates)
+
+
+class ProductDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     variants = ProductVariantSerializer(many=True)
     default_variant = ProductVariantSerializer()
+
+    select_related_fields = ('default_variant', 'default_variant__variant_image')
+    prefetch_related_fields = (
+        Prefetch('variants', queryset=ProductVariant.objects.select_related('variant_image')),
+        Prefetch('collections', queryset=Collection.objects.only('id')),
+        Prefetch('images', queryset=Image.objects.only('id')),
+    )
+
     class Meta:
         model = Product
         fields = (
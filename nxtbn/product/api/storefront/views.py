@@ -1,6 +1,7 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from django.utils.translation import gettext_lazy as _
+from django.db.models import Exists, OuterRef
 from rest_framework.permissions  import AllowAny
 from rest_framework.exceptions import APIException
 
@@ -9,10 +10,13 @@ import django_filters
 from django_filters import rest_framework as filters
 
 
+from nxtbn.core.mixin import ResponseCacheMixin
 from nxtbn.core.paginator import NxtbnPagination
-from nxtbn.product.api.storefront.serializers import CategorySerializer, CollectionSerializer, ProductDetailSerializer, ProductSerializer
-from nxtbn.product.models import Category, Collection, Product
+from nxtbn.product.api.storefront.serializers import CategorySerializer, CollectionSerializer, ProductDetailSerializer, ProductListingSerializer, ProductSerializer
+from nxtbn.product.models import Category, Collection, Product, ProductListing, ProductVariant
 from nxtbn.product.models import Supplier
+from nxtbn.product.search import ProductSearchFilter
+from nxtbn.product.utils import CategoryTreeCache, ProductFacets, ProductListingProjection
 
 
 class ProductFilter(filters.FilterSet):
@@ -25,44 +29,127 @@ class ProductFilter(filters.FilterSet):
     type = filters.CharFilter(field_name='type', lookup_expr='exact')
     related_to = filters.CharFilter(field_name='related_to__name', lookup_expr='icontains')
     collection = filters.ModelChoiceFilter(field_name='collections', queryset=Collection.objects.all())
+    category_tree = filters.ModelChoiceFilter(queryset=Category.objects.all(), method='filter_category_tree')
+    min_price = filters.NumberFilter(method='filter_price')
+    max_price = filters.NumberFilter(method='filter_price')
 
     class Meta:
         model = Product
-        fields = ('name', 'summary', 'description', 'category', 'supplier', 'brand', 'type', 'related_to', 'collection')
+        fields = ('name', 'summary', 'description', 'category', 'supplier', 'brand', 'type', 'related_to', 'collection', 'category_tree', 'min_price', 'max_price')
+
+    def filter_category_tree(self, queryset, name, value):
+        """Products in the given category or any of its subcategories."""
+        return queryset.filter(category__path__startswith=value.path)
+
+    def filter_price(self, queryset, name, value):
+        """Products with at least one variant in the price range, matches the price facet buckets."""
+        lookup = 'price__gte' if name == 'min_price' else 'price__lt'
+        variants = ProductVariant.objects.filter(product=OuterRef('pk'), **{lookup: value})
+        return queryset.filter(Exists(variants))
 
 
     
 
 
-class ProductListView(generics.ListAPIView):
+class ProductListingFilter(filters.FilterSet):
+    """The `ProductFilter` filters answered by the `ProductListing` columns."""
+    category = filters.ModelChoiceFilter(field_name='category', queryset=Category.objects.all())
+    brand = filters.CharFilter(lookup_expr='icontains')
+    type = filters.CharFilter(field_name='type', lookup_expr='exact')
+
+    class Meta:
+        model = ProductListing
+        fields = ('category', 'brand', 'type')
+
+
+class ProductListView(ResponseCacheMixin, generics.ListAPIView):
     pagination_class = NxtbnPagination
     permission_classes = (AllowAny,)
-    queryset = Product.objects.all()
+    response_cache_scopes = ('product', 'category')
+    queryset = ProductSerializer.setup_eager_loading(Product.objects.all())
     serializer_class = ProductSerializer
     filter_backends = [
         django_filters.rest_framework.DjangoFilterBackend,
-        drf_filters.SearchFilter,
+        ProductSearchFilter,
         drf_filters.OrderingFilter
     ]
     filterset_class = ProductFilter
-    search_fields = ['name', 'summary', 'description', 'category__name', 'type']
     ordering_fields = ['name', 'created_at']
 
-class CollectionListView(generics.ListAPIView):
+    # Requests using only these params are served from the `ProductListing` read model
+    listing_query_params = {'page', 'ordering', 'category', 'brand', 'type'}
+    use_listing = False
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.use_listing = self.can_use_listing(request)
+        if self.use_listing:
+            self.filterset_class = ProductListingFilter
+
+    def can_use_listing(self, request):
+        """
+        Read from the listing projection unless the request needs filters it can't answer
+        (search, collections, price ranges...) or some listings are not synced yet.
+        """
+        if self.listing_query_params is None:
+            return False
+        if not self.listing_query_params.issuperset(request.query_params.keys()):
+            return False
+        return not ProductListingProjection.is_stale()
+
+    def get_queryset(self):
+        if self.use_listing:
+            return ProductListing.objects.all()
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.use_listing:
+            return ProductListingSerializer
+        return super().get_serializer_class()
+
+class ProductFacetView(ProductListView):
+    """
+    Same filters, search and page as `ProductListView`, with the facet counts of the
+    whole filtered catalog under `facets`.
+    """
+    listing_query_params = None  # Facets are counted on the normalized models
+    response_cache_scopes = ('product', 'category', 'collection', 'supplier')
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        facets = ProductFacets.get_facets(queryset)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['facets'] = facets
+        return response
+
+
+class CollectionListView(ResponseCacheMixin, generics.ListAPIView):
     permission_classes = (AllowAny,)
+    response_cache_scopes = ('collection',)
     pagination_class = None
     queryset = Collection.objects.filter(is_active=True)
     serializer_class = CollectionSerializer
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(ResponseCacheMixin, generics.ListAPIView):
     permission_classes = (AllowAny,)
+    response_cache_scopes = ('category',)
     pagination_class = None
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    def list(self, request, *args, **kwargs):
+        return Response(CategoryTreeCache.get_tree(top_level_only=False))
 
-class ProductDetailView(generics.RetrieveAPIView):
+
+class ProductDetailView(ResponseCacheMixin, generics.RetrieveAPIView):
     permission_classes = (AllowAny,)
-    queryset = Product.objects.all()
+    queryset = ProductDetailSerializer.setup_eager_loading(Product.objects.all())
     serializer_class = ProductDetailSerializer
-    lookup_field = 'slug'
\ No newline at end of file
+    lookup_field = 'slug'
+
+    def get_response_cache_scopes(self):
+        # Only changes to this product (or to the categories, collections and images it links to) outdate it
+        return (f"product_{self.kwargs['slug']}", 'category', 'collection', 'media')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'nxtbn.product'
+
+    def ready(self):
+        import nxtbn.product.signals  # noqa
@@ -0,0 +1,24 @@
+from nxtbn.core.export import BaseExporter
+from nxtbn.product.models import Product, ProductVariant
+
+
+class ProductExporter(BaseExporter):
+    """Products with their variants."""
+    name = 'products'
+    fields = (
+        'name', 'slug', 'summary', 'description', 'brand', 'type', 'is_live', 'published_date',
+        'category__name', 'supplier__name', 'default_variant_id', 'created_at', 'last_modified',
+    )
+    child_name = 'variants'
+    child_column_prefix = 'variant'
+    child_fields = (
+        'id', 'name', 'sku', 'price', 'compare_at_price', 'cost_per_unit', 'currency',
+        'track_inventory', 'stock', 'stock_status', 'color_code',
+    )
+    child_parent_field = 'product_id'
+
+    def get_queryset(self):
+        return Product.objects.all()
+
+    def get_child_queryset(self):
+        return ProductVariant.objects.all()
@@ -0,0 +1,386 @@
+import csv
+import io
+import json
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from nxtbn.core import CurrencyTypes
+from nxtbn.core.cache import bump_watermarks
+from nxtbn.product import ProductImportFormat, ProductImportStatus, ProductType, StockStatus, WeightUnits
+from nxtbn.product.models import Category, Collection, Product, ProductImportJob, ProductVariant, Supplier
+from nxtbn.product.search import get_search_backend
+from nxtbn.product.utils import ProductFacets, refresh_product_listings
+from nxtbn.seo.sitemaps import mark_sitemap_shards_stale
+
+
+# Columns of the product exports (see nxtbn.product.export) read as their import field
+COLUMN_ALIASES = {
+    'category__name': 'category',
+    'supplier__name': 'supplier',
+}
+CSV_VARIANT_PREFIX = 'variant_'
+CSV_LIST_SEPARATOR = '|'
+
+
+class ProductVariantImportSerializer(serializers.Serializer):
+    sku = serializers.CharField(max_length=50)
+    name = serializers.CharField(max_length=255, required=False, allow_null=True)
+    price = serializers.DecimalField(max_digits=12, decimal_places=3, min_value=Decimal('0.01'))
+    compare_at_price = serializers.DecimalField(max_digits=12, decimal_places=3, min_value=Decimal('0.01'), required=False)
+    cost_per_unit = serializers.DecimalField(max_digits=12, decimal_places=3, min_value=Decimal('0.01'), required=False)
+    currency = serializers.ChoiceField(choices=CurrencyTypes.choices, required=False)
+    track_inventory = serializers.BooleanField(default=True)
+    stock = serializers.IntegerField(default=0)
+    low_stock_threshold = serializers.IntegerField(default=0)
+    stock_status = serializers.ChoiceField(choices=StockStatus.choices, default=StockStatus.IN_STOCK)
+    color_code = serializers.CharField(max_length=7, required=False, allow_null=True)
+    weight_unit = serializers.ChoiceField(choices=WeightUnits.choices, required=False, allow_null=True)
+    weight_value = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, allow_null=True)
+
+    def validate_currency(self, value):
+        if value != settings.BASE_CURRENCY:
+            raise serializers.ValidationError(f"Variant prices must be in the base currency, {settings.BASE_CURRENCY}.")
+        return value
+
+    def validate(self, attrs):
+        # Like in the dashboard, missing prices default to the selling price
+        attrs.setdefault('compare_at_price', attrs['price'])
+        attrs.setdefault('cost_per_unit', attrs['price'])
+        attrs['currency'] = settings.BASE_CURRENCY
+        return attrs
+
+
+class ProductImportSerializer(serializers.Serializer):
+    """
+    Validates one record of an import file without any query, the category, supplier and
+    collections (by name) and the SKUs are checked by `ProductImporter` for the whole batch.
+    """
+    name = serializers.CharField(max_length=255)
+    slug = serializers.SlugField(max_length=Product._meta.get_field('slug').max_length, required=False)
+    summary = serializers.CharField(max_length=500, default='', allow_blank=True)
+    description = serializers.CharField(max_length=500, default='', allow_blank=True)
+    brand = serializers.CharField(max_length=100, required=False, allow_null=True)
+    type = serializers.ChoiceField(choices=ProductType.choices, default=ProductType.SIMPLE_PRODUCT)
+    is_live = serializers.BooleanField(default=False)
+    category = serializers.CharField(max_length=255, required=False, allow_null=True)
+    supplier = serializers.CharField(max_length=255, required=False, allow_null=True)
+    collections = serializers.ListField(child=serializers.CharField(max_length=255), default=list)
+    variants = ProductVariantImportSerializer(many=True, allow_empty=False)
+
+
+def clean_record(record):
+    """Renames the export columns and splits CSV lists, empty values are left out so that defaults apply."""
+    cleaned = {}
+    for key, value in record.items():
+        if key is None or value is None or value == '':
+            continue
+        key = COLUMN_ALIASES.get(key, key)
+        if key == 'collections' and isinstance(value, str):
+            value = [name.strip() for name in value.split(CSV_LIST_SEPARATOR) if name.strip()]
+        cleaned[key] = value
+    return cleaned
+
+
+def read_csv_records(stream):
+    """
+    Yields (record, error) pairs from CSV lines grouped by product: consecutive lines with the same
+    slug (or name, without a slug column) are the variants of one product.
+    """
+    current_key = record = None
+    for row in csv.DictReader(stream):
+        row = {key.strip(): value.strip() for key, value in row.items() if key is not None and isinstance(value, str)}
+        key = row.get('slug') or row.get('name')
+        variant = clean_record({
+            column[len(CSV_VARIANT_PREFIX):]: value for column, value in row.items() if column.startswith(CSV_VARIANT_PREFIX)
+        })
+
+        if record is None or key != current_key:
+            if record is not None:
+                yield record, None
+            current_key = key
+            record = clean_record({column: value for column, value in row.items() if not column.startswith(CSV_VARIANT_PREFIX)})
+            record['variants'] = []
+        if variant:
+            record['variants'].append(variant)
+
+    if record is not None:
+        yield record, None
+
+
+def read_jsonl_records(stream):
+    """Yields (record, error) pairs from JSON lines, one product with its variants per line."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(record, dict):
+            yield None, "Each line must be a JSON object."
+            continue
+        record = clean_record(record)
+        record['variants'] = [clean_record(variant) for variant in record.get('variants', []) if isinstance(variant, dict)]
+        yield record, None
+
+
+READERS = {
+    ProductImportFormat.CSV: read_csv_records,
+    ProductImportFormat.JSONL: read_jsonl_records,
+}
+
+
+@contextmanager
+def keep_preset_slugs(model):
+    """
+    AutoSlugField regenerates the slug of every new row, with a uniqueness query per row that can't see
+    the other rows of a `bulk_create()`. Within this block, the slugs set on new instances are kept.
+    """
+    field = model._meta.get_field('slug')
+    overwrite_on_add = field.overwrite_on_add
+    field.overwrite_on_add = False
+    try:
+        yield
+    finally:
+        field.overwrite_on_add = overwrite_on_add
+
+
+def allocate_slugs(wanted_slugs):
+    """
+    Returns a unique slug for each of the wanted ones, numbering duplicates "slug-2", "slug-3"... like
+    AutoSlugField, with a single query for the slugs already taken.
+    """
+    max_length = Product._meta.get_field('slug').max_length
+    bases = {slug[:max_length] for slug in wanted_slugs}
+    taken_filter = Q()
+    for base in bases:
+        taken_filter |= Q(slug=base) | Q(slug__startswith=f"{base}-")
+    taken = set(Product.objects.filter(taken_filter).values_list('slug', flat=True)) if bases else set()
+
+    slugs = []
+    for wanted in wanted_slugs:
+        slug = wanted[:max_length]
+        number = 2
+        while slug in taken:
+            suffix = f"-{number}"
+            slug = f"{wanted[:max_length - len(suffix)]}{suffix}"
+            number += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+class ProductImporter:
+    """
+    Imports the products and variants of a `ProductImportJob` file.
+
+    The file is streamed and processed in batches of `batch_size` records. Each batch is validated
+    record by record, its categories, suppliers, collections and SKUs are resolved with one query each,
+    and its products, variants and collection memberships are inserted with `bulk_create()`. The batch,
+    its side effects (listings, search index, caches) and the job checkpoint are committed together,
+    so a failed or interrupted import resumes after its last committed batch. Invalid records are
+    skipped and reported in `job.errors`.
+    """
+    batch_size = 500
+    # A running import not checkpointed for that long is assumed dead and can be resumed
+    stale_after = timedelta(minutes=10)
+
+    def __init__(self, job, batch_size=None):
+        self.job = job
+        self.batch_size = batch_size or self.batch_size
+
+    @classmethod
+    def get_claimable_filter(cls):
+        return Q(status__in=(ProductImportStatus.PENDING, ProductImportStatus.FAILED)) | Q(
+            status=ProductImportStatus.RUNNING, last_modified__lt=timezone.now() - cls.stale_after,
+        )
+
+    @classmethod
+    def can_resume(cls, job):
+        """Whether the job stopped (failed, or its worker died) before the end of its file."""
+        return ProductImportJob.objects.filter(
+            cls.get_claimable_filter(), pk=job.pk,
+        ).exclude(status=ProductImportStatus.PENDING).exists()
+
+    @contextmanager
+    def open_records(self):
+        with self.job.file.open('rb') as file:
+            stream = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            try:
+                yield READERS[self.job.file_format](stream)
+            finally:
+                stream.detach()  # The file is closed by the storage
+
+    def claim(self):
+        """Marks the job running, returns False if it is already being (or was) imported."""
+        claimable = ProductImportJob.objects.filter(self.get_claimable_filter(), pk=self.job.pk)
+        now = timezone.now()
+        if not claimable.update(status=ProductImportStatus.RUNNING, started_at=now, last_modified=now):
+            return False
+        self.job.refresh_from_db()
+        return True
+
+    def run(self):
+        """Imports the file from the job's checkpoint on. Returns the job, or None if it couldn't be claimed."""
+        if not self.claim():
+            return None
+
+        job = self.job
+        try:
+            if job.total_records is None:
+                with self.open_records() as records:
+                    job.total_records = sum(1 for _ in records)
+                job.save(update_fields=['total_records', 'last_modified'])
+
+            with self.open_records() as records:
+                records = islice(records, job.processed_records, None)
+                while True:
+                    batch = list(islice(records, self.batch_size))
+                    if not batch:
+                        break
+                    self.import_batch(batch)
+        except Exception as error:
+            job.status = ProductImportStatus.FAILED
+            job.errors = (job.errors + [{'record': job.processed_records, 'errors': f"Import stopped: {error}"}])[:job.MAX_ERRORS + 1]
+            job.save(update_fields=['status', 'errors', 'last_modified'])
+            raise
+
+        job.status = ProductImportStatus.COMPLETED
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at', 'last_modified'])
+        return job
+
+    @transaction.atomic
+    def import_batch(self, batch):
+        job = self.job
+        first_index = job.processed_records
+        errors = []
+
+        valid = []
+        for index, (record, error) in enumerate(batch, start=first_index):
+            if error:
+                errors.append({'record': index, 'errors': error})
+                continue
+            serializer = ProductImportSerializer(data=record)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'record': index, 'errors': serializer.errors})
+
+        products, variants, memberships = self.build_rows(valid, errors)
+        if products:
+            self.save_rows(products, variants, memberships)
+
+        job.processed_records += len(batch)
+        job.created_products += len(products)
+        job.created_variants += len(variants)
+        job.failed_records += len(errors)
+        job.errors = (job.errors + errors)[:job.MAX_ERRORS]
+        job.save(update_fields=[
+            'processed_records', 'created_products', 'created_variants', 'failed_records', 'errors', 'last_modified',
+        ])
+
+    def build_rows(self, valid, errors):
+        """
+        Resolves the names and checks the SKUs of the valid records, with one query per kind, and builds
+        their unsaved products, variants (by product) and collection ids (by product).
+        """
+        categories = self.get_ids_by_name(Category, {data.get('category') for _, data in valid})
+        suppliers = self.get_ids_by_name(Supplier, {data.get('supplier') for _, data in valid})
+        collections = self.get_ids_by_name(Collection, {name for _, data in valid for name in data['collections']})
+        skus = [variant['sku'] for _, data in valid for variant in data['variants']]
+        taken_skus = set(ProductVariant.objects.filter(sku__in=skus).values_list('sku', flat=True))
+
+        accepted = []
+        for index, data in valid:
+            record_errors = {}
+            if data.get('category') and data['category'] not in categories:
+                record_errors['category'] = f"Unknown category {data['category']!r}."
+            if data.get('supplier') and data['supplier'] not in suppliers:
+                record_errors['supplier'] = f"Unknown supplier {data['supplier']!r}."
+            unknown_collections = [name for name in data['collections'] if name not in collections]
+            if unknown_collections:
+                record_errors['collections'] = f"Unknown collections {unknown_collections}."
+            record_skus = [variant['sku'] for variant in data['variants']]
+            duplicate_skus = [sku for sku in record_skus if sku in taken_skus or record_skus.count(sku) > 1]
+            if duplicate_skus:
+                record_errors['variants'] = f"SKUs already used: {sorted(set(duplicate_skus))}."
+
+            if record_errors:
+                errors.append({'record': index, 'errors': record_errors})
+                continue
+            taken_skus.update(record_skus)  # Later records of the batch can't reuse them
+            accepted.append((index, data))
+
+        slugs = allocate_slugs([data.get('slug') or slugify(data['name']) or 'product' for _, data in accepted])
+        products, variants, memberships = [], [], []
+        for (index, data), slug in zip(accepted, slugs):
+            product = Product(
+                name=data['name'],
+                slug=slug,
+                summary=data['summary'],
+                description=data['description'],
+                brand=data.get('brand'),
+                type=data['type'],
+                is_live=data['is_live'],
+                published_date=timezone.now() if data['is_live'] else None,
+                category_id=categories.get(data.get('category')),
+                supplier_id=suppliers.get(data.get('supplier')),
+                created_by=self.job.created_by,
+            )
+            product_variants = [ProductVariant(product=product, **variant) for variant in data['variants']]
+            try:
+                for variant in product_variants:
+                    variant.validate_amount()  # bulk_create() bypasses save()
+            except DjangoValidationError as error:
+                errors.append({'record': index, 'errors': {'variants': error.messages}})
+                continue
+            products.append(product)
+            variants.extend(product_variants)
+            memberships.append([collections[name] for name in data['collections']])
+        return products, variants, memberships
+
+    @staticmethod
+    def get_ids_by_name(model, names):
+        names = {name for name in names if name}
+        if not names:
+            return {}
+        return dict(model.objects.filter(name__in=names).values_list('name', 'id'))
+
+    def save_rows(self, products, variants, memberships):
+        with keep_preset_slugs(Product):
+            Product.objects.bulk_create(products)
+        ProductVariant.objects.bulk_create(variants)  # Their product ids are taken from the saved products
+
+        default_variants = {}
+        for variant in variants:
+            default_variants.setdefault(variant.product_id, variant)
+        for product in products:
+            product.default_variant = default_variants[product.pk]
+        Product.objects.bulk_update(products, ['default_variant'])
+
+        Product.collections.through.objects.bulk_create([
+            Product.collections.through(product_id=product.pk, collection_id=collection_id)
+            for product, collection_ids in zip(products, memberships)
+            for collection_id in collection_ids
+        ])
+
+        # bulk_create() sends no signal, bring the read models and caches up to date as nxtbn.product.signals would
+        product_ids = [product.pk for product in products]
+        refresh_product_listings(product_ids)
+        mark_sitemap_shards_stale('product', product_ids)
+        get_search_backend().index_products(Product.objects.filter(pk__in=product_ids))
+        ProductFacets.invalidate()
+        transaction.on_commit(lambda: bump_watermarks('product'))
@@ -0,0 +1,61 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from nxtbn.product import ProductImportFormat, ProductImportStatus
+from nxtbn.product.importer import ProductImporter
+from nxtbn.product.models import ProductImportJob
+
+
+class Command(BaseCommand):
+    help = 'Imports products (with variants) from a CSV or JSONL file, in the layout of the product export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='File to import')
+        parser.add_argument('--format', dest='file_format', choices=ProductImportFormat.values, help='File format, guessed from the extension by default')
+        parser.add_argument('--batch-size', type=int, default=ProductImporter.batch_size, help='Number of products inserted per transaction')
+        parser.add_argument('--user', help='Email of the staff member creating the products, the first superuser by default')
+        parser.add_argument('--resume', type=int, metavar='JOB_ID', help='Resume a failed or interrupted import job instead')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            job = ProductImportJob.objects.filter(pk=options['resume']).first()
+            if job is None or not ProductImporter.can_resume(job):
+                raise CommandError(f"No failed or interrupted import job {options['resume']}.")
+        elif options['path']:
+            job = self.create_job(options)
+        else:
+            raise CommandError('Give the file to import, or --resume an import job.')
+
+        try:
+            job = ProductImporter(job, batch_size=options['batch_size']).run()
+        except Exception as error:
+            raise CommandError(f"Import stopped, resume it with --resume {options['resume'] or job.pk}: {error}")
+        if job is None:
+            raise CommandError('The import job is already running.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported {job.created_products} products and {job.created_variants} variants '
+            f'(job {job.pk}), {job.failed_records} records failed.'
+        ))
+        for error in job.errors[:20]:
+            self.stdout.write(f"Record {error['record']}: {error['errors']}")
+
+    def create_job(self, options):
+        path = options['path']
+        file_format = options['file_format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in ProductImportFormat.values:
+            raise CommandError(f"Unknown file format {file_format!r}, use --format.")
+
+        users = get_user_model().objects.all()
+        user = users.filter(email=options['user']).first() if options['user'] else users.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('No such user.' if options['user'] else 'A superuser is needed to own the imported products.')
+
+        job = ProductImportJob(created_by=user, file_format=file_format, status=ProductImportStatus.PENDING)
+        with open(path, 'rb') as file:
+            job.file.save(os.path.basename(path), File(file), save=False)
+        job.save()
+        return job
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from nxtbn.product.utils import ProductListingProjection
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the ProductListing read model of the storefront product list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of products synced per query')
+
+    def handle(self, *args, **options):
+        synced = ProductListingProjection.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt {synced} product listings.'))
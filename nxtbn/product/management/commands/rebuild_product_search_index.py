@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from nxtbn.product.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the product full-text search index from scratch'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding product search index with {backend.__class__.__name__}...')
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS('Product search index rebuilt successfully.'))
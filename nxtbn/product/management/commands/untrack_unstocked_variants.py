@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from nxtbn.core.cache import bump_watermarks
+from nxtbn.product.models import Product, ProductVariant
+from nxtbn.product.utils import refresh_product_listings
+
+
+class Command(BaseCommand):
+    help = (
+        'Stops tracking the inventory of the variants with no stock, so they can be ordered again. '
+        'Orders take stock since stock reservations, a catalog that never maintained stock can run this once '
+        'on upgrade. Sold out variants become orderable too, only run it if stock was never kept up to date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the variants that would be changed')
+
+    def handle(self, *args, **options):
+        variants = ProductVariant.objects.filter(track_inventory=True, stock__lte=0)
+        if options['dry_run']:
+            for sku in variants.order_by('sku').values_list('sku', flat=True).iterator():
+                self.stdout.write(sku)
+            self.stdout.write(self.style.SUCCESS(f'{variants.count()} variants would stop tracking their inventory.'))
+            return
+
+        with transaction.atomic():
+            products = list(
+                Product.objects.filter(variants__in=variants).distinct().values_list('pk', 'slug')
+            )
+            updated = variants.update(track_inventory=False)
+            # update() sends no signal
+            refresh_product_listings([pk for pk, _ in products])
+            transaction.on_commit(lambda: bump_watermarks('product', *[f"product_{slug}" for _, slug in products]))
+        self.stdout.write(self.style.SUCCESS(f'Successfully stopped tracking the inventory of {updated} variants.'))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+
+def backfill_category_paths(apps, schema_editor):
+    Category = apps.get_model('product', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def build_path(category_id):
+        if category_id not in paths:
+            parent_id = parents[category_id]
+            parent_path = build_path(parent_id) if parent_id else ''
+            paths[category_id] = f"{parent_path}{category_id}/"
+        return paths[category_id]
+
+    categories = []
+    for category_id in parents:
+        categories.append(Category(id=category_id, path=build_path(category_id)))
+    Category.objects.bulk_update(categories, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_remove_product_media_product_images_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS product_search_vector_gin ON product_product USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS product_name_trgm_gin ON product_product USING gin (name gin_trgm_ops)",
+    """
+    UPDATE product_product AS p SET search_vector =
+        setweight(to_tsvector(coalesce(p.name, '')), 'A')
+        || setweight(to_tsvector(coalesce(p.brand, '')), 'B')
+        || setweight(to_tsvector(coalesce((SELECT c.name FROM product_category AS c WHERE c.id = p.category_id), '')), 'B')
+        || setweight(to_tsvector(coalesce(p.summary, '')), 'B')
+        || setweight(to_tsvector(coalesce(p.description, '')), 'C')
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS product_name_trgm_gin",
+    "DROP INDEX IF EXISTS product_search_vector_gin",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS product_product_fts USING fts5(
+        name, brand, category_name, summary, description, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO product_product_fts (rowid, name, brand, category_name, summary, description)
+    SELECT p.id, p.name, coalesce(p.brand, ''), coalesce(c.name, ''), p.summary, p.description
+    FROM product_product AS p LEFT JOIN product_category AS c ON c.id = p.category_id
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS product_product_fts",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_statements({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_statements({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
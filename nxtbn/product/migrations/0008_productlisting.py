@@ -0,0 +1,51 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_stale_listings(apps, schema_editor):
+    """
+    Existing products get a stale placeholder row, the storefront keeps reading the normalized
+    models until `rebuild_product_listings` (or the periodic sync task) fills them in.
+    """
+    Product = apps.get_model('product', 'Product')
+    ProductListing = apps.get_model('product', 'ProductListing')
+    ProductListing.objects.bulk_create(
+        [ProductListing(product_id=product_id, is_stale=True) for product_id in Product.objects.values_list('id', flat=True)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0007_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='product.product')),
+                ('name', models.CharField(db_index=True, default='', max_length=255)),
+                ('slug', models.CharField(default='', max_length=255)),
+                ('summary', models.TextField(default='')),
+                ('description', models.TextField(default='')),
+                ('brand', models.CharField(blank=True, max_length=100, null=True)),
+                ('type', models.CharField(choices=[('SIMPLE_PRODUCT', 'Simple Product'), ('GROUPED_PRODUCT', 'Grouped Product'), ('EXTERNAL_PRODUCT', 'External/Affiliate Product'), ('VARIABLE_PRODUCT', 'Variable Product'), ('SIMPLE_SUBSCRIPTION', 'Simple Subscription'), ('VARIABLE_SUBSCRIPTION', 'Variable Subscription'), ('PRODUCT_BUNDLE', 'Product Bundle')], default='SIMPLE_PRODUCT', max_length=25)),
+                ('category_name', models.CharField(blank=True, default='', max_length=255)),
+                ('price', models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True)),
+                ('stock', models.IntegerField(blank=True, null=True)),
+                ('default_variant', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('is_stale', models.BooleanField(db_index=True, default=False)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='product.category')),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.RunPython(create_stale_listings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('product', '0008_productlisting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('file', models.FileField(upload_to='product_imports/')),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], max_length=5)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('total_records', models.PositiveIntegerField(blank=True, null=True)),
+                ('processed_records', models.PositiveIntegerField(default=0)),
+                ('created_products', models.PositiveIntegerField(default=0)),
+                ('created_variants', models.PositiveIntegerField(default=0)),
+                ('failed_records', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list, help_text='The first MAX_ERRORS record errors.')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
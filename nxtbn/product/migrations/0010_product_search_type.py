@@ -0,0 +1,66 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    UPDATE product_product AS p SET search_vector =
+        setweight(to_tsvector(coalesce(p.name, '')), 'A')
+        || setweight(to_tsvector(coalesce(p.brand, '')), 'B')
+        || setweight(to_tsvector(coalesce((SELECT c.name FROM product_category AS c WHERE c.id = p.category_id), '')), 'B')
+        || setweight(to_tsvector(coalesce(p.summary, '')), 'B')
+        || setweight(to_tsvector(coalesce(p.description, '')), 'C')
+        || setweight(to_tsvector(coalesce(p.type, '')), 'D')
+    """,
+]
+
+SQLITE_FORWARD = [
+    "DROP TABLE IF EXISTS product_product_fts",
+    """
+    CREATE VIRTUAL TABLE product_product_fts USING fts5(
+        name, brand, category_name, summary, description, type, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO product_product_fts (rowid, name, brand, category_name, summary, description, type)
+    SELECT p.id, p.name, coalesce(p.brand, ''), coalesce(c.name, ''), p.summary, p.description, p.type
+    FROM product_product AS p LEFT JOIN product_category AS c ON c.id = p.category_id
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS product_product_fts",
+    """
+    CREATE VIRTUAL TABLE product_product_fts USING fts5(
+        name, brand, category_name, summary, description, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO product_product_fts (rowid, name, brand, category_name, summary, description)
+    SELECT p.id, p.name, coalesce(p.brand, ''), coalesce(c.name, ''), p.summary, p.description
+    FROM product_product AS p LEFT JOIN product_category AS c ON c.id = p.category_id
+    """,
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """The product type is searched again, as it was before the full-text backends."""
+
+    dependencies = [
+        ('product', '0009_productimportjob'),
+    ]
+
+    operations = [
+        # The PostgreSQL vectors are recomputed the next time products are indexed either way, no need to undo them
+        migrations.RunPython(
+            run_statements({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_statements({'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
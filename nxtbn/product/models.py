@@ -1,9 +1,13 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 
 
 
@@ -11,7 +15,7 @@ from nxtbn.core import CurrencyTypes, MoneyFieldTypes
 from nxtbn.core.mixin import MonetaryMixin
 from nxtbn.core.models import AbstractMetadata, AbstractSEOModel, PublishableModel, AbstractBaseUUIDModel, AbstractBaseModel, NameDescriptionAbstract
 from nxtbn.filemanager.models import Document, Image
-from nxtbn.product import ProductType, StockStatus, WeightUnits
+from nxtbn.product import ProductImportFormat, ProductImportStatus, ProductType, StockStatus, WeightUnits
 from nxtbn.users.admin import User
 
 class Supplier(NameDescriptionAbstract, AbstractSEOModel):
@@ -29,6 +33,9 @@ class Color(AbstractBaseModel):
         verbose_name_plural = _("Colors")
 
 class Category(NameDescriptionAbstract, AbstractSEOModel):
+    MAX_DEPTH = 2
+    PATH_SEPARATOR = '/'
+
     parent = models.ForeignKey(
         'self',
         null=True,
@@ -36,16 +43,27 @@ class Category(NameDescriptionAbstract, AbstractSEOModel):
         on_delete=models.SET_NULL,
         related_name='subcategories'
     )
+    # Materialized path of primary keys from the root down to this category, e.g. "1/5/12/".
+    # Maintained on save, it turns ancestry and subtree lookups into a single indexed query.
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
 
     def get_family_tree(self):
-        family_tree = []
-        current = self
-        depth = 0
-        while current is not None:
-            family_tree.insert(0, {'depth': depth, 'name': current.name})
-            current = current.parent
-            depth += 1
-        return family_tree
+        ancestor_ids = self._get_path_ids()
+        names = dict(Category.objects.filter(pk__in=ancestor_ids[:-1]).values_list('id', 'name'))
+        names[ancestor_ids[-1]] = self.name
+
+        depth = len(ancestor_ids) - 1
+        return [
+            {'depth': depth - index, 'name': names[pk]}
+            for index, pk in enumerate(ancestor_ids)
+        ]
+
+    def get_descendants(self, include_self=True):
+        """Return every category in this subtree with one indexed prefix lookup."""
+        descendants = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            descendants = descendants.exclude(pk=self.pk)
+        return descendants
 
     class Meta:
         verbose_name = _("Category")
@@ -56,21 +74,54 @@ class Category(NameDescriptionAbstract, AbstractSEOModel):
 
     def clean(self):
         """Validate that category depth does not exceed 2 levels."""
-        if self._get_depth() > 2:
+        if self._get_depth() > self.MAX_DEPTH:
             raise ValidationError("Category depth must not exceed 2 levels.")
 
+        if self.pk and self.path and self.parent_id:
+            if self.parent.path.startswith(self.path):
+                raise ValidationError("A category can't be moved under itself or one of its subcategories.")
+
+            # Moving a category moves its whole subtree, the deepest descendant must still fit.
+            subtree_height = max(
+                path.count(self.PATH_SEPARATOR) - self.path.count(self.PATH_SEPARATOR)
+                for path in self.get_descendants().values_list('path', flat=True)
+            )
+            if self._get_depth() + subtree_height > self.MAX_DEPTH:
+                raise ValidationError("Category depth must not exceed 2 levels.")
+
+    def _get_parent_path(self):
+        return self.parent.path if self.parent_id else ''
+
+    def _get_path_ids(self):
+        """Primary keys from the root down to this category."""
+        parent_path = self._get_parent_path()
+        return [int(pk) for pk in parent_path.split(self.PATH_SEPARATOR) if pk] + [self.pk]
+
     def _get_depth(self):
-        """Recursively determine the depth of the category."""
-        depth = 0
-        current = self
-        while current.parent:
-            depth += 1
-            current = current.parent
-        return depth
+        """Determine the depth of the category from its parent's stored path."""
+        return self._get_parent_path().count(self.PATH_SEPARATOR)
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        old_path = self.path
+
+        with transaction.atomic():
+            if self.pk is None:
+                super().save(*args, **kwargs)
+                self.path = self._get_parent_path() + f"{self.pk}{self.PATH_SEPARATOR}"
+                Category.objects.filter(pk=self.pk).update(path=self.path)
+                return
+
+            self.path = self._get_parent_path() + f"{self.pk}{self.PATH_SEPARATOR}"
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'path'}
+            super().save(*args, **kwargs)
+
+            if old_path and old_path != self.path:
+                # Re-root every descendant under the new path in one statement.
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(self.path), Substr('path', len(old_path) + 1))
+                )
 
 class Collection(NameDescriptionAbstract, AbstractSEOModel):
     created_by = models.ForeignKey(
@@ -121,6 +172,8 @@ class Product(PublishableModel, AbstractMetadata, AbstractSEOModel):
         related_name='+'
     )
     collections = models.ManyToManyField(Collection, blank=True, related_name='products_in_collection')
+    # Maintained by nxtbn.product.search.PostgresSearchBackend, stays empty on other databases
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ('name',)
@@ -197,3 +250,74 @@ class ProductVariant(MonetaryMixin, AbstractMetadata, models.Model):
     def __str__(self):
         variant_name = self.name if self.name else 'Default'
         return f"{self.product.name} - {variant_name} (SKU: {self.sku})"
+
+
+class ProductListing(models.Model):
+    """
+    Read model of a storefront product card, one row per product.
+
+    Flattens the product, its default variant (price, stock and the serialized variant) and its category
+    name so the storefront product list is served from a single table. Rows are kept in sync from signals
+    (see `nxtbn.product.signals`), either inline or through Celery when `PRODUCT_LISTING_ASYNC_SYNC` is on,
+    in which case rows are flagged `is_stale` until the worker refreshes them.
+    """
+    product = models.OneToOneField(Product, primary_key=True, on_delete=models.CASCADE, related_name='listing')
+    name = models.CharField(max_length=255, db_index=True, default='')
+    slug = models.CharField(max_length=255, default='')
+    summary = models.TextField(default='')
+    description = models.TextField(default='')
+    brand = models.CharField(max_length=100, blank=True, null=True)
+    type = models.CharField(max_length=25, default=ProductType.SIMPLE_PRODUCT, choices=ProductType.choices)
+    category = models.ForeignKey(Category, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    category_name = models.CharField(max_length=255, blank=True, default='')
+    price = models.DecimalField(max_digits=12, decimal_places=3, null=True, blank=True)
+    stock = models.IntegerField(null=True, blank=True)
+    default_variant = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(null=True, blank=True)
+    is_stale = models.BooleanField(default=False, db_index=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return self.name
+
+
+class ProductImportJob(AbstractBaseModel):
+    """
+    A bulk import of products and variants from a CSV or JSONL file, see `nxtbn.product.importer`.
+
+    `processed_records` is the checkpoint: it is saved in the same transaction as each imported
+    batch, so an interrupted import resumes right after the last committed batch.
+    """
+    MAX_ERRORS = 1000
+
+    created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='+')
+    file = models.FileField(upload_to='product_imports/')
+    file_format = models.CharField(max_length=5, choices=ProductImportFormat.choices)
+    status = models.CharField(max_length=10, choices=ProductImportStatus.choices, default=ProductImportStatus.PENDING)
+
+    total_records = models.PositiveIntegerField(null=True, blank=True)
+    processed_records = models.PositiveIntegerField(default=0)
+    created_products = models.PositiveIntegerField(default=0)
+    created_variants = models.PositiveIntegerField(default=0)
+    failed_records = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="The first MAX_ERRORS record errors.")
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('-created_at',)
+
+    def __str__(self):
+        return f"Product import {self.pk} ({self.status}): {self.processed_records}/{self.total_records or '?'}"
+
+    @property
+    def progress(self):
+        """Share of the records processed, between 0 and 1, None until they are counted."""
+        if not self.total_records:
+            return 1.0 if self.total_records == 0 else None
+        return min(self.processed_records / self.total_records, 1.0)
+
@@ -0,0 +1,180 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters as drf_filters
+
+from nxtbn.product.models import Category, Product
+
+
+class BaseProductSearchBackend:
+    """
+    Interface of a product search backend.
+
+    A backend ranks products for a free text query and keeps its index up to date incrementally:
+    `nxtbn.product.signals` calls `index_products` / `remove_products` as products and categories change.
+    """
+    def search(self, queryset, query):
+        """Filter the queryset down to products matching the query, best matches first."""
+        raise NotImplementedError
+
+    def index_products(self, queryset):
+        """(Re)index the products of the given queryset."""
+        pass
+
+    def remove_products(self, product_ids):
+        """Drop the given products from the index."""
+        pass
+
+    def rebuild(self):
+        """Reindex the whole catalog."""
+        self.index_products(Product.objects.all())
+
+
+class DatabaseSearchBackend(BaseProductSearchBackend):
+    """
+    Fallback without a full-text index: every term must appear (icontains) in one of the searched fields.
+    """
+    search_fields = ('name', 'summary', 'description', 'brand', 'category__name', 'type')
+
+    def search(self, queryset, query):
+        for term in query.split():
+            conditions = Q()
+            for field in self.search_fields:
+                conditions |= Q(**{f"{field}__icontains": term})
+            queryset = queryset.filter(conditions)
+        return queryset.distinct()
+
+
+class PostgresSearchBackend(BaseProductSearchBackend):
+    """
+    Full-text search on PostgreSQL over the `Product.search_vector` tsvector column (GIN indexed).
+    Falls back to trigram similarity on the product name (pg_trgm) when nothing matches, which
+    catches typos.
+    """
+    trigram_threshold = 0.2
+
+    def get_search_vector(self):
+        category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+        return (
+            SearchVector('name', weight='A')
+            + SearchVector('brand', weight='B')
+            + SearchVector(category_name, weight='B')
+            + SearchVector('summary', weight='B')
+            + SearchVector('description', weight='C')
+            + SearchVector('type', weight='D')
+        )
+
+    def search(self, queryset, query):
+        search_query = SearchQuery(query, search_type='websearch')
+        matches = queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank')
+        if matches.exists():
+            return matches
+
+        return queryset.annotate(
+            search_rank=TrigramSimilarity('name', query)
+        ).filter(search_rank__gt=self.trigram_threshold).order_by('-search_rank')
+
+    def index_products(self, queryset):
+        queryset.order_by().update(search_vector=self.get_search_vector())
+
+
+class SQLiteSearchBackend(BaseProductSearchBackend):
+    """
+    Full-text search on SQLite through the `product_product_fts` FTS5 table, ranked with bm25.
+    Used for tests and small local setups.
+    """
+    table = 'product_product_fts'
+    # bm25 weights of the columns: name, brand, category_name, summary, description, type
+    rank_weights = (10.0, 5.0, 5.0, 2.0, 1.0, 0.5)
+
+    def get_match_expression(self, query):
+        # Quote every term so user input can't break the FTS5 query syntax, and match prefixes
+        terms = re.findall(r'\w+', query)
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def search(self, queryset, query):
+        match = self.get_match_expression(query)
+        if not match:
+            return queryset.none()
+
+        weights = ', '.join(str(weight) for weight in self.rank_weights)
+        product_table = Product._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT bm25({self.table}, {weights}) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND rowid = {product_table}.id",
+                [match],
+            )
+        ).order_by('search_rank')  # bm25 is lower for better matches
+
+    def index_products(self, queryset):
+        rows = list(queryset.order_by().values_list(
+            'id', 'name', 'brand', 'category__name', 'summary', 'description', 'type'
+        ))
+        if not rows:
+            return
+
+        with connection.cursor() as cursor:
+            self._delete(cursor, [row[0] for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, name, brand, category_name, summary, description, type) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                [
+                    (pk, name, brand or '', category_name or '', summary, description, product_type)
+                    for pk, name, brand, category_name, summary, description, product_type in rows
+                ],
+            )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            self._delete(cursor, product_ids)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        super().rebuild()
+
+    def _delete(self, cursor, product_ids):
+        product_ids = list(product_ids)
+        if product_ids:
+            placeholders = ', '.join(['%s'] * len(product_ids))
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", product_ids)
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """
+    Return the product search backend: `settings.PRODUCT_SEARCH_BACKEND` when set (a dotted path),
+    otherwise the native full-text backend of the database in use.
+    """
+    backend_path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', '')
+    if backend_path:
+        return import_string(backend_path)()
+
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    return DatabaseSearchBackend()
+
+
+class ProductSearchFilter(drf_filters.SearchFilter):
+    """
+    Drop-in replacement of DRF's `SearchFilter` (same `search` query param) that delegates
+    to the configured search backend instead of `icontains` lookups on `search_fields`.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_backend().search(queryset, ' '.join(terms))
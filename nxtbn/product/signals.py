@@ -0,0 +1,146 @@
+from django.db.models import QuerySet
+from django.db.models.functions import Substr
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from nxtbn.core.cache import bump_watermarks
+from nxtbn.filemanager.models import Image
+from nxtbn.product.models import Category, Collection, Product, ProductListing, ProductVariant, Supplier
+from nxtbn.product.search import get_search_backend
+from nxtbn.product.utils import CategoryTreeCache, ProductFacets, refresh_product_listings
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    CategoryTreeCache.invalidate()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+@receiver(m2m_changed, sender=Product.collections.through)
+def invalidate_product_facets(sender, **kwargs):
+    ProductFacets.invalidate()
+
+
+@receiver(post_delete, sender=Category)
+def reroot_orphaned_subcategories(sender, instance, **kwargs):
+    """
+    Children of a deleted category become top-level (`on_delete=SET_NULL`),
+    strip the deleted category's path from their subtree so stored paths stay correct.
+    """
+    if instance.path:
+        Category.objects.filter(path__startswith=instance.path).update(
+            path=Substr('path', len(instance.path) + 1)
+        )
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index_products(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, **kwargs):
+    get_search_backend().remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created=False, raw=False, **kwargs):
+    """The category name is part of the indexed product text."""
+    if not created and not raw:
+        get_search_backend().index_products(Product.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_listing(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_product_listings([instance.pk])
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def refresh_variant_product_listing(sender, instance, raw=False, origin=None, **kwargs):
+    # Variants deleted along with their product would bring its just deleted listing back
+    if not raw and not is_product_deletion(origin):
+        refresh_product_listings([instance.product_id])
+
+
+def is_product_deletion(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Product
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_product_listings(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        refresh_product_listings(Product.objects.filter(category=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def clear_deleted_category_name(sender, instance, **kwargs):
+    # The listings' category was set to NULL along with the products', only the copied name is left over
+    ProductListing.objects.filter(category__isnull=True).exclude(category_name='').update(category_name='')
+
+
+@receiver(post_save, sender=Image)
+def refresh_image_product_listings(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        refresh_product_listings(
+            Product.objects.filter(default_variant__variant_image=instance).values_list('pk', flat=True)
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_product_watermarks(sender, instance, **kwargs):
+    bump_watermarks('product', f"product_{instance.slug}")
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def bump_variant_product_watermarks(sender, instance, **kwargs):
+    slug = Product.objects.filter(pk=instance.product_id).values_list('slug', flat=True).first()
+    bump_watermarks('product', f"product_{slug}")
+
+
+@receiver(m2m_changed, sender=Product.collections.through)
+def bump_product_collections_watermarks(sender, **kwargs):
+    """
+    Can't cheaply be traced back to single products (e.g. a cleared collection), so this outdates
+    the product lists and, through the collection scope, every product page. Same for images below.
+    """
+    bump_watermarks('product', 'collection')
+
+
+@receiver(m2m_changed, sender=Product.images.through)
+@receiver(post_save, sender=Image)
+def bump_product_media_watermarks(sender, **kwargs):
+    bump_watermarks('product', 'media')
+
+
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+def bump_supplier_watermark(sender, instance, **kwargs):
+    bump_watermarks('supplier')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_watermark(sender, instance, **kwargs):
+    bump_watermarks('category')
+
+
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+def bump_collection_watermark(sender, instance, **kwargs):
+    bump_watermarks('collection')
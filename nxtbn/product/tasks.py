@@ -0,0 +1,28 @@
+from celery import shared_task
+
+from nxtbn.product.importer import ProductImporter
+from nxtbn.product.models import ProductImportJob
+from nxtbn.product.utils import ProductListingProjection
+
+
+@shared_task
+def sync_product_listings(product_ids):
+    """Refresh the `ProductListing` rows of the given products, queued by `nxtbn.product.signals`."""
+    return ProductListingProjection.sync(product_ids)
+
+
+@shared_task
+def sync_stale_product_listings():
+    """
+    Periodic task (see `CELERY_BEAT_SCHEDULE`) catching up on listings left stale,
+    e.g. by a lost queued task or right after the listing table was created.
+    """
+    return ProductListingProjection.sync_stale()
+
+
+@shared_task
+def import_products(job_id):
+    """Import (or resume) a `ProductImportJob`, queued by the dashboard import API."""
+    job = ProductImportJob.objects.get(pk=job_id)
+    ProductImporter(job).run()
+    return job_id
@@ -1,3 +1,606 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from nxtbn.core.currency.abstract_base_currency import CurrencyBackend
+from nxtbn.core.tests import StaticCurrencyBackend
+from nxtbn.filemanager.models import Image
+from nxtbn.home.base_tests import BaseTestCase
+from nxtbn.product import ProductImportStatus, ProductType
+from nxtbn.product.api.dashboard.serializers import RecursiveCategorySerializer
+from nxtbn.product.importer import ProductImporter
+from nxtbn.product.models import Category, Collection, Product, ProductImportJob, ProductListing, ProductVariant
+from nxtbn.product.utils import CategoryTreeCache, ProductFacets, ProductListingProjection
+
+
+class ProductQueryCountTest(BaseTestCase):
+    """
+    Every product endpoint must cost a fixed number of queries, no matter how many
+    rows end up on the page.
+    """
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name="Shoes")
+        self.collection = Collection.objects.create(name="Summer Collection")
+        self.image = Image.objects.create(
+            created_by=self.user,
+            name="shoe",
+            image="shoe.jpg",
+            image_alt_text="shoe",
+        )
+        self.product_count = 0
+
+    def create_products(self, count):
+        for _ in range(count):
+            self.product_count += 1
+            product = Product.objects.create(
+                name=f"Product {self.product_count}",
+                summary="summary",
+                description="description",
+                category=self.category,
+                created_by=self.user,
+            )
+            product.collections.add(self.collection)
+            product.images.add(self.image)
+            product.related_to.add(product)
+
+            for index in range(3):
+                variant = ProductVariant.objects.create(
+                    product=product,
+                    name=f"Variant {index}",
+                    price=Decimal("10.00"),
+                    cost_per_unit=Decimal("5.00"),
+                    compare_at_price=Decimal("15.00"),
+                    sku=f"SKU-{self.product_count}-{index}",
+                    variant_image=self.image,
+                )
+            product.default_variant = variant
+            product.save()
+        return product
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertSuccess(response)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url, expected):
+        self.create_products(2)
+        small_page = self.count_queries(url)
+
+        self.create_products(15)
+        large_page = self.count_queries(url)
+
+        self.assertEqual(small_page, large_page)
+        self.assertEqual(large_page, expected)
+
+    def test_storefront_product_list(self):
+        # stale listings check + count + listing rows
+        self.assertConstantQueries('/product/storefront/api/products/', 3)
+
+    def test_storefront_product_list_fallback(self):
+        # Search isn't answered by the listing projection:
+        # count + products joined with default variant and its image
+        self.assertConstantQueries('/product/storefront/api/products/?search=product', 2)
+
+    def test_storefront_product_detail(self):
+        product = self.create_products(1)
+        url = f'/product/storefront/api/products/{product.slug}/'
+
+        # product joined with default variant, then variants, collections, images
+        self.assertEqual(self.count_queries(url), 4)
+
+        product.variants.create(
+            name="Extra",
+            price=Decimal("12.00"),
+            cost_per_unit=Decimal("6.00"),
+            compare_at_price=Decimal("18.00"),
+            sku="SKU-EXTRA",
+            variant_image=self.image,
+        )
+        self.assertEqual(self.count_queries(url), 4)
+
+    def test_dashboard_product_list_cursor_pagination(self):
+        caches['generic'].clear()
+        self.client.force_authenticate(self.user)
+        self.create_products(25)
+        url = '/product/dashboard/api/products/?pagination=cursor'
+
+        response = self.client.get(url)
+        self.assertSuccess(response)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNone(response.data['current_page'])
+
+        # The estimated count is cached, later pages only fetch rows and relations
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(response.data['next_page_url'])
+        self.assertSuccess(response)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next_page_url'])
+        self.assertEqual(len(context.captured_queries), 5)
+        self.client.force_authenticate(None)
+
+    def test_dashboard_product_list(self):
+        self.client.force_authenticate(self.user)
+        # count + products, then variants, images, related products, collections
+        self.assertConstantQueries('/product/dashboard/api/products/', 6)
+        self.client.force_authenticate(None)
+
+
+class CategoryTreeCacheTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        caches[CategoryTreeCache.cache_backend].clear()
+        fashion = Category.objects.create(name="Fashion")
+        shoes = Category.objects.create(name="Shoes", parent=fashion)
+        Category.objects.create(name="Sneakers", parent=shoes)
+        Category.objects.create(name="Electronics")
+
+    def test_tree_matches_recursive_serializer(self):
+        top_level = Category.objects.filter(parent=None).order_by('id')
+        expected = RecursiveCategorySerializer(top_level, many=True).data
+
+        with self.assertNumQueries(1):
+            tree = CategoryTreeCache.get_tree()
+        self.assertEqual(tree, expected)
+
+        all_categories = Category.objects.order_by('id')
+        expected = RecursiveCategorySerializer(all_categories, many=True).data
+        with self.assertNumQueries(0):
+            self.assertEqual(CategoryTreeCache.get_tree(top_level_only=False), expected)
+
+    def test_tree_is_invalidated_on_change(self):
+        CategoryTreeCache.get_tree()
+        Category.objects.create(name="Books")
+
+        names = [node['name'] for node in CategoryTreeCache.get_tree()]
+        self.assertIn("Books", names)
+
+        Category.objects.get(name="Books").delete()
+        names = [node['name'] for node in CategoryTreeCache.get_tree()]
+        self.assertNotIn("Books", names)
+
+
+class CategoryPathTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fashion = Category.objects.create(name="Fashion")
+        self.shoes = Category.objects.create(name="Shoes", parent=self.fashion)
+        self.sneakers = Category.objects.create(name="Sneakers", parent=self.shoes)
+        self.sports = Category.objects.create(name="Sports")
+
+    def test_path_and_family_tree(self):
+        self.assertEqual(self.sneakers.path, f"{self.fashion.pk}/{self.shoes.pk}/{self.sneakers.pk}/")
+
+        sneakers = Category.objects.select_related('parent').get(pk=self.sneakers.pk)
+        with self.assertNumQueries(1):
+            family_tree = sneakers.get_family_tree()
+        self.assertEqual(family_tree, [
+            {'depth': 2, 'name': "Fashion"},
+            {'depth': 1, 'name': "Shoes"},
+            {'depth': 0, 'name': "Sneakers"},
+        ])
+
+    def test_depth_limit(self):
+        with self.assertRaises(ValidationError):
+            Category.objects.create(name="Running", parent=self.sneakers)
+
+        # Moving "Shoes" under "Sports" is fine, but not under "Sneakers" (itself a descendant)
+        self.shoes.parent = self.sneakers
+        with self.assertRaises(ValidationError):
+            self.shoes.save()
+
+        self.sports.parent = self.sneakers
+        with self.assertRaises(ValidationError):
+            self.sports.save()
+
+    def test_move_and_delete_rewrite_descendant_paths(self):
+        self.shoes.parent = self.sports
+        self.shoes.save()
+        self.sneakers.refresh_from_db()
+        self.assertEqual(self.sneakers.path, f"{self.sports.pk}/{self.shoes.pk}/{self.sneakers.pk}/")
+        self.assertEqual(
+            set(self.sports.get_descendants()),
+            {self.sports, self.shoes, self.sneakers},
+        )
+
+        self.shoes.delete()
+        self.sneakers.refresh_from_db()
+        self.assertEqual(self.sneakers.path, f"{self.sneakers.pk}/")
+        self.assertIsNone(self.sneakers.parent)
+
+
+class ProductSearchTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoes = Category.objects.create(name="Shoes")
+        self.runner = self.create_product("Trail Runner", "Lightweight running shoe", category=self.shoes)
+        self.boot = self.create_product("Leather Boot", "Made for the trail and the rain")
+        self.create_product("Coffee Mug", "Ceramic, 350ml")
+
+    def create_product(self, name, description, category=None):
+        return Product.objects.create(
+            name=name,
+            summary="summary",
+            description=description,
+            category=category,
+            created_by=self.user,
+        )
+
+    def search(self, query):
+        response = self.client.get('/product/storefront/api/products/', {'search': query})
+        self.assertSuccess(response)
+        return [product['name'] for product in response.data['results']]
+
+    def test_search_ranks_and_tracks_changes(self):
+        # A match on the name ranks above a match in the description
+        self.assertEqual(self.search("trail"), ["Trail Runner", "Leather Boot"])
+        self.assertEqual(self.search("running"), ["Trail Runner"])
+        self.assertEqual(self.search('shoes "'), ["Trail Runner"])
+        self.assertEqual(self.search("tea"), [])
+
+        self.runner.name = "Tea Runner"
+        self.runner.save()
+        self.assertEqual(self.search("tea"), ["Tea Runner"])
+
+        self.shoes.name = "Sneakers"
+        self.shoes.save()
+        self.assertEqual(self.search("sneakers"), ["Tea Runner"])
+
+        self.runner.delete()
+        self.assertEqual(self.search("runner"), [])
+
+        self.boot.type = ProductType.PRODUCT_BUNDLE
+        self.boot.save()
+        self.assertEqual(self.search("bundle"), ["Leather Boot"])
+
+
+class ProductFacetTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        caches[ProductFacets.cache_backend].clear()
+        self.shoes = Category.objects.create(name="Shoes")
+        self.bags = Category.objects.create(name="Bags")
+        self.create_product("Runner", self.shoes, "Acme", [Decimal("20.00"), Decimal("60.00")])
+        self.create_product("Boot", self.shoes, "Acme", [Decimal("120.00")])
+        self.create_product("Tote", self.bags, "Other", [Decimal("30.00")])
+
+    def create_product(self, name, category, brand, prices):
+        product = Product.objects.create(
+            name=name,
+            summary="summary",
+            description="description",
+            category=category,
+            brand=brand,
+            created_by=self.user,
+        )
+        for index, price in enumerate(prices):
+            product.variants.create(
+                price=price,
+                cost_per_unit=price,
+                compare_at_price=price,
+                sku=f"{name}-{index}",
+            )
+        return product
+
+    def get_facets(self, params=None):
+        response = self.client.get('/product/storefront/api/products/facets/', params or {})
+        self.assertSuccess(response)
+        return response.data
+
+    def test_facet_counts(self):
+        data = self.get_facets()
+        self.assertEqual(data['count'], 3)
+        facets = data['facets']
+        self.assertEqual(
+            [(facet['name'], facet['count']) for facet in facets['category']],
+            [("Shoes", 2), ("Bags", 1)],
+        )
+        self.assertEqual(
+            [(facet['value'], facet['count']) for facet in facets['brand']],
+            [("Acme", 2), ("Other", 1)],
+        )
+        price_counts = {facet['min_price']: facet['count'] for facet in facets['price']}
+        self.assertEqual(price_counts['0'], 1)
+        self.assertEqual(price_counts['25'], 1)
+        self.assertEqual(price_counts['50'], 1)
+        self.assertEqual(price_counts['100'], 1)
+        self.assertEqual(price_counts['500'], 0)
+
+        # Facets follow the filters
+        data = self.get_facets({'category': self.shoes.pk, 'min_price': 50})
+        self.assertEqual([product['name'] for product in data['results']], ["Boot", "Runner"])
+        self.assertEqual([facet['count'] for facet in data['facets']['brand']], [2])
+
+    def test_facets_are_cached_until_catalog_changes(self):
+        queryset = Product.objects.filter(brand="Other")
+        with self.assertNumQueries(6):
+            ProductFacets.get_facets(queryset)
+        with self.assertNumQueries(0):
+            ProductFacets.get_facets(queryset)
+
+        self.create_product("Clutch", self.bags, "Other", [Decimal("40.00")])
+        with self.assertNumQueries(6):
+            facets = ProductFacets.get_facets(queryset)
+        self.assertEqual(facets['category'], [{'value': self.bags.pk, 'name': "Bags", 'count': 2}])
+
+
+class ProductListingTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoes = Category.objects.create(name="Shoes")
+        self.image = Image.objects.create(created_by=self.user, name="shoe", image="shoe.jpg", image_alt_text="shoe")
+        self.runner = Product.objects.create(
+            name="Runner", summary="summary", description="description", category=self.shoes, created_by=self.user,
+        )
+        self.runner.default_variant = self.runner.variants.create(
+            price=Decimal("20.00"), cost_per_unit=Decimal("10.00"), compare_at_price=Decimal("25.00"),
+            sku="RUNNER", variant_image=self.image,
+        )
+        self.runner.save()
+        Product.objects.create(name="Gift Card", summary="summary", description="description", created_by=self.user)
+
+    def get_products(self, params=None):
+        response = self.client.get('/product/storefront/api/products/', params or {})
+        self.assertSuccess(response)
+        return response.data['results']
+
+    def test_listing_matches_normalized_models(self):
+        listing = ProductListing.objects.get(product=self.runner)
+        self.assertEqual(listing.category_name, "Shoes")
+        self.assertEqual(listing.price, Decimal("20.000"))
+
+        from_listing = self.get_products({'category': self.shoes.pk})
+        ProductListing.objects.update(is_stale=True)
+        caches['generic'].clear()
+        from_models = self.get_products({'category': self.shoes.pk})
+        self.assertEqual(from_listing, from_models)
+        self.assertEqual(len(from_listing), 1)
+
+    def test_listing_follows_changes(self):
+        variant = self.runner.default_variant
+        variant.price = Decimal("30.00")
+        variant.save()
+        self.shoes.name = "Sneakers"
+        self.shoes.save()
+
+        listing = ProductListing.objects.get(product=self.runner)
+        self.assertEqual(listing.price, Decimal("30.000"))
+        self.assertEqual(listing.category_name, "Sneakers")
+        self.assertEqual(self.get_products()[1]['default_variant']['price'], "30.000")
+
+    @override_settings(PRODUCT_LISTING_ASYNC_SYNC=True)
+    def test_stale_listings_fall_back_until_synced(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            product = Product.objects.create(
+                name="Boot", summary="summary", description="description", created_by=self.user,
+            )
+        self.assertTrue(ProductListing.objects.get(product=product).is_stale)
+        self.assertEqual([item['name'] for item in self.get_products()], ["Boot", "Gift Card", "Runner"])
+
+        ProductListingProjection.sync_stale()
+        self.assertFalse(ProductListingProjection.is_stale())
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual([item['name'] for item in self.get_products()], ["Boot", "Gift Card", "Runner"])
+
+
+class StorefrontResponseCacheTest(BaseTestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        caches['generic'].clear()
+        self.product = Product.objects.create(
+            name="Runner", summary="summary", description="description", created_by=self.user,
+        )
+        self.other = Product.objects.create(
+            name="Boot", summary="summary", description="description", created_by=self.user,
+        )
+        self.url = f'/product/storefront/api/products/{self.product.slug}/'
+
+    def test_anonymous_responses_are_cached_and_revalidated(self):
+        response = self.client.get(self.url)
+        self.assertSuccess(response)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(cached['ETag'], etag)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Another product doesn't outdate this page, changing this one does
+        self.other.name = "Winter Boot"
+        self.other.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.product.name = "Trail Runner"
+        self.product.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], "Trail Runner")
+
+    @override_settings(IS_MULTI_CURRENCY=True, ALLOWED_CURRENCIES=['USD', 'EUR'])
+    def test_rate_refresh_outdates_converted_responses(self):
+        CurrencyBackend.local_cache.clear()
+        self.addCleanup(CurrencyBackend.local_cache.clear)
+        backend = StaticCurrencyBackend()
+        backend.rates = [{'target_currency': 'EUR', 'exchange_rate': Decimal('0.9000')}]
+        with mock.patch('nxtbn.core.currency.backend.currency_Backend', StaticCurrencyBackend):
+            backend.refresh_rate()
+            etag = self.client.get(self.url, HTTP_ACCEPT_CURRENCY='EUR')['ETag']
+            self.assertEqual(self.client.get(self.url, HTTP_ACCEPT_CURRENCY='EUR', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+            backend.rates = [{'target_currency': 'EUR', 'exchange_rate': Decimal('0.8000')}]
+            backend.refresh_rate()
+            response = self.client.get(self.url, HTTP_ACCEPT_CURRENCY='EUR', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_authenticated_responses_are_not_cached(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertSuccess(response)
+        self.assertGreater(len(context.captured_queries), 0)
+        self.assertNotIn('ETag', response)
+        self.client.force_authenticate(None)
+
+
+class UntrackUnstockedVariantsTest(BaseTestCase):
+    def test_only_unstocked_tracked_variants_are_changed(self):
+        product = Product.objects.create(name="Tee", summary="summary", description="description", created_by=self.user)
+        for sku, stock in (("TEE-S", 0), ("TEE-M", 4)):
+            ProductVariant.objects.create(
+                product=product, price=Decimal("10.00"), cost_per_unit=Decimal("5.00"),
+                compare_at_price=Decimal("12.00"), sku=sku, stock=stock,
+            )
+
+        output = io.StringIO()
+        call_command('untrack_unstocked_variants', '--dry-run', stdout=output)
+        self.assertIn("TEE-S", output.getvalue())
+        self.assertFalse(ProductVariant.objects.filter(track_inventory=False).exists())
+
+        call_command('untrack_unstocked_variants', stdout=io.StringIO())
+        self.assertEqual(list(ProductVariant.objects.filter(track_inventory=False).values_list('sku', flat=True)), ["TEE-S"])
+
+
+class ProductImportTest(BaseTestCase):
+    client_class = APIClient
+
+    CSV = (
+        "name,category__name,collections,is_live,variant_sku,variant_price,variant_stock\n"
+        "Runner,Shoes,Summer,true,RUN-40,50.00,3\n"
+        "Runner,Shoes,Summer,true,RUN-41,52.00,4\n"
+        "Boot,Shoes,,false,BOOT-1,80.00,1\n"
+        "Sandal,Hats,,false,SANDAL-1,20.00,1\n"
+        "Clog,,,false,TAKEN,20.00,1\n"
+        "Loafer,,,false,LOAF-1,-5,1\n"
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.category = Category.objects.create(name="Shoes")
+        self.collection = Collection.objects.create(name="Summer")
+        existing = Product.objects.create(name="Runner", summary="summary", description="description", created_by=self.user)
+        ProductVariant.objects.create(
+            product=existing, price=Decimal("1.00"), cost_per_unit=Decimal("1.00"), compare_at_price=Decimal("1.00"), sku="TAKEN",
+        )
+
+    def create_job(self, content, file_format='csv'):
+        job = ProductImportJob(created_by=self.user, file_format=file_format)
+        job.file.save(f"products.{file_format}", ContentFile(content.encode()), save=False)
+        job.save()
+        return job
+
+    def test_csv_import(self):
+        job = self.create_job(self.CSV)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImporter(job, batch_size=3).run()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProductImportStatus.COMPLETED)
+        self.assertEqual((job.total_records, job.processed_records), (5, 5))
+        self.assertEqual((job.created_products, job.created_variants, job.failed_records), (2, 3, 3))
+        self.assertEqual(job.progress, 1)
+        self.assertEqual(sorted(error['record'] for error in job.errors), [2, 3, 4])
+        self.assertIn('category', job.errors[0]['errors'])
+
+        runner = Product.objects.get(name="Runner", category=self.category)
+        self.assertEqual(runner.slug, "runner-2")  # "runner" is taken by the existing product
+        self.assertEqual(runner.default_variant.sku, "RUN-40")
+        self.assertEqual(sorted(runner.variants.values_list('stock', flat=True)), [3, 4])
+        self.assertEqual(list(runner.collections.all()), [self.collection])
+        self.assertTrue(runner.is_live)
+        self.assertTrue(ProductListing.objects.filter(product=runner, is_stale=False).exists())
+
+    def test_jsonl_import_resumes_after_last_batch(self):
+        lines = [
+            json.dumps({'name': f"Product {index}", 'variants': [{'sku': f"SKU-{index}", 'price': "10.00"}]})
+            for index in range(6)
+        ]
+        job = self.create_job("\n".join(lines), file_format='jsonl')
+
+        # The worker dies in the second batch, the first one stays committed
+        importer = ProductImporter(job, batch_size=2)
+        original_import_batch = importer.import_batch
+        calls = []
+
+        def failing_import_batch(batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError("worker lost")
+            return original_import_batch(batch)
+
+        importer.import_batch = failing_import_batch
+        with self.assertRaises(RuntimeError):
+            importer.run()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_records, job.created_products), (ProductImportStatus.FAILED, 2, 2))
+        self.assertTrue(ProductImporter.can_resume(job))
+
+        ProductImporter(job, batch_size=2).run()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_records, job.created_products), (ProductImportStatus.COMPLETED, 6, 6))
+        self.assertEqual(Product.objects.filter(name__startswith="Product ").count(), 6)
+        self.assertFalse(ProductImporter.can_resume(job))
+
+    def test_batch_queries_dont_grow_with_batch_size(self):
+        def count_queries(count, offset):
+            lines = [
+                json.dumps({
+                    'name': f"Item {offset + index}", 'category': "Shoes", 'collections': ["Summer"],
+                    'variants': [{'sku': f"ITEM-{offset + index}-{size}", 'price': "10.00"} for size in range(2)],
+                })
+                for index in range(count)
+            ]
+            records = [(json.loads(line), None) for line in lines]
+            importer = ProductImporter(self.create_job("\n".join(lines), file_format='jsonl'))
+            with CaptureQueriesContext(connection) as queries:
+                importer.import_batch(records)
+            return len(queries)
+
+        self.assertEqual(count_queries(2, 0), count_queries(20, 100))
+
+    @mock.patch('nxtbn.product.tasks.import_products.delay')
+    def test_upload_queues_the_import(self, delay):
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/product/dashboard/api/products/imports/',
+                {'file': SimpleUploadedFile("products.csv", self.CSV.encode(), content_type='text/csv')},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['file_format'], 'csv')
+        self.assertEqual(response.data['status'], ProductImportStatus.PENDING)
+        delay.assert_called_once_with(response.data['id'])
+
+        response = self.client.post(f"/product/dashboard/api/products/imports/{response.data['id']}/resume/")
+        self.assertEqual(response.status_code, 409)  # Not started yet, nothing to resume
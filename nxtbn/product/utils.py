@@ -0,0 +1,292 @@
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction
+from django.db.models import Count, Q
+
+from nxtbn.core.cache import StampedeCache
+from nxtbn.product.models import Category, Product, ProductListing, ProductVariant
+
+
+class CategoryTreeCache:
+    """
+    Keeps the whole category tree serialized in the cache.
+
+    The tree is built from a single query over the `Category` table and assembled in memory,
+    the result has the same shape as `RecursiveCategorySerializer` output. It is invalidated
+    whenever a category is saved or deleted (see `nxtbn.product.signals`).
+    """
+    DEFAULT_CACHE_TIMEOUT = 24 * 60 * 60  # Cache for one day
+    cache_key = 'category_tree'
+    cache_backend = 'generic'
+    trees = StampedeCache('category_tree', timeout=DEFAULT_CACHE_TIMEOUT, cache_backend=cache_backend)
+
+    @classmethod
+    def build(cls):
+        """
+        Load all categories in one query and link them into a tree.
+
+        Returns a dict with:
+        - roots: top-level categories, each with its nested children
+        - all: every category, each with its nested children
+        """
+        nodes = {}
+        parents = {}
+        categories = Category.objects.order_by('id').values('id', 'name', 'description', 'parent_id')
+        for category in categories:
+            nodes[category['id']] = {
+                'id': category['id'],
+                'name': category['name'],
+                'description': category['description'],
+                'children': [],
+            }
+            parents[category['id']] = category['parent_id']
+
+        roots = []
+        for category_id, node in nodes.items():
+            parent = nodes.get(parents[category_id])
+            if parent is None:
+                roots.append(node)
+            else:
+                parent['children'].append(node)
+
+        return {'roots': roots, 'all': list(nodes.values())}
+
+    @classmethod
+    def get_tree(cls, top_level_only=True):
+        """Return the serialized tree, building and caching it on a cache miss."""
+        tree = cls.trees.get_or_set(cls.cache_key, cls.build)
+        return tree['roots'] if top_level_only else tree['all']
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Expire the cached tree so the next request rebuilds it, concurrent requests
+        get the previous tree meanwhile.
+        """
+        cls.trees.expire(cls.cache_key)
+
+
+class ProductFacets:
+    """
+    Facet counts (category, supplier, brand, type, collection and variant price range) for a filtered product queryset.
+
+    Every facet is one grouped aggregation over the ids of the filtered products, and the whole
+    result is cached per filtered query. Cached entries are stamped with a catalog version which
+    `nxtbn.product.signals` bumps on any product, variant, category or collection change.
+    """
+    DEFAULT_CACHE_TIMEOUT = 10 * 60  # Cache for ten minutes
+    cache_backend = 'generic'
+    version_key = 'product_facets_version'
+
+    # Bucket edges of the price facet, the last bucket is open ended
+    PRICE_BUCKETS = (Decimal('0'), Decimal('25'), Decimal('50'), Decimal('100'), Decimal('250'), Decimal('500'))
+
+    @classmethod
+    def get_cache_key(cls, queryset, version):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(f"{sql}{params}".encode()).hexdigest()
+        return f"product_facets_{version}_{digest}"
+
+    @classmethod
+    def get_facets(cls, queryset):
+        """Return the facets of the queryset, computing and caching them on a cache miss."""
+        product_ids = queryset.order_by().values('pk')
+        cache = caches[cls.cache_backend]
+        version = cache.get(cls.version_key, 0)
+        try:
+            cache_key = cls.get_cache_key(product_ids, version)
+        except EmptyResultSet:  # The filters can't match anything
+            return cls.build(product_ids)
+
+        facets = cache.get(cache_key)
+        if facets is None:
+            facets = cls.build(product_ids)
+            cache.set(cache_key, facets, timeout=cls.DEFAULT_CACHE_TIMEOUT)
+        return facets
+
+    @classmethod
+    def build(cls, product_ids):
+        products = Product.objects.filter(pk__in=product_ids).order_by()
+        return {
+            'category': cls.count_by(products, 'category_id', 'category__name'),
+            'supplier': cls.count_by(products, 'supplier_id', 'supplier__name'),
+            'brand': cls.count_by(products, 'brand'),
+            'type': cls.count_by(products, 'type'),
+            'collection': cls.count_by(
+                Product.collections.through.objects.filter(product_id__in=product_ids),
+                'collection_id', 'collection__name',
+            ),
+            'price': cls.count_price_ranges(product_ids),
+        }
+
+    @staticmethod
+    def count_by(queryset, value_field, name_field=None):
+        """Group the rows by `value_field` and count them, skipping empty values."""
+        fields = [value_field, name_field] if name_field else [value_field]
+        rows = queryset.exclude(**{f"{value_field}__isnull": True}).values(*fields).annotate(
+            count=Count('*')
+        ).order_by('-count', value_field)
+
+        return [
+            {
+                'value': row[value_field],
+                'name': row[name_field] if name_field else row[value_field],
+                'count': row['count'],
+            }
+            for row in rows
+        ]
+
+    @classmethod
+    def count_price_ranges(cls, product_ids):
+        """Count the products having at least one variant in each price bucket, in a single aggregate query."""
+        buckets = []
+        for index, min_price in enumerate(cls.PRICE_BUCKETS):
+            max_price = cls.PRICE_BUCKETS[index + 1] if index + 1 < len(cls.PRICE_BUCKETS) else None
+            condition = Q(price__gte=min_price)
+            if max_price is not None:
+                condition &= Q(price__lt=max_price)
+            buckets.append((f"bucket_{index}", min_price, max_price, condition))
+
+        counts = ProductVariant.objects.filter(product_id__in=product_ids).aggregate(**{
+            key: Count('product_id', distinct=True, filter=condition)
+            for key, _, _, condition in buckets
+        })
+
+        return [
+            {
+                'min_price': str(min_price),
+                'max_price': str(max_price) if max_price is not None else None,
+                'count': counts[key],
+            }
+            for key, min_price, max_price, _ in buckets
+        ]
+
+    @classmethod
+    def invalidate(cls):
+        """Outdate every cached facet result at once."""
+        cache = caches[cls.cache_backend]
+        cache.add(cls.version_key, 0, timeout=None)
+        cache.incr(cls.version_key)
+
+
+class ProductListingProjection:
+    """
+    Builds and refreshes `ProductListing` rows from the normalized product models.
+    """
+    synced_fields = (
+        'name', 'slug', 'summary', 'description', 'brand', 'type', 'category', 'category_name',
+        'price', 'stock', 'default_variant', 'created_at', 'is_stale', 'synced_at',
+    )
+    # Serializer fields depending on the request currency, computed when the listing is rendered
+    currency_fields = ('price_in_target_currency', 'price_in_target_currency_amount')
+
+    @classmethod
+    def build_listing(cls, product):
+        # Imported here, the storefront serializers import this module's models
+        from nxtbn.product.api.storefront.serializers import ProductVariantSerializer
+
+        variant = product.default_variant
+        variant_data = None
+        if variant is not None:
+            variant_data = dict(ProductVariantSerializer(variant).data)
+            for field in cls.currency_fields:
+                variant_data.pop(field, None)
+
+        return ProductListing(
+            product=product,
+            name=product.name,
+            slug=product.slug,
+            summary=product.summary,
+            description=product.description,
+            brand=product.brand,
+            type=product.type,
+            category=product.category,
+            category_name=product.category.name if product.category else '',
+            price=variant.price if variant else None,
+            stock=variant.stock if variant else None,
+            default_variant=variant_data,
+            created_at=product.created_at,
+            is_stale=False,
+        )
+
+    @classmethod
+    def sync(cls, product_ids):
+        """Rebuild the listings of the given products in one upsert, dropping those of deleted products."""
+        product_ids = set(product_ids)
+        products = Product.objects.filter(pk__in=product_ids).select_related(
+            'category', 'default_variant', 'default_variant__variant_image'
+        )
+        listings = [cls.build_listing(product) for product in products]
+        if listings:
+            ProductListing.objects.bulk_create(
+                listings,
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=cls.synced_fields,
+            )
+
+        deleted_ids = product_ids - {listing.product_id for listing in listings}
+        if deleted_ids:
+            ProductListing.objects.filter(pk__in=deleted_ids).delete()
+        return len(listings)
+
+    @classmethod
+    def mark_stale(cls, product_ids):
+        """Flag the listings as outdated, adding placeholder rows for products that have none yet."""
+        product_ids = set(product_ids)
+        existing_ids = Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True)
+        ProductListing.objects.bulk_create(
+            [ProductListing(product_id=product_id, is_stale=True) for product_id in existing_ids],
+            ignore_conflicts=True,
+        )
+        ProductListing.objects.filter(pk__in=product_ids).update(is_stale=True)
+
+    @classmethod
+    def sync_stale(cls, batch_size=500):
+        """Refresh every stale listing, batch by batch. Returns the number of refreshed listings."""
+        synced = 0
+        while True:
+            product_ids = list(ProductListing.objects.filter(is_stale=True).values_list('pk', flat=True)[:batch_size])
+            if not product_ids:
+                return synced
+            synced += cls.sync(product_ids)
+
+    @classmethod
+    def rebuild(cls, batch_size=500):
+        """Rebuild the listings of the whole catalog. Returns the number of synced listings."""
+        synced = 0
+        product_ids = Product.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for product_id in product_ids.iterator(chunk_size=batch_size):
+            batch.append(product_id)
+            if len(batch) == batch_size:
+                synced += cls.sync(batch)
+                batch = []
+        if batch:
+            synced += cls.sync(batch)
+        return synced
+
+    @staticmethod
+    def is_stale():
+        """Whether some listings are outdated, in which case the storefront reads the normalized models."""
+        return ProductListing.objects.filter(is_stale=True).exists()
+
+
+def refresh_product_listings(product_ids):
+    """Bring the `ProductListing` rows of the products up to date, inline or through a Celery task."""
+    product_ids = list(set(product_ids))
+    if not product_ids:
+        return
+
+    if settings.PRODUCT_LISTING_ASYNC_SYNC:
+        # Imported here, the tasks import the importer which imports this module
+        from nxtbn.product.tasks import sync_product_listings
+
+        ProductListingProjection.mark_stale(product_ids)
+        transaction.on_commit(lambda: sync_product_listings.delay(product_ids))
+    else:
+        ProductListingProjection.sync(product_ids)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SeoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'nxtbn.seo'
+
+    def ready(self):
+        import nxtbn.seo.signals  # noqa
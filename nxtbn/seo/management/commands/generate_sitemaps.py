@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from nxtbn.seo.sitemaps import regenerate_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Renders the stale sitemap shards (or all of them) and the sitemap index into the storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Render every shard, not only the stale ones')
+
+    def handle(self, *args, **options):
+        rendered = regenerate_sitemaps(everything=options['all'])
+        if rendered is None:
+            raise CommandError('The sitemaps are already being regenerated.')
+        self.stdout.write(self.style.SUCCESS(f'Successfully rendered {rendered} sitemap shards.'))
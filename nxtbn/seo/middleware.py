@@ -0,0 +1,26 @@
+from django.urls import Resolver404, resolve
+
+
+CRAWLER_URL_NAMES = {'robots_txt', 'sitemap_xml', 'sitemap_shard'}
+
+
+class CrawlerFastPathMiddleware:
+    """
+    Answers robots.txt and the sitemaps right after SecurityMiddleware, skipping the currency, session,
+    CSRF, authentication and the rest of the middleware stack, none of which these anonymous,
+    heavily cached responses use.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path_info
+        if request.method in ('GET', 'HEAD') and path.endswith(('.txt', '.xml')):
+            try:
+                match = resolve(path)
+            except Resolver404:
+                match = None
+            if match is not None and match.url_name in CRAWLER_URL_NAMES:
+                request.resolver_match = match
+                return match.func(request, *match.args, **match.kwargs)
+        return self.get_response(request)
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=50)),
+                ('number', models.PositiveIntegerField()),
+                ('file', models.CharField(blank=True, help_text='Name of the gzipped XML file in the storage.', max_length=255)),
+                ('url_count', models.PositiveIntegerField(default=0)),
+                ('lastmod', models.DateTimeField(blank=True, help_text='Latest change of the listed pages.', null=True)),
+                ('is_stale', models.BooleanField(db_index=True, default=True)),
+                ('generated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('section', 'number'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sitemapshard',
+            constraint=models.UniqueConstraint(fields=('section', 'number'), name='unique_sitemap_shard'),
+        ),
+    ]
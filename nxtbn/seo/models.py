@@ -1,3 +1,25 @@
 from django.db import models
 
-# Create your models here.
+
+class SitemapShard(models.Model):
+    """
+    A pre-rendered, gzipped sitemap file, see `nxtbn.seo.sitemaps`: a shard of a section (products,
+    posts...) or the sitemap index. Shards are flagged stale when their pages change, and rendered
+    again by a periodic task.
+    """
+    section = models.CharField(max_length=50)
+    number = models.PositiveIntegerField()
+    file = models.CharField(max_length=255, blank=True, help_text="Name of the gzipped XML file in the storage.")
+    url_count = models.PositiveIntegerField(default=0)
+    lastmod = models.DateTimeField(null=True, blank=True, help_text="Latest change of the listed pages.")
+    is_stale = models.BooleanField(default=True, db_index=True)
+    generated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('section', 'number')
+        constraints = [
+            models.UniqueConstraint(fields=['section', 'number'], name='unique_sitemap_shard'),
+        ]
+
+    def __str__(self):
+        return f"Sitemap {self.section} {self.number}"
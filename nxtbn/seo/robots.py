@@ -0,0 +1,43 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.urls import reverse
+
+
+ROBOTS_TXT_MAX_AGE = 24 * 60 * 60  # seconds, crawlers and proxies may keep robots.txt that long
+
+# Rendered robots.txt per site id, as (content, etag, rendered at). Cleared when a site is saved or deleted,
+# which only reaches this process, so the other workers render it again after ROBOTS_TXT_REFRESH seconds
+ROBOTS_TXT_CACHE = {}
+ROBOTS_TXT_REFRESH = 5 * 60
+
+
+def render_robots_txt(site):
+    sitemap_url = f"https://{site.domain}{reverse('sitemap_xml')}"
+    return (
+        "# We use nxtbn - Next Billion Native Commerce as our e-commerce platform that scales.\n"
+        "User-agent: *\n"
+        "Disallow: /docs/\n"
+        "Disallow: /admin/\n"
+        "Disallow: /api/\n"
+        "Allow: /\n"  # Allow everything else
+        f"Sitemap: {sitemap_url}\n"
+    ).encode()
+
+
+def get_robots_txt():
+    """Returns the robots.txt of the current site and its ETag, rendered at most once per refresh period."""
+    site_id = settings.SITE_ID
+    cached = ROBOTS_TXT_CACHE.get(site_id)
+    if cached is None or time.monotonic() - cached[2] > ROBOTS_TXT_REFRESH:
+        # Read from the database rather than Django's site cache, which other workers don't clear either
+        content = render_robots_txt(Site.objects.get(pk=site_id))
+        etag = f'"{hashlib.md5(content, usedforsecurity=False).hexdigest()}"'
+        cached = ROBOTS_TXT_CACHE[site_id] = (content, etag, time.monotonic())
+    return cached[0], cached[1]
+
+
+def clear_robots_txt_cache():
+    ROBOTS_TXT_CACHE.clear()
@@ -0,0 +1,30 @@
+from django.contrib.sites.models import Site
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from nxtbn.post.models import Post
+from nxtbn.product.models import Product
+from nxtbn.seo.robots import clear_robots_txt_cache
+from nxtbn.seo.sitemaps import mark_all_sitemap_shards_stale, mark_sitemap_shards_stale
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def mark_product_sitemap_stale(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_sitemap_shards_stale('product', [instance.pk])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def mark_post_sitemap_stale(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_sitemap_shards_stale('post', [instance.pk])
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def refresh_site_urls(sender, instance, raw=False, **kwargs):
+    clear_robots_txt_cache()
+    if not raw:
+        mark_all_sitemap_shards_stale()
@@ -0,0 +1,234 @@
+import gzip
+import tempfile
+import uuid
+from datetime import timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import caches
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from nxtbn.post.models import Post
+from nxtbn.product.models import Product
+from nxtbn.seo.models import SitemapShard
+
+
+INDEX_SECTION = 'index'
+STORAGE_DIRECTORY = 'sitemaps'
+
+LOCK_CACHE_BACKEND = 'generic'
+LOCK_KEY = 'sitemap_regeneration_lock'
+LOCK_TIMEOUT = 600  # seconds, in case a worker dies while holding the lock
+
+SLUG_PLACEHOLDER = 'sitemap-slug-placeholder'
+
+URLSET_START = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_END = '</urlset>\n'
+INDEX_START = '<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_END = '</sitemapindex>\n'
+
+
+def get_base_url():
+    # Read from the database rather than Django's per-process site cache, which a worker rendering the
+    # shards flagged by a domain change would still hold the previous domain in
+    return f"https://{Site.objects.get(pk=settings.SITE_ID).domain}"
+
+
+def format_lastmod(value):
+    return value.astimezone(dt_timezone.utc).isoformat(timespec='seconds')
+
+
+class ModelSitemapSection:
+    """
+    Pages of a model with a slug URL. Shard N lists the rows with a primary key in
+    [N * SITEMAP_SHARD_SIZE + 1, (N + 1) * SITEMAP_SHARD_SIZE], so a shard never holds more URLs than
+    the protocol allows (50,000), and a changed row only outdates the shard of its key.
+    """
+    def __init__(self, model, url_name, changefreq='weekly', priority='0.7'):
+        self.model = model
+        self.url_name = url_name
+        self.changefreq = changefreq
+        self.priority = priority
+
+    def get_location_format(self):
+        """The page URL with "{slug}" in place of the slug, reversed once rather than per row. None without a URL."""
+        try:
+            path = reverse(self.url_name, args=[SLUG_PLACEHOLDER])
+        except NoReverseMatch:
+            return None
+        return get_base_url() + path.replace('{', '{{').replace('}', '}}').replace(SLUG_PLACEHOLDER, '{slug}')
+
+    def get_shard_number(self, pk):
+        return (pk - 1) // settings.SITEMAP_SHARD_SIZE
+
+    def get_shard_numbers(self):
+        if self.get_location_format() is None:
+            return range(0)
+        max_pk = self.model.objects.aggregate(max_pk=Max('pk'))['max_pk']
+        return range(self.get_shard_number(max_pk) + 1) if max_pk else range(0)
+
+    def iter_urls(self, number):
+        """Yields (location, lastmod) pairs, reading only the slug and modification time of the shard's rows."""
+        location_format = self.get_location_format()
+        if location_format is None:
+            return
+        size = settings.SITEMAP_SHARD_SIZE
+        rows = self.model.objects.filter(
+            pk__gte=number * size + 1, pk__lte=(number + 1) * size,
+        ).order_by('pk').values_list('slug', 'last_modified')
+        for slug, last_modified in rows.iterator(chunk_size=2000):
+            yield location_format.format(slug=slug), last_modified
+
+
+class StaticSitemapSection:
+    """Pages without a model, listed by URL name, in a single shard."""
+    def __init__(self, url_names, changefreq='monthly', priority='0.8'):
+        self.url_names = url_names
+        self.changefreq = changefreq
+        self.priority = priority
+
+    def get_shard_numbers(self):
+        return range(1)
+
+    def iter_urls(self, number):
+        base_url = get_base_url()
+        for url_name in self.url_names:
+            yield base_url + reverse(url_name), None
+
+
+# Posts have no public page (no "post_detail" URL) yet, their section stays empty until they do
+SITEMAP_SECTIONS = {
+    'static': StaticSitemapSection(['home']),
+    'product': ModelSitemapSection(Product, 'product_detail'),
+    'post': ModelSitemapSection(Post, 'post_detail'),
+}
+
+
+def mark_sitemap_shards_stale(section_name, pks):
+    """Flags the shards listing the given primary keys for regeneration, adding those that don't exist yet."""
+    section = SITEMAP_SECTIONS[section_name]
+    numbers = {section.get_shard_number(pk) for pk in pks if pk is not None}
+    if not numbers:
+        return
+    SitemapShard.objects.bulk_create(
+        [SitemapShard(section=section_name, number=number) for number in numbers], ignore_conflicts=True,
+    )
+    SitemapShard.objects.filter(section=section_name, number__in=numbers, is_stale=False).update(is_stale=True)
+
+
+def mark_all_sitemap_shards_stale():
+    """Flags every shard, e.g. when the site domain, part of every URL, changes."""
+    SitemapShard.objects.filter(section__in=SITEMAP_SECTIONS, is_stale=False).update(is_stale=True)
+
+
+def sync_sitemap_shards():
+    """Adds the shards of new key ranges, with one aggregate query per section."""
+    SitemapShard.objects.bulk_create([
+        SitemapShard(section=name, number=number)
+        for name, section in SITEMAP_SECTIONS.items()
+        for number in section.get_shard_numbers()
+    ], ignore_conflicts=True)
+
+
+def write_gzipped_file(shard, lines):
+    """Compresses the lines into a new file of the storage, and points the shard at it."""
+    storage = default_storage
+    # A new name per version, the previous file keeps being served until the shard points at the new one
+    name = f"{STORAGE_DIRECTORY}/{shard.section}-{shard.number}-{uuid.uuid4().hex[:12]}.xml.gz"
+    with tempfile.SpooledTemporaryFile(max_size=2 * 1024 * 1024) as buffer:
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as compressed:
+            for line in lines:
+                compressed.write(line.encode())
+        buffer.seek(0)
+        name = storage.save(name, File(buffer))
+
+    previous = shard.file
+    shard.file = name
+    shard.generated_at = timezone.now()
+    shard.save(update_fields=['file', 'generated_at'])
+    if previous:
+        transaction.on_commit(lambda: storage.delete(previous))
+
+
+def render_shard(shard):
+    section = SITEMAP_SECTIONS[shard.section]
+    totals = {'url_count': 0, 'lastmod': None}
+
+    def lines():
+        yield URLSET_START
+        for location, lastmod in section.iter_urls(shard.number):
+            totals['url_count'] += 1
+            entry = f"<url><loc>{escape(location)}</loc>"
+            if lastmod is not None:
+                totals['lastmod'] = max(lastmod, totals['lastmod'] or lastmod)
+                entry += f"<lastmod>{format_lastmod(lastmod)}</lastmod>"
+            yield f"{entry}<changefreq>{section.changefreq}</changefreq><priority>{section.priority}</priority></url>\n"
+        yield URLSET_END
+
+    with transaction.atomic():
+        write_gzipped_file(shard, lines())
+        shard.url_count = totals['url_count']
+        shard.lastmod = totals['lastmod']
+        shard.save(update_fields=['url_count', 'lastmod'])
+    return shard
+
+
+def get_index_entries():
+    # Shards not rendered yet are listed too, they are rendered when first requested
+    return SitemapShard.objects.filter(section__in=SITEMAP_SECTIONS).exclude(generated_at__isnull=False, url_count=0)
+
+
+def render_index():
+    base_url = get_base_url()
+
+    def lines():
+        yield INDEX_START
+        for shard in get_index_entries().iterator():
+            location = base_url + reverse('sitemap_shard', args=[shard.section, shard.number])
+            entry = f"<sitemap><loc>{escape(location)}</loc>"
+            if shard.lastmod is not None:
+                entry += f"<lastmod>{format_lastmod(shard.lastmod)}</lastmod>"
+            yield f"{entry}</sitemap>\n"
+        yield INDEX_END
+
+    index, _ = SitemapShard.objects.get_or_create(section=INDEX_SECTION, number=0, defaults={'is_stale': False})
+    with transaction.atomic():
+        write_gzipped_file(index, lines())
+    return index
+
+
+def regenerate_sitemaps(everything=False):
+    """
+    Renders the stale shards (or every shard), then the index if anything changed. Returns the number
+    of rendered shards, or None when another regeneration is already running.
+
+    A shard is marked fresh before it is read, so pages changing meanwhile flag it stale again
+    rather than being missed.
+    """
+    cache = caches[LOCK_CACHE_BACKEND]
+    if not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        return None
+
+    try:
+        sync_sitemap_shards()
+        shards = SitemapShard.objects.filter(section__in=SITEMAP_SECTIONS)
+        if not everything:
+            shards = shards.filter(is_stale=True)
+
+        rendered = 0
+        for shard in list(shards):
+            SitemapShard.objects.filter(pk=shard.pk).update(is_stale=False)
+            render_shard(shard)
+            rendered += 1
+
+        if rendered or not SitemapShard.objects.filter(section=INDEX_SECTION).exclude(file='').exists():
+            render_index()
+        return rendered
+    finally:
+        cache.delete(LOCK_KEY)
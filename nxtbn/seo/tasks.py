@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from nxtbn.seo.sitemaps import regenerate_sitemaps
+
+
+@shared_task
+def regenerate_stale_sitemaps():
+    """Periodic task (see `CELERY_BEAT_SCHEDULE`) rendering the sitemap shards flagged by `nxtbn.seo.signals`."""
+    return regenerate_sitemaps()
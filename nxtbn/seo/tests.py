@@ -1,3 +1,124 @@
-from django.test import TestCase
+import gzip
+import shutil
+import tempfile
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.sites.models import SITE_CACHE, Site
+from django.test import override_settings
+
+from nxtbn.home.base_tests import BaseTestCase
+from nxtbn.product.models import Product
+from nxtbn.seo.models import SitemapShard
+from nxtbn.seo.robots import clear_robots_txt_cache
+from nxtbn.seo.sitemaps import regenerate_sitemaps
+
+
+NAMESPACE = {'sitemap': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+
+
+@override_settings(SITEMAP_SHARD_SIZE=2)
+class SitemapTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.products = [
+            Product.objects.create(name=f"Product {index}", summary="summary", description="description", created_by=self.user)
+            for index in range(5)
+        ]
+
+    def get_locations(self, url, tag):
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = gzip.decompress(b''.join(response.streaming_content))
+        return [element.text for element in ElementTree.fromstring(content).findall(f'sitemap:{tag}/sitemap:loc', NAMESPACE)]
+
+    def test_sharded_sitemaps(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            regenerate_sitemaps()
+        shards = self.get_locations('/sitemap.xml', 'sitemap')
+        product_shards = sorted({(product.pk - 1) // 2 for product in self.products})
+        self.assertEqual(shards, [
+            f'https://example.com/sitemap-product-{number}.xml' for number in product_shards
+        ] + ['https://example.com/sitemap-static-0.xml'])
+
+        urls = []
+        for shard in shards:
+            urls += self.get_locations(shard.replace('https://example.com', ''), 'url')
+        self.assertEqual(urls, [
+            f'https://example.com/product/{product.slug}/' for product in self.products
+        ] + ['https://example.com/'])
+
+        # Decompressed for clients not accepting gzip, in a single query
+        with self.assertNumQueries(1):
+            response = self.client.get(shards[0].replace('https://example.com', ''))
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'<?xml'))
+
+    def test_only_changed_shards_are_rendered_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            regenerate_sitemaps()
+        self.assertEqual(regenerate_sitemaps(), 0)
+
+        product = self.products[0]
+        product.name = "Renamed"
+        product.save()
+        stale = SitemapShard.objects.get(is_stale=True)
+        self.assertEqual((stale.section, stale.number), ('product', (product.pk - 1) // 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(regenerate_sitemaps(), 1)
+        self.assertFalse(SitemapShard.objects.filter(is_stale=True).exists())
+
+    def test_domain_change_renders_every_shard_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            regenerate_sitemaps()
+        previous = Site.objects.get_current()
+
+        site = Site.objects.get(pk=previous.pk)
+        site.domain = "shop.example.org"
+        site.save()
+        SITE_CACHE[site.pk] = previous  # As still cached by a worker that didn't save the site
+        self.addCleanup(SITE_CACHE.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(regenerate_sitemaps(), SitemapShard.objects.exclude(section='index').count())
+        self.assertTrue(all(
+            location.startswith('https://shop.example.org/')
+            for location in self.get_locations('/sitemap-static-0.xml', 'url')
+        ))
+
+    def test_shards_are_rendered_on_first_request(self):
+        urls = []
+        for shard in self.get_locations('/sitemap.xml', 'sitemap'):
+            urls += self.get_locations(shard.replace('https://example.com', ''), 'url')
+        self.assertEqual(len(urls), 6)
+        self.assertEqual(self.client.get('/sitemap-product-999.xml').status_code, 404)
+
+
+class RobotsTxtTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        clear_robots_txt_cache()
+        self.addCleanup(clear_robots_txt_cache)
+
+    def test_robots_txt_is_rendered_once_per_site(self):
+        response = self.client.get('/robots.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Sitemap: https://example.com/sitemap.xml\n", response.content)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))  # Answered before the session middleware
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/robots.txt', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        site = Site.objects.get_current()
+        site.domain = "shop.example.org"
+        site.save()
+        response = self.client.get('/robots.txt')
+        self.assertIn(b"Sitemap: https://shop.example.org/sitemap.xml\n", response.content)
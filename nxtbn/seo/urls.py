@@ -1,11 +1,11 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path
-from django.contrib.sitemaps.views import sitemap
 from nxtbn.seo import views as seo_views
 
 
 urlpatterns = [
     path("robots.txt", seo_views.robots_txt, name="robots_txt"),
-    path("sitemap.xml", sitemap, {"sitemaps": seo_views.site_maps}, name="sitemap_xml"),
+    path("sitemap.xml", seo_views.sitemap_index, name="sitemap_xml"),
+    path("sitemap-<slug:section>-<int:number>.xml", seo_views.sitemap_shard, name="sitemap_shard"),
 ]
\ No newline at end of file
@@ -1,72 +1,57 @@
-from django.http import HttpResponse
-from django.shortcuts import render
-from django.contrib.sitemaps import Sitemap
-from django.urls import reverse
-from django.contrib.sites.models import Site
-from nxtbn.post.models import Post
-from nxtbn.product.models import Product
-
-def robots_txt(request):
-    current_site = Site.objects.get_current()  # Gets the current site based on SITE_ID
-    site_domain = current_site.domain
-    sitemap_path = reverse("sitemap_xml")
-    sitemap_url = f"https://{site_domain}{sitemap_path}"
-
-    content = (
-        "# We use nxtbn - Next Billion Native Commerce as our e-commerce platform that scales.\n"
-        "User-agent: *\n"
-        "Disallow: /docs/\n" 
-        "Disallow: /admin/\n"
-        "Disallow: /api/\n"
-        "Allow: /\n"  # Allow everything else
-        f"Sitemap: {sitemap_url}\n"
-    )
-    
-    return HttpResponse(content, content_type="text/plain")
-
-
-
-class StaticViewSitemap(Sitemap): # added for the demonstration only
-    changefreq = "monthly"
-    priority = 0.8
-
-    def items(self):
-        return [
-            'home',
-            # 'about',
-            # 'contact'
-        ]  # Names of views or URL names / doesn't exist yet, just for placeholder
-
-    def location(self, item):
-        return reverse(item)
+import gzip
 
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 
-
-class ProductSitemap(Sitemap):
-    changefreq = "weekly" 
-    priority = 0.7
-
-    def items(self):
-        return Product.objects.all().order_by("id")
-
-    def lastmod(self, obj):
-        return obj.last_modified
-
-
-class PostSitemap(Sitemap):
-    changefreq = "weekly" 
-    priority = 0.7
-
-    def items(self):
-        return Post.objects.all().order_by("id")
-
-    def lastmod(self, obj):
-        return obj.last_modified
+from nxtbn.seo.models import SitemapShard
+from nxtbn.seo.robots import ROBOTS_TXT_MAX_AGE, get_robots_txt
+from nxtbn.seo.sitemaps import INDEX_SECTION, SITEMAP_SECTIONS, render_index, render_shard, sync_sitemap_shards
 
 
+SITEMAP_MAX_AGE = 60 * 60  # seconds, crawlers and proxies may keep a sitemap that long
 
-site_maps = {
-    'static': StaticViewSitemap(),
-    'product': ProductSitemap(),
-    'post': PostSitemap(),
-}
\ No newline at end of file
+def robots_txt(request):
+    content, etag = get_robots_txt()
+    response = HttpResponse(content, content_type="text/plain")
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=ROBOTS_TXT_MAX_AGE)
+    # A 304 when the crawler already has this version
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def serve_sitemap_file(request, shard):
+    """
+    Serves a pre-rendered sitemap straight from the storage, gzipped as stored when the client
+    accepts it (every crawler does), decompressed on the fly otherwise.
+    """
+    file = default_storage.open(shard.file, 'rb')
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = FileResponse(file, content_type='application/xml')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = FileResponse(gzip.GzipFile(fileobj=file), content_type='application/xml')
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, public=True, max_age=SITEMAP_MAX_AGE)
+    return response
+
+
+def sitemap_index(request):
+    index = SitemapShard.objects.filter(section=INDEX_SECTION).exclude(file='').first()
+    if index is None:
+        # Not rendered by the periodic task yet, the index is built from the shard table, not the pages
+        sync_sitemap_shards()
+        index = render_index()
+    return serve_sitemap_file(request, index)
+
+
+def sitemap_shard(request, section, number):
+    shard = SitemapShard.objects.filter(section=section, number=number, section__in=SITEMAP_SECTIONS).first()
+    if shard is None:
+        raise Http404
+    if not shard.file:
+        # Listed by the index but not rendered yet, reads at most one shard of rows
+        SitemapShard.objects.filter(pk=shard.pk).update(is_stale=False)
+        shard = render_shard(shard)
+    return serve_sitemap_file(request, shard)
@@ -123,6 +123,7 @@ INSTALLED_APPS += LOCAL_APPS + HELPING_HAND_APPS
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'nxtbn.seo.middleware.CrawlerFastPathMiddleware', # robots.txt and sitemaps, before the rest of the stack
     'whitenoise.middleware.WhiteNoiseMiddleware', # TODO: Do we need this?
     'nxtbn.core.currency_middleware.CurrencyMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -236,6 +237,12 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Same as Django's default handlers, also hashing the files while they are received
+FILE_UPLOAD_HANDLERS = [
+    'nxtbn.filemanager.uploadhandlers.HashingMemoryFileUploadHandler',
+    'nxtbn.filemanager.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -350,6 +357,7 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
 
 CACHES = {
@@ -363,6 +371,19 @@ CACHES = {
     }
 }
 
+# When test, use local memory cache instead of memcached
+if sys.argv[1] == 'test':
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "default",
+        },
+        "generic": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "generic",
+        }
+    }
+
 # ============================
 # NXTBN Specific Configuration
 # ============================
@@ -374,6 +395,10 @@ NXTBN_JWT_SETTINGS = {
     'ALGORITHM': 'HS256',
     'ACCESS_TOKEN_EXPIRATION_SECONDS': timedelta(hours=1),  # Default to 1 hour
     'REFRESH_TOKEN_EXPIRATION_SECONDS': timedelta(days=1),  # 1 day for refresh token
+    'USER_CACHE_TIMEOUT': 300,  # Seconds an authenticated user is served from cache
+    # When enabled, request.user is built from token claims and the user is only loaded on demand.
+    # Deactivation or permission changes then take effect when the access token expires.
+    'CLAIMS_ONLY_AUTHENTICATION': get_env_var("JWT_CLAIMS_ONLY_AUTHENTICATION", default=False, var_type=bool),
 }
 
 
@@ -381,3 +406,78 @@ NXTBN_JWT_SETTINGS = {
 BASE_CURRENCY = get_env_var("BASE_CURRENCY", default="USD")
 ALLOWED_CURRENCIES = get_env_var("ALLOWED_CURRENCIES", default=[], var_type=list)
 IS_MULTI_CURRENCY = get_env_var("IS_MULTI_CURRENCY", default=False, var_type=bool)
+CURRENCY_RATE_REFRESH_INTERVAL = get_env_var("CURRENCY_RATE_REFRESH_INTERVAL", default=3600, var_type=int) # In seconds
+
+
+CELERY_BEAT_SCHEDULE = {
+    'refresh-currency-exchange-rates': {
+        'task': 'nxtbn.core.tasks.refresh_currency_exchange_rates',
+        'schedule': timedelta(seconds=CURRENCY_RATE_REFRESH_INTERVAL),
+    },
+    'sync-stale-product-listings': {
+        'task': 'nxtbn.product.tasks.sync_stale_product_listings',
+        'schedule': timedelta(minutes=5),
+    },
+    'release-expired-stock-holds': {
+        'task': 'nxtbn.order.tasks.release_expired_stock_holds',
+        'schedule': timedelta(minutes=1),
+    },
+    'compact-order-stats-rollups': {
+        'task': 'nxtbn.order.tasks.compact_order_stats_rollups',
+        'schedule': timedelta(minutes=10),
+    },
+    'expire-upload-sessions': {
+        'task': 'nxtbn.filemanager.tasks.expire_stale_upload_sessions',
+        'schedule': timedelta(hours=1),
+    },
+    'regenerate-stale-sitemaps': {
+        'task': 'nxtbn.seo.tasks.regenerate_stale_sitemaps',
+        'schedule': timedelta(minutes=5),
+    },
+}
+
+
+# Product search
+# Dotted path to a nxtbn.product.search backend, picked from the database vendor when empty
+PRODUCT_SEARCH_BACKEND = get_env_var("PRODUCT_SEARCH_BACKEND", default="")
+
+
+# Product listing read model
+# Refresh ProductListing rows from a Celery worker instead of inline in the request that changed the product
+PRODUCT_LISTING_ASYNC_SYNC = get_env_var("PRODUCT_LISTING_ASYNC_SYNC", default=False, var_type=bool)
+
+
+# Stock reservations
+# How long the stock of an order is held before being given back, in minutes
+STOCK_RESERVATION_TTL = get_env_var("STOCK_RESERVATION_TTL", default=15, var_type=int)
+
+
+# Order statistics rollups
+# Recompute the rollups of changed orders from a Celery worker instead of inline after the change commits
+ORDER_STATS_ASYNC_REFRESH = get_env_var("ORDER_STATS_ASYNC_REFRESH", default=False, var_type=bool)
+# How long hourly rollups are kept, in days. Older ranges are answered per whole day
+ORDER_STATS_HOURLY_RETENTION = get_env_var("ORDER_STATS_HOURLY_RETENTION", default=90, var_type=int)
+
+
+# Image renditions
+# Widths (in pixels) and formats of the resized copies made of every uploaded image, formats Pillow can't write are skipped
+IMAGE_RENDITION_WIDTHS = get_env_var("IMAGE_RENDITION_WIDTHS", default=[320, 640, 960, 1280, 1920], var_type=list)
+IMAGE_RENDITION_FORMATS = get_env_var("IMAGE_RENDITION_FORMATS", default=['webp', 'avif'], var_type=list)
+# Make the renditions from a Celery worker, or inline after the upload commits (slow, every width in every format)
+IMAGE_RENDITIONS_ASYNC = get_env_var("IMAGE_RENDITIONS_ASYNC", default=True, var_type=bool)
+
+
+# Chunked uploads
+# Default chunk size and largest accepted chunk and file, in bytes. With S3, chunks are at least 5 MiB
+UPLOAD_CHUNK_SIZE = get_env_var("UPLOAD_CHUNK_SIZE", default=8 * 1024 * 1024, var_type=int)
+UPLOAD_MAX_CHUNK_SIZE = get_env_var("UPLOAD_MAX_CHUNK_SIZE", default=64 * 1024 * 1024, var_type=int)
+UPLOAD_MAX_SIZE = get_env_var("UPLOAD_MAX_SIZE", default=5 * 1024 * 1024 * 1024, var_type=int)
+# Assemble completed uploads from a Celery worker instead of inline after the completion request commits
+UPLOAD_ASSEMBLY_ASYNC = get_env_var("UPLOAD_ASSEMBLY_ASYNC", default=True, var_type=bool)
+# Open uploads without a new chunk for that many hours are aborted
+UPLOAD_SESSION_TTL = get_env_var("UPLOAD_SESSION_TTL", default=24, var_type=int)
+
+
+# Sitemaps
+# Primary keys per sitemap shard, at most 50,000 (the sitemap protocol limit)
+SITEMAP_SHARD_SIZE = min(get_env_var("SITEMAP_SHARD_SIZE", default=50000, var_type=int), 50000)
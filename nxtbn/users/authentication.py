@@ -23,12 +23,23 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
 
 
 class JWTAuthentication(BaseAuthentication):
+    jwt_manager = None
+
+    def get_jwt_manager(self):
+        # Settings are read once per process instead of on every request
+        if JWTAuthentication.jwt_manager is None:
+            JWTAuthentication.jwt_manager = JWTManager()
+        return JWTAuthentication.jwt_manager
+
     def authenticate(self, request):
-        jwt_manager = JWTManager()
+        jwt_manager = self.get_jwt_manager()
         auth_header = request.headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
             token = auth_header.split(" ")[1]
-            user = jwt_manager.verify_jwt_token(token)
+            if jwt_manager.claims_only:
+                user = jwt_manager.verify_jwt_claims(token)
+            else:
+                user = jwt_manager.verify_jwt_token(token)
             if user:
                 return (user, None)
             raise AuthenticationFailed({"detail": "Invalid or expired token", "code": "token_invalid_or_expired"})
@@ -1,9 +1,17 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from django.contrib.auth import get_user_model
 
+from nxtbn.users.utils.jwt_utils import invalidate_cached_user
+
 
 
 User = get_user_model()
 
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_jwt_user_cache(sender, instance, **kwargs):
+    """Covers profile edits, deactivation and password changes."""
+    invalidate_cached_user(instance.pk)
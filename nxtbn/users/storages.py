@@ -8,6 +8,14 @@ class NxtbnS3Storage(S3Boto3Storage):
     """
     file_overwrite = False
 
+    def get_object_parameters(self, name):
+        params = super().get_object_parameters(name)
+        # Image renditions are named after their content (see nxtbn.filemanager.renditions), they never change.
+        # The storage passes the name under its location (AWS_LOCATION)
+        if name.removeprefix(f"{self.location}/").startswith('renditions/'):
+            params['CacheControl'] = 'public, max-age=31536000, immutable'
+        return params
+
 
 
 class ForgivingManifestStaticFilesStorage(ManifestStaticFilesStorage):
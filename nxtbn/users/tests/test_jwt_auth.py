@@ -0,0 +1,59 @@
+from django.core.cache import caches
+from django.test import override_settings
+from django.conf import settings
+
+from nxtbn.home.base_tests import BaseTestCase
+from nxtbn.users.utils.jwt_utils import USER_CACHE_BACKEND, JWTManager
+
+
+class JWTUserCacheTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        caches[USER_CACHE_BACKEND].clear()
+        self.jwt_manager = JWTManager()
+        self.token = self.jwt_manager.generate_access_token(self.user)
+
+    def test_user_is_served_from_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.jwt_manager.verify_jwt_token(self.token), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.jwt_manager.verify_jwt_token(self.token), self.user)
+
+    def test_password_change_and_deactivation_invalidate_token(self):
+        self.jwt_manager.verify_jwt_token(self.token)
+
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertIsNone(self.jwt_manager.verify_jwt_token(self.token))
+
+        token = self.jwt_manager.generate_access_token(self.user)
+        self.assertEqual(self.jwt_manager.verify_jwt_token(token), self.user)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.jwt_manager.verify_jwt_token(token))
+
+
+@override_settings(NXTBN_JWT_SETTINGS={**settings.NXTBN_JWT_SETTINGS, 'CLAIMS_ONLY_AUTHENTICATION': True})
+class JWTClaimsOnlyTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        caches[USER_CACHE_BACKEND].clear()
+        self.jwt_manager = JWTManager()
+
+    def test_claims_are_read_without_queries(self):
+        token = self.jwt_manager.generate_access_token(self.user)
+
+        with self.assertNumQueries(0):
+            user = self.jwt_manager.verify_jwt_claims(token)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_staff)
+            self.assertTrue(user.is_superuser)
+            self.assertTrue(user.is_authenticated)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.user.email)
+        self.assertIsInstance(user, type(self.user))
+
+    def test_invalid_token(self):
+        self.assertIsNone(self.jwt_manager.verify_jwt_claims('not-a-token'))
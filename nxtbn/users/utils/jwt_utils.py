@@ -1,16 +1,68 @@
 from datetime import datetime, timedelta, timezone
+import hashlib
 import jwt
 from nxtbn.users.models import User
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
 from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+
+USER_CACHE_BACKEND = 'generic'
+
+
+def get_user_cache_key(user_id):
+    return f"jwt_user_{user_id}"
+
+
+def get_token_version(user):
+    """
+    Short fingerprint of the user's password hash, embedded in every token as the `ver` claim.
+    Changing the password changes the fingerprint, which invalidates previously issued tokens.
+    """
+    return hashlib.sha256(user.password.encode()).hexdigest()[:12]
+
+
+def invalidate_cached_user(user_id):
+    caches[USER_CACHE_BACKEND].delete(get_user_cache_key(user_id))
+
+
+class JWTClaimsUser(SimpleLazyObject):
+    """
+    Lazy stand-in for `request.user` in claims-only mode.
+
+    Attributes carried by the token (id, is_staff, is_superuser, is_active) are answered from
+    the claims; reading anything else loads the real user, through the user cache, on first access.
+    """
+
+    def __init__(self, claims, loader):
+        self.__dict__['_claims'] = {
+            'id': claims['user_id'],
+            'pk': claims['user_id'],
+            'is_authenticated': True,
+            'is_anonymous': False,
+            **{claim: claims[claim] for claim in JWTManager.USER_CLAIMS if claim in claims},
+        }
+        super().__init__(loader)
+
+    def __getattr__(self, name):
+        claims = self.__dict__['_claims']
+        if name in claims:
+            return claims[name]
+        return super().__getattr__(name)
 
 
 class JWTManager:
+    USER_CLAIMS = ('is_staff', 'is_superuser', 'is_active')
+
     def __init__(self):
         self.secret_key = settings.NXTBN_JWT_SETTINGS['SECRET_KEY']
         self.algorithm = settings.NXTBN_JWT_SETTINGS['ALGORITHM']
         self.access_token_expiration_seconds = settings.NXTBN_JWT_SETTINGS['ACCESS_TOKEN_EXPIRATION_SECONDS']
         self.refresh_token_expiration_seconds = settings.NXTBN_JWT_SETTINGS['REFRESH_TOKEN_EXPIRATION_SECONDS']
+        self.user_cache_timeout = settings.NXTBN_JWT_SETTINGS.get('USER_CACHE_TIMEOUT', 300)
+        self.claims_only = settings.NXTBN_JWT_SETTINGS.get('CLAIMS_ONLY_AUTHENTICATION', False)
 
     def _generate_jwt_token(self, user, expiration_timedelta):
         """Generate a JWT token for a given user with specified expiration."""
@@ -26,6 +78,8 @@ class JWTManager:
         payload = {
             "user_id": user.id,
             "exp": exp,
+            "ver": get_token_version(user),
+            **{claim: getattr(user, claim) for claim in self.USER_CLAIMS},
         }
         return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
 
@@ -35,14 +89,61 @@ class JWTManager:
     def generate_refresh_token(self, user):
         return self._generate_jwt_token(user, self.refresh_token_expiration_seconds)
 
+    def get_user(self, user_id):
+        """
+        Fetch a user by id, served from a short-lived cache. The cache entry is dropped
+        whenever the user is saved or deleted (see `nxtbn.users.signals`).
+        """
+        cache = caches[USER_CACHE_BACKEND]
+        key = get_user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = User.objects.get(id=user_id)
+            cache.set(key, user, timeout=self.user_cache_timeout)
+        return user
+
+    def decode_jwt_token(self, token):
+        """Return the token's claims, or None if the token is invalid or expired."""
+        try:
+            return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+            return None
+
     def verify_jwt_token(self, token):
         """Verify a JWT token and return the associated user."""
+        payload = self.decode_jwt_token(token)
+        if payload is None:
+            return None
+
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            user = User.objects.get(id=payload["user_id"])
-            if user.is_active:
-                return user
-            else:
-                return None
-        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, ObjectDoesNotExist):
+            user = self.get_user(payload["user_id"])
+        except (KeyError, ObjectDoesNotExist):
+            return None
+
+        if not user.is_active:
             return None
+
+        # Tokens issued before the `ver` claim existed carry no version and stay valid until they expire
+        if "ver" in payload and payload["ver"] != get_token_version(user):
+            return None
+
+        return user
+
+    def verify_jwt_claims(self, token):
+        """
+        Verify a JWT token without touching the database, returning a lazy user built from its claims.
+        The database (or user cache) is only hit if a non-claim attribute of the user is read.
+        """
+        payload = self.decode_jwt_token(token)
+        if payload is None or "user_id" not in payload:
+            return None
+        if not payload.get("is_active", True):
+            return None
+
+        def load_user():
+            try:
+                return self.get_user(payload["user_id"])
+            except ObjectDoesNotExist:
+                return AnonymousUser()
+
+        return JWTClaimsUser(payload, load_user)